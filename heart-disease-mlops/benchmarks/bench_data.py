@@ -0,0 +1,54 @@
+"""
+Synthetic datasets with the Cleveland 13-feature schema for benchmarks
+
+Rows are bootstrapped from the processed Cleveland CSV and the continuous
+features get Gaussian jitter, so class signal, category codes and missing
+values keep their real distribution at any size.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR / "src"))
+
+from config import CONTINUOUS_FEATURES, FEATURE_NAMES, TARGET_NAME
+from preprocessing import HeartDiseasePreprocessor
+
+DATA_PATH = BASE_DIR / "data" / "processed" / "heart_disease.csv"
+
+
+def load_source(data_path=DATA_PATH):
+    """Load the rows synthetic datasets are bootstrapped from"""
+    return HeartDiseasePreprocessor().load_data(data_path)
+
+
+def make_frame(df, n_rows, seed=42, jitter=0.05):
+    """Bootstrap ``n_rows`` rows (features and target) with jittered continuous features"""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(df), size=n_rows)
+    sample = df.iloc[rows].reset_index(drop=True)
+
+    for column in CONTINUOUS_FEATURES:
+        values = sample[column].astype('float32')
+        scale = jitter * float(df[column].std())
+        sample[column] = values + rng.normal(0, scale, n_rows).astype('float32')
+    return sample[FEATURE_NAMES + [TARGET_NAME]]
+
+
+def make_dataset(df, n_rows, seed=42, jitter=0.05):
+    """Bootstrapped feature frame and target array"""
+    sample = make_frame(df, n_rows, seed=seed, jitter=jitter)
+    return sample[FEATURE_NAMES], sample[TARGET_NAME].to_numpy()
+
+
+def write_csv(df, n_rows, path, seed=42, chunk_rows=1_000_000):
+    """Write a bootstrapped dataset to CSV in chunks of ``chunk_rows``"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        chunk = make_frame(df, min(chunk_rows, n_rows - start), seed=seed + i)
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                     float_format='%.6g')
+    return path
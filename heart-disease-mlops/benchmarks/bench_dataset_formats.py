@@ -0,0 +1,97 @@
+"""
+Load time and memory of the dataset formats
+
+For each dataset size a CSV with the 13-feature schema is generated (see
+bench_data.py) together with its Parquet and Feather copies, and each is
+loaded with HeartDiseasePreprocessor.load_data: all columns, a projection
+of three columns, and a projection with a row filter.
+
+Usage:
+    python benchmarks/bench_dataset_formats.py
+    python benchmarks/bench_dataset_formats.py --sizes 1000000 --output results.json
+"""
+import argparse
+import gc
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from bench_data import load_source, write_csv
+from bench_training_pipeline import PeakMemory, environment
+from columnar import columnar_path, write_columnar
+from preprocessing import HeartDiseasePreprocessor
+
+DEFAULT_SIZES = [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+QUERIES = {
+    'all': {},
+    'project': {'columns': ['age', 'chol', 'target']},
+    'project+filter': {'columns': ['age', 'chol', 'target'], 'filters': [('age', '>=', 65)]},
+}
+
+
+def benchmark_size(n_rows, source, work_dir, memory):
+    """Load one generated dataset in every format and query shape"""
+    csv_path = write_csv(source, n_rows, Path(work_dir) / f"heart_{n_rows}.csv")
+    loader = HeartDiseasePreprocessor()
+    typed = loader.load_data(csv_path, prefer_columnar=False)
+    paths = {
+        'csv': csv_path,
+        'parquet': write_columnar(typed, columnar_path(csv_path, 'parquet')),
+        'feather': write_columnar(typed, columnar_path(csv_path, 'feather'), file_format='feather'),
+    }
+    del typed
+
+    results = []
+    for file_format, path in paths.items():
+        for query, options in QUERIES.items():
+            gc.collect()
+            record = {'n_rows': n_rows, 'format': file_format, 'query': query,
+                      'file_mb': path.stat().st_size / 2 ** 20}
+            with memory.measure(record):
+                df = loader.load_data(path, prefer_columnar=False, **options)
+            record['rows_loaded'] = len(df)
+            del df
+            results.append(record)
+            print(f"{n_rows:>10,} rows  {file_format:<8}{query:<16}{record['seconds']:>8.2f}s  "
+                  f"+{record['peak_delta_mb']:>8.1f} MB  file {record['file_mb']:.1f} MB")
+
+    for path in paths.values():
+        path.unlink()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="dataset sizes (rows)")
+    parser.add_argument('--output', type=Path, default=None,
+                        help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_formats_"))
+    source = load_source()
+    memory = PeakMemory()
+    results = []
+    try:
+        for n_rows in args.sizes:
+            results.extend(benchmark_size(n_rows, source, work_dir, memory))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    table = pd.DataFrame(results).pivot_table(index=['query', 'format'], columns='n_rows',
+                                              values=['seconds', 'peak_delta_mb'])
+    print("\n" + table.to_string(float_format=lambda value: f"{value:.2f}"))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({'environment': environment(), 'results': results},
+                                          indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
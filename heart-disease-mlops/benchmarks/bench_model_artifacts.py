@@ -0,0 +1,125 @@
+"""
+Cold-start load time, size and memory of the model artifact formats
+
+Random forests and gradient boosting models of several sizes are trained on
+a synthetic dataset (see bench_data.py) and saved in every artifact format
+(see src/artifacts.py). Each variant is then loaded in a fresh Python
+process, as a serving pod does at startup: the time of the load call alone
+(imports excluded) and the resident memory it added are reported.
+
+Usage:
+    python benchmarks/bench_model_artifacts.py
+    python benchmarks/bench_model_artifacts.py --trees 100 500 --output results.json
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+from bench_data import BASE_DIR, load_source, make_dataset
+from bench_training_pipeline import environment
+from artifacts import ARTIFACT_FORMATS, artifact_path, save_artifacts, supports_format
+
+DEFAULT_TREES = [100, 300, 1000]
+TRAIN_ROWS = 20000
+
+# Runs in the child process: imports first, then times the load alone
+LOAD_SCRIPT = """
+import json, sys, time
+import psutil
+sys.path.insert(0, {src!r})
+from artifacts import load_artifact
+import sklearn.ensemble, sklearn.tree  # imported by unpickling otherwise
+process = psutil.Process()
+rss = process.memory_info().rss
+start = time.perf_counter()
+model = load_artifact({path!r}, {artifact_format!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{'load_seconds': seconds,
+                  'rss_delta_mb': (process.memory_info().rss - rss) / 2 ** 20}}))
+"""
+
+
+def cold_load(path, artifact_format):
+    """Load one variant in a fresh interpreter and return its timing and memory"""
+    script = LOAD_SCRIPT.format(src=str(BASE_DIR / "src"), path=str(path),
+                                artifact_format=artifact_format)
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True,
+                            text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark_model(name, model, work_dir, repeats):
+    """Save ``model`` in every format and cold-load each variant"""
+    model_path = Path(work_dir) / f"{name}.pkl"
+    formats = [f for f in ARTIFACT_FORMATS if supports_format(model, f)]
+    saved = {result['format']: result for result in save_artifacts(model, model_path, formats)}
+
+    results = []
+    for artifact_format, measured in saved.items():
+        loads = [cold_load(artifact_path(model_path, artifact_format), artifact_format)
+                 for _ in range(repeats)]
+        record = {
+            'model': name,
+            'format': artifact_format,
+            'size_mb': measured['size_bytes'] / 2 ** 20,
+            'warm_load_ms': measured['load_ms'],
+            'cold_load_ms': min(load['load_seconds'] for load in loads) * 1000,
+            'rss_delta_mb': min(load['rss_delta_mb'] for load in loads),
+        }
+        results.append(record)
+        print(f"{name:<24}{artifact_format:<8}{record['size_mb']:>8.2f} MB"
+              f"{record['cold_load_ms']:>10.1f} ms cold{record['warm_load_ms']:>10.1f} ms warm"
+              f"  +{record['rss_delta_mb']:.1f} MB")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trees', type=int, nargs='+', default=DEFAULT_TREES,
+                        help="ensemble sizes (trees / boosting stages)")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="cold loads per variant (the fastest is reported)")
+    parser.add_argument('--output', type=Path, default=None,
+                        help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    X, y = make_dataset(load_source(), TRAIN_ROWS)
+    X = X.astype('float32')
+    X = X.fillna(X.median())
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_artifacts_"))
+    results = []
+    try:
+        for n_trees in args.trees:
+            models = {
+                f'random_forest_{n_trees}': RandomForestClassifier(
+                    n_estimators=n_trees, max_depth=10, min_samples_leaf=2, n_jobs=-1,
+                    random_state=42),
+                f'gradient_boosting_{n_trees}': GradientBoostingClassifier(
+                    n_estimators=n_trees, max_depth=3, random_state=42),
+            }
+            for name, model in models.items():
+                results.extend(benchmark_model(name, model.fit(X, y), work_dir, args.repeats))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    table = pd.DataFrame(results).pivot_table(index='model', columns='format',
+                                              values=['cold_load_ms', 'size_mb'])
+    print("\n" + table.to_string(float_format=lambda value: f"{value:.2f}"))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({'environment': environment(), 'results': results},
+                                          indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
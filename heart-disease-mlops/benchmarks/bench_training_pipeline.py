@@ -0,0 +1,231 @@
+"""
+Scaling benchmark for the training pipeline
+
+For each dataset size a CSV with the 13-feature schema is generated (see
+bench_data.py), then every pipeline stage is timed and its peak resident
+memory recorded:
+
+    load            HeartDiseasePreprocessor.load_data
+    split           stratified train/test split (as in prepare_data)
+    fit_transform   preprocessor fit on train, transform of test
+    fit:<family>    fit of each model family with DEFAULT_PARAMS
+    cv              one parallel cross-validation pass (ModelTrainer 'cv' mode)
+    log_model       MLflow model serialization and upload
+
+Memory is sampled from this process and its children (joblib workers), so
+parallel stages are included. Results are written as JSON, one record per
+(n_rows, stage), plus a summary table.
+
+Usage:
+    python benchmarks/bench_training_pipeline.py
+    python benchmarks/bench_training_pipeline.py --sizes 1000 100000 --output results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import psutil
+import sklearn
+from sklearn.model_selection import train_test_split
+
+from bench_data import load_source, write_csv
+from config import TARGET_NAME
+from preprocessing import HeartDiseasePreprocessor
+from train import BOOSTING_ENGINES, DEFAULT_PARAMS, FAMILY_OPTIONS, ModelTrainer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+import mlflow
+import tracking
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+DEFAULT_FAMILIES = ['logistic_regression', 'random_forest', 'gradient_boosting',
+                    'hist_gradient_boosting']
+
+# Families skipped above this many rows unless overridden with --row-limit
+DEFAULT_ROW_LIMITS = {'gradient_boosting': 1_000_000}
+
+
+def make_estimator(family):
+    """Estimator of a ModelTrainer family with its default parameters"""
+    if family == 'logistic_regression':
+        return LogisticRegression(**DEFAULT_PARAMS[family])
+    if family == 'random_forest':
+        return RandomForestClassifier(**DEFAULT_PARAMS[family])
+    engine = FAMILY_OPTIONS.get(family, {}).get('engine', 'exact')
+    _, estimator_class, _ = BOOSTING_ENGINES[engine]
+    return estimator_class(**DEFAULT_PARAMS[family])
+
+
+class PeakMemory:
+    """Sample the resident memory of this process and its children"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.process = psutil.Process(os.getpid())
+
+    def rss(self):
+        total = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    @contextmanager
+    def measure(self, record):
+        """Fill ``record`` with seconds, start RSS and peak RSS of the block"""
+        start_rss = peak = self.rss()
+        stop = threading.Event()
+
+        def sample():
+            nonlocal peak
+            while not stop.wait(self.interval):
+                peak = max(peak, self.rss())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            stop.set()
+            sampler.join()
+            peak = max(peak, self.rss())
+            record['start_rss_mb'] = start_rss / 2 ** 20
+            record['peak_rss_mb'] = peak / 2 ** 20
+            record['peak_delta_mb'] = (peak - start_rss) / 2 ** 20
+
+
+def benchmark_size(n_rows, source, families, row_limits, cv_family, work_dir, memory):
+    """Run every pipeline stage on one generated dataset"""
+    results = []
+
+    def stage(name):
+        record = {'n_rows': n_rows, 'stage': name}
+        results.append(record)
+        return memory.measure(record)
+
+    data_path = write_csv(source, n_rows, Path(work_dir) / f"heart_{n_rows}.csv")
+
+    preprocessor = HeartDiseasePreprocessor()
+    with stage('load'):
+        df = preprocessor.load_data(data_path)
+
+    with stage('split'):
+        X = df.drop(TARGET_NAME, axis=1)
+        y = df[TARGET_NAME]
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+    del df, X, y
+
+    with stage('fit_transform'):
+        X_train = preprocessor.fit_transform(X_train)
+        X_test = preprocessor.transform(X_test)
+
+    models = {}
+    for family in families:
+        if n_rows > row_limits.get(family, float('inf')):
+            print(f"{n_rows:>10,} rows  fit:{family} skipped (above row limit)")
+            continue
+        estimator = make_estimator(family)
+        with stage(f'fit:{family}'):
+            models[family] = estimator.fit(X_train, y_train)
+
+    if cv_family and n_rows <= row_limits.get(cv_family, float('inf')):
+        trainer = ModelTrainer(experiment_name="benchmark_training_pipeline", evaluation='cv')
+        with stage('cv'):
+            trainer._cross_validate(make_estimator(cv_family), X_train, y_train)
+
+    if models:
+        family, model = next(iter(models.items()))
+        with tracking.start_run(f"benchmark_{n_rows}", "benchmark_training_pipeline") as run:
+            with stage('log_model') as record:
+                run.log_model(model, "model")
+                tracking.wait()
+                record['family'] = family
+
+    data_path.unlink()
+    for record in results:
+        extra = f" ({record['family']})" if 'family' in record else ""
+        print(f"{n_rows:>10,} rows  {record['stage']:<32}{record['seconds']:>9.2f}s  "
+              f"peak {record['peak_rss_mb']:>9.1f} MB (+{record['peak_delta_mb']:.1f}){extra}")
+    return results
+
+
+def environment():
+    """Machine and library versions the results were measured with"""
+    return {
+        'cpu_count': os.cpu_count(),
+        'memory_gb': psutil.virtual_memory().total / 2 ** 30,
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'scikit_learn': sklearn.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def parse_row_limits(values):
+    """Parse ``family=rows`` pairs"""
+    limits = dict(DEFAULT_ROW_LIMITS)
+    for value in values or []:
+        family, rows = value.split('=')
+        limits[family] = int(float(rows))
+    return limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="dataset sizes (rows)")
+    parser.add_argument('--families', nargs='+', default=DEFAULT_FAMILIES,
+                        choices=list(DEFAULT_PARAMS))
+    parser.add_argument('--row-limit', nargs='*', metavar='FAMILY=ROWS',
+                        help="skip a family above ROWS rows (default: gradient_boosting=1e6)")
+    parser.add_argument('--cv-family', default='logistic_regression',
+                        help="family used for the cross-validation stage ('' to skip)")
+    parser.add_argument('--tracking-uri', default=None,
+                        help="MLflow tracking URI (default: a temporary file store)")
+    parser.add_argument('--output', type=Path, default=None,
+                        help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+    mlflow.set_tracking_uri(args.tracking_uri or (work_dir / "mlruns").as_uri())
+    row_limits = parse_row_limits(args.row_limit)
+
+    source = load_source()
+    memory = PeakMemory()
+    results = []
+    try:
+        for n_rows in args.sizes:
+            results.extend(benchmark_size(n_rows, source, args.families, row_limits,
+                                          args.cv_family, work_dir, memory))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    table = pd.DataFrame(results).pivot(index='stage', columns='n_rows',
+                                        values=['seconds', 'peak_rss_mb'])
+    table = table.reindex(pd.unique(pd.DataFrame(results)['stage']))
+    print("\n" + table.to_string(float_format=lambda value: f"{value:.2f}"))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({'environment': environment(), 'results': results},
+                                          indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
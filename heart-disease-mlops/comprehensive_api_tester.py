@@ -4,6 +4,7 @@ Comprehensive API Tester for Heart Disease ML API
 Generates realistic traffic to populate Prometheus metrics and Grafana dashboard
 """
 
+import os
 import requests
 import time
 import random
@@ -73,6 +74,22 @@ PATIENT_PROFILES = [
     }
 ]
 
+# Additional profiles drawn from the synthetic generator (src/synthetic.py),
+# e.g. SYNTHETIC_PATIENTS=10000 python comprehensive_api_tester.py
+SYNTHETIC_PATIENTS = int(os.getenv("SYNTHETIC_PATIENTS", "0"))
+
+def synthetic_patient_profiles(n: int, seed: int = 42) -> List[Dict]:
+    """Patient profiles that follow the Cleveland data distribution"""
+    from src.synthetic import SyntheticPatientGenerator
+    generator = SyntheticPatientGenerator.from_csv()
+    return [
+        {"name": f"Synthetic Patient {i + 1}", "data": record, "expected_risk": "Unknown"}
+        for i, record in enumerate(generator.iter_records(n, seed=seed))
+    ]
+
+if SYNTHETIC_PATIENTS:
+    PATIENT_PROFILES = PATIENT_PROFILES + synthetic_patient_profiles(SYNTHETIC_PATIENTS)
+
 # Statistics tracking
 class MetricsCollector:
     def __init__(self):
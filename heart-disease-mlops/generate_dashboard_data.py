@@ -2,6 +2,7 @@
 """
 Generate comprehensive traffic to populate Grafana dashboard
 """
+import os
 import requests
 import time
 import random
@@ -25,6 +26,12 @@ PATIENTS = [
     {"age": 35, "sex": 0, "cp": 1, "trestbps": 138, "chol": 183, "fbs": 1, "restecg": 1, "thalach": 182, "exang": 1, "oldpeak": 1.4, "slope": 2, "ca": 1, "thal": 2},
 ]
 
+# Additional patients drawn from the synthetic generator (src/synthetic.py)
+SYNTHETIC_PATIENTS = int(os.getenv("SYNTHETIC_PATIENTS", "0"))
+if SYNTHETIC_PATIENTS:
+    from src.synthetic import SyntheticPatientGenerator
+    PATIENTS += list(SyntheticPatientGenerator.from_csv().iter_records(SYNTHETIC_PATIENTS))
+
 def single_prediction(patient):
     """Send a single prediction request"""
     try:
@@ -15,6 +15,22 @@ from fastapi.responses import PlainTextResponse
 import time
 import psutil
 import os
+from typing import List, Union
+
+try:
+    from artifacts import load_fastest, model_stamp
+    from config import COMPILED_PREDICTOR_MAX_ROWS, INFERENCE_PRECISION
+    from drift import DriftReference, FeatureDriftMonitor
+    from explain import ExplainerCache
+    from precision import input_dtype, reduced_precision_predictor
+    from tree_predictor import compile_predictor
+except ImportError:  # imported as part of the ``src`` package
+    from src.artifacts import load_fastest, model_stamp
+    from src.config import COMPILED_PREDICTOR_MAX_ROWS, INFERENCE_PRECISION
+    from src.drift import DriftReference, FeatureDriftMonitor
+    from src.explain import ExplainerCache
+    from src.precision import input_dtype, reduced_precision_predictor
+    from src.tree_predictor import compile_predictor
 
 # Configure logging
 logging.basicConfig(
@@ -46,11 +62,18 @@ BATCH_REQUEST_COUNT = Counter('batch_prediction_requests_total', 'Total batch pr
 BATCH_SIZE = Histogram('batch_prediction_size', 'Batch prediction size')
 BATCH_LATENCY = Histogram('batch_prediction_latency_seconds', 'Batch prediction latency')
 
+# Explanation metrics
+EXPLAIN_REQUEST_COUNT = Counter('explain_requests_total', 'Total explanation requests')
+EXPLAIN_LATENCY = Histogram('explain_latency_seconds', 'Explanation latency')
+
 # System metrics
 CPU_USAGE = Gauge('api_cpu_usage_percent', 'CPU usage percentage')
 MEMORY_USAGE = Gauge('api_memory_usage_bytes', 'Memory usage in bytes')
 MEMORY_PERCENT = Gauge('api_memory_usage_percent', 'Memory usage percentage')
 
+# Model artifact loaded at startup
+MODEL_LOAD_SECONDS = Gauge('model_load_seconds', 'Time to load the model artifact', ['format'])
+
 # API health
 API_HEALTH = Gauge('api_health_status', 'API health status (1=healthy, 0=unhealthy)')
 
@@ -109,16 +132,72 @@ async def track_requests(request, call_next):
 BASE_DIR = Path(__file__).parent.parent
 MODEL_PATH = BASE_DIR / "models" / "best_model.pkl"
 PREPROCESSOR_PATH = BASE_DIR / "models" / "preprocessor.pkl"
+DRIFT_REFERENCE_PATH = BASE_DIR / "models" / "drift_reference.json"
 
+model_format = None
+model_version = None
+compiled_predictor = None
+# Input dtype of the predictor: None keeps the preprocessor's float64 path
+inference_dtype = None if INFERENCE_PRECISION == 'float64' else input_dtype(INFERENCE_PRECISION)
 try:
-    model = joblib.load(MODEL_PATH)
+    # The fastest-loading variant written by save_model (see artifacts.py)
+    load_start = time.perf_counter()
+    model, model_format = load_fastest(MODEL_PATH)
+    model_version = model_stamp(MODEL_PATH)
+    MODEL_LOAD_SECONDS.labels(format=model_format).set(time.perf_counter() - load_start)
     preprocessor = joblib.load(PREPROCESSOR_PATH)
-    logger.info("Model and preprocessor loaded successfully!")
+    logger.info(f"Model ({model_format} artifact) and preprocessor loaded successfully!")
+    # Vectorized traversal of tree ensembles (None for other models)
+    if inference_dtype is None:
+        compiled_predictor = compile_predictor(model)
+    else:
+        compiled_predictor = reduced_precision_predictor(model, INFERENCE_PRECISION)
+    if compiled_predictor is not None:
+        logger.info(f"Serving with compiled predictor {compiled_predictor}")
 except Exception as e:
     logger.error(f"Error loading model: {e}")
     model = None
     preprocessor = None
 
+# Explainers of the loaded model, built on the first /predict/explain request
+explainers = ExplainerCache()
+
+# Feature drift monitoring (drift scores are computed at scrape time)
+drift_monitor = None
+if DRIFT_REFERENCE_PATH.exists():
+    try:
+        drift_monitor = FeatureDriftMonitor(DriftReference.load(DRIFT_REFERENCE_PATH))
+        REGISTRY.register(drift_monitor)
+        logger.info("Drift reference loaded, feature drift monitoring enabled")
+    except Exception as e:
+        logger.error(f"Error loading drift reference: {e}")
+        drift_monitor = None
+
+
+def predict_with_model(input_processed):
+    """
+    Predicted classes and positive-class probabilities of preprocessed rows
+    
+    Small batches use the compiled tree predictor when there is one; in
+    reduced-precision mode every batch uses the reduced-precision predictor.
+    """
+    predictor = model
+    if compiled_predictor is not None and (inference_dtype is not None or
+                                           len(input_processed) <= COMPILED_PREDICTOR_MAX_ROWS):
+        predictor = compiled_predictor
+    probabilities = predictor.predict_proba(input_processed)
+    predictions = predictor.classes_[np.argmax(probabilities, axis=1)]
+    return predictions, probabilities[:, 1]
+
+
+def risk_level_of(probability):
+    """Low (<0.3), Medium (0.3-0.7) or High (>0.7)"""
+    if probability < 0.3:
+        return "Low"
+    if probability < 0.7:
+        return "Medium"
+    return "High"
+
 
 class PatientData(BaseModel):
     """Input schema for patient data"""
@@ -191,6 +270,9 @@ async def health_check():
         "status": "healthy",
         "model_loaded": model is not None,
         "preprocessor_loaded": preprocessor is not None,
+        "model_format": model_format,
+        "compiled_predictor": compiled_predictor is not None,
+        "inference_precision": INFERENCE_PRECISION,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -225,19 +307,16 @@ async def predict(patient_data: PatientData):
         logger.info(f"Received prediction request: {input_data.to_dict('records')[0]}")
         
         # Preprocess
-        input_processed = preprocessor.transform(input_data)
+        input_processed = preprocessor.transform(input_data, dtype=inference_dtype)
+        if drift_monitor is not None:
+            drift_monitor.update(input_processed)
         
         # Predict
-        prediction = model.predict(input_processed)[0]
-        probability = model.predict_proba(input_processed)[0][1]
+        predictions, probabilities = predict_with_model(input_processed)
+        prediction, probability = predictions[0], probabilities[0]
         
         # Determine risk level
-        if probability < 0.3:
-            risk_level = "Low"
-        elif probability < 0.7:
-            risk_level = "Medium"
-        else:
-            risk_level = "High"
+        risk_level = risk_level_of(probability)
         
         # Log prediction and update metrics
         PREDICTION_COUNTER.labels(prediction=str(prediction)).inc()
@@ -275,24 +354,22 @@ async def predict_batch(patients: list[PatientData]):
     if model is None or preprocessor is None:
         raise HTTPException(status_code=503, detail="Model not available")
     
+    if not patients:
+        return {"predictions": [], "count": 0, "batch_latency": time.time() - start_time}
+    
     try:
+        # Preprocess and predict the whole batch at once
+        input_data = pd.DataFrame([patient_data.dict() for patient_data in patients])
+        input_processed = preprocessor.transform(input_data, dtype=inference_dtype)
+        if drift_monitor is not None:
+            drift_monitor.update(input_processed)
+        
+        batch_predictions, batch_probabilities = predict_with_model(input_processed)
+        
         predictions = []
-        for patient_data in patients:
-            # Convert to DataFrame
-            input_data = pd.DataFrame([patient_data.dict()])
-            
-            # Preprocess and predict
-            input_processed = preprocessor.transform(input_data)
-            prediction = model.predict(input_processed)[0]
-            probability = model.predict_proba(input_processed)[0][1]
-            
+        for prediction, probability in zip(batch_predictions, batch_probabilities):
             # Determine risk level
-            if probability < 0.3:
-                risk_level = "Low"
-            elif probability < 0.7:
-                risk_level = "Medium"
-            else:
-                risk_level = "High"
+            risk_level = risk_level_of(probability)
             
             # Update metrics
             PREDICTION_RESULTS.labels(result=str(prediction)).inc()
@@ -320,6 +397,71 @@ async def predict_batch(patients: list[PatientData]):
         raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
 
 
+@app.post("/predict/explain", tags=["Prediction"])
+async def predict_explain(patients: Union[PatientData, List[PatientData]]):
+    """
+    Explain the heart disease risk predicted for one or more patients
+    
+    Each explanation holds the prediction, probability and risk level, the
+    base value (the model's expected output over the training data) and
+    one contribution per feature. The base value plus the contributions
+    gives the model output, in ``output_space``: the probability of
+    disease for forests, log-odds for logistic regression and boosting.
+    """
+    start_time = time.time()
+    EXPLAIN_REQUEST_COUNT.inc()
+    
+    if model is None or preprocessor is None:
+        raise HTTPException(status_code=503, detail="Model not available")
+    
+    explainer = explainers.get(model_version, model, compiled_predictor)
+    if explainer is None:
+        raise HTTPException(status_code=501,
+                            detail=f"Explanations are not supported for {type(model).__name__}")
+    
+    if isinstance(patients, PatientData):
+        patients = [patients]
+    if not patients:
+        return {"explanations": [], "count": 0, "output_space": explainer.output_space,
+                "latency": time.time() - start_time}
+    
+    try:
+        input_data = pd.DataFrame([patient_data.dict() for patient_data in patients])
+        input_processed = preprocessor.transform(input_data, dtype=inference_dtype)
+        explanation = explainer.explain(input_processed)
+        
+        # The positive class (the single output of binary boosting / linear models)
+        base_value = float(explanation.base_values[-1])
+        contributions = explanation.contributions[:, :, -1]
+        outputs = explanation.outputs[:, -1]
+        probabilities = explanation.probabilities[:, 1]
+        predictions = explainer.classes_[np.argmax(explanation.probabilities, axis=1)]
+        
+        explanations = []
+        for i in range(len(patients)):
+            explanations.append({
+                "prediction": int(predictions[i]),
+                "probability": float(probabilities[i]),
+                "risk_level": risk_level_of(probabilities[i]),
+                "base_value": base_value,
+                "output": float(outputs[i]),
+                "contributions": dict(zip(input_processed.columns, contributions[i].tolist())),
+            })
+        
+        latency = time.time() - start_time
+        EXPLAIN_LATENCY.observe(latency)
+        return {
+            "explanations": explanations,
+            "count": len(explanations),
+            "output_space": explanation.output_space,
+            "latency": latency
+        }
+    
+    except Exception as e:
+        logger.error(f"Explanation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Explanation failed: {str(e)}")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
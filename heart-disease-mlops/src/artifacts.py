@@ -0,0 +1,351 @@
+"""
+Model artifact formats and the fastest-loading variant for serving
+
+``best_model.pkl`` is always written as an uncompressed joblib pickle: its
+numpy arrays are stored aligned in the file, so ``joblib.load(mmap_mode='r')``
+maps them instead of copying. Next to it, ``save_artifacts`` can write
+further variants of the same model:
+
+- 'zlib' / 'lz4' / 'zstd': compressed joblib pickles (``best_model.pkl.z``,
+  ``.lz4``, ``.zst``). lz4 and zstd need the ``lz4`` / ``zstandard``
+  packages and are skipped without them.
+- 'flat': tree models only (``best_model.flat/``). The nodes of every tree
+  are concatenated into one ``nodes.npy`` / ``values.npy`` pair in
+  sklearn's node layout, plus a small pickle of the estimator without its
+  trees. Loading reads two arrays instead of unpickling one object per tree.
+
+Each variant is loaded back and measured (size on disk, load time, memory
+allocated while loading); the results go to ``best_model.formats.json``.
+``load_fastest`` reads that index and loads the variant with the lowest
+load time whose dependencies are installed, falling back to the pickle.
+
+Load times are measured in the writing process, with the file in the page
+cache; see benchmarks/bench_model_artifacts.py for loads in fresh processes.
+"""
+import copy
+import json
+import os
+import shutil
+import time
+import tracemalloc
+from pathlib import Path
+
+import joblib
+import numpy as np
+import logging
+
+try:
+    import lz4.frame  # noqa: F401
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMATS = ('pickle', 'zlib', 'lz4', 'zstd', 'flat')
+
+# Compression level per compressed format (joblib's ``compress=(name, level)``)
+COMPRESSION_LEVELS = {'zlib': 3, 'lz4': 3, 'zstd': 3}
+
+_SUFFIXES = {'zlib': '.z', 'lz4': '.lz4', 'zstd': '.zst'}
+
+
+if HAS_ZSTD:
+    from joblib.compressor import CompressorWrapper
+
+    class _ZstdCompressorWrapper(CompressorWrapper):
+        """Teach joblib to write and detect zstd-compressed pickles"""
+
+        prefix = b'\x28\xb5\x2f\xfd'
+        extension = '.zst'
+
+        def __init__(self):
+            # compressor_file / decompressor_file are overridden instead
+            self.fileobj_factory = None
+
+        def compressor_file(self, fileobj, compresslevel=None):
+            level = COMPRESSION_LEVELS['zstd'] if compresslevel is None else compresslevel
+            return zstandard.open(fileobj, 'wb', cctx=zstandard.ZstdCompressor(level=level))
+
+        def decompressor_file(self, fileobj):
+            return zstandard.open(fileobj, 'rb')
+
+    joblib.register_compressor('zstd', _ZstdCompressorWrapper(), force=True)
+
+
+def artifact_path(model_path, artifact_format):
+    """Path of one format's variant of the model saved at ``model_path``"""
+    model_path = Path(model_path)
+    if artifact_format == 'pickle':
+        return model_path
+    if artifact_format == 'flat':
+        return model_path.with_suffix('.flat')
+    if artifact_format in _SUFFIXES:
+        return model_path.with_name(model_path.name + _SUFFIXES[artifact_format])
+    raise ValueError(f"Unknown artifact format: {artifact_format}")
+
+
+def index_path(model_path):
+    """Path of the JSON index of a model's variants"""
+    return Path(model_path).with_suffix('.formats.json')
+
+
+def model_stamp(path):
+    """Version of the file at ``path`` (size and modification time)"""
+    stat = Path(path).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _tree_estimators(model):
+    """Fitted decision trees of a tree or tree ensemble, in ``np.ravel`` order"""
+    if hasattr(model, 'tree_'):
+        return [model]
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None:
+        return []
+    trees = list(np.ravel(np.asarray(estimators, dtype=object)))
+    if not trees or not all(hasattr(tree, 'tree_') for tree in trees):
+        return []
+    return trees
+
+
+def supports_format(model, artifact_format):
+    """True if ``artifact_format`` can be written for ``model`` in this environment"""
+    if artifact_format == 'lz4':
+        return HAS_LZ4
+    if artifact_format == 'zstd':
+        return HAS_ZSTD
+    if artifact_format == 'flat':
+        trees = _tree_estimators(model)
+        # One values array requires every tree to have the same outputs and classes
+        return bool(trees) and len({tree.tree_.value.shape[1:] for tree in trees}) == 1
+    return artifact_format in ARTIFACT_FORMATS
+
+
+def _dump_flat(model, path):
+    """Write the tree nodes of ``model`` as contiguous arrays plus a tree-less skeleton"""
+    trees = _tree_estimators(model)
+    states = [tree.tree_.__getstate__() for tree in trees]
+    meta = []
+    stripped = []
+    for tree, state in zip(trees, states):
+        n_features, n_classes, n_outputs = tree.tree_.__reduce__()[1]
+        meta.append({'n_features': int(n_features), 'n_classes': np.asarray(n_classes),
+                     'n_outputs': int(n_outputs), 'max_depth': int(state['max_depth'])})
+        shell = copy.copy(tree)
+        shell.tree_ = None
+        stripped.append(shell)
+
+    if hasattr(model, 'tree_'):
+        skeleton = stripped[0]
+    else:
+        skeleton = copy.copy(model)
+        estimators = np.empty(len(stripped), dtype=object)
+        estimators[:] = stripped
+        if isinstance(model.estimators_, np.ndarray):
+            skeleton.estimators_ = estimators.reshape(model.estimators_.shape)
+        else:
+            skeleton.estimators_ = list(estimators)
+
+    path.mkdir(parents=True)
+    np.save(path / "nodes.npy", np.concatenate([state['nodes'] for state in states]))
+    np.save(path / "values.npy", np.concatenate([state['values'] for state in states]))
+    np.save(path / "offsets.npy", np.cumsum([0] + [state['node_count'] for state in states]))
+    joblib.dump({'model': skeleton, 'trees': meta}, path / "skeleton.pkl")
+
+
+def _load_flat(path, mmap_mode='r'):
+    """Rebuild the estimator written by ``_dump_flat``"""
+    from sklearn.tree._tree import Tree
+
+    path = Path(path)
+    skeleton = joblib.load(path / "skeleton.pkl")
+    nodes = np.load(path / "nodes.npy", mmap_mode=mmap_mode)
+    values = np.load(path / "values.npy", mmap_mode=mmap_mode)
+    offsets = np.load(path / "offsets.npy")
+
+    model = skeleton['model']
+    for i, (tree, meta) in enumerate(zip(_tree_estimators(model), skeleton['trees'])):
+        start, stop = offsets[i], offsets[i + 1]
+        tree_ = Tree(meta['n_features'], meta['n_classes'], meta['n_outputs'])
+        # __setstate__ copies the nodes into the Tree's own buffers
+        tree_.__setstate__({
+            'max_depth': meta['max_depth'],
+            'node_count': int(stop - start),
+            'nodes': np.ascontiguousarray(nodes[start:stop]),
+            'values': np.ascontiguousarray(values[start:stop]),
+        })
+        tree.tree_ = tree_
+    return model
+
+
+def dump_artifact(model, model_path, artifact_format='pickle'):
+    """
+    Write one variant of ``model`` and return its path
+
+    The file (or directory) is written next to its final path and moved
+    into place, so a server that has the previous version memory-mapped
+    keeps reading an intact file.
+    """
+    path = artifact_path(model_path, artifact_format)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if artifact_format == 'flat':
+        _dump_flat(model, tmp)
+        if path.exists():
+            shutil.rmtree(path)
+    elif artifact_format == 'pickle':
+        joblib.dump(model, tmp)
+    else:
+        joblib.dump(model, tmp, compress=(artifact_format, COMPRESSION_LEVELS[artifact_format]))
+    os.replace(tmp, path)
+    return path
+
+
+def load_artifact(path, artifact_format='pickle', mmap=True):
+    """
+    Load one variant
+
+    Parameters:
+    -----------
+    mmap : bool
+        Memory-map the arrays of uncompressed formats ('pickle', 'flat')
+        read-only instead of reading them into memory
+    """
+    mmap_mode = 'r' if mmap else None
+    if artifact_format == 'flat':
+        return _load_flat(path, mmap_mode=mmap_mode)
+    if artifact_format == 'pickle':
+        return joblib.load(path, mmap_mode=mmap_mode)
+    # Compression is detected from the file header
+    return joblib.load(path)
+
+
+def _size_bytes(path):
+    path = Path(path)
+    if path.is_dir():
+        return sum(child.stat().st_size for child in path.rglob('*') if child.is_file())
+    return path.stat().st_size
+
+
+def benchmark_artifact(path, artifact_format, n_repeats=5):
+    """
+    Size on disk, median load time and memory allocated by loading one variant
+
+    Returns:
+    --------
+    dict with format, size_bytes, load_ms and memory_mb (tracemalloc peak
+    during a separate load)
+    """
+    timings = []
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        loaded = load_artifact(path, artifact_format)
+        timings.append((time.perf_counter() - start) * 1000)
+        del loaded
+
+    # Separate load under tracemalloc, which slows allocation down
+    tracemalloc.start()
+    loaded = load_artifact(path, artifact_format)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+
+    return {
+        'format': artifact_format,
+        'size_bytes': _size_bytes(path),
+        'load_ms': float(np.median(timings)),
+        'memory_mb': peak / 2 ** 20,
+    }
+
+
+def save_artifacts(model, model_path, formats=('pickle',), n_repeats=5):
+    """
+    Write ``model`` in several formats, measure each and index them
+
+    The 'pickle' variant (``model_path`` itself) is always written, as the
+    canonical artifact; formats unsupported for this model or missing their
+    package are skipped. Variants of formats not requested this time are
+    deleted, so the index never points at an older model.
+
+    Returns:
+    --------
+    list of dicts (one per written format) with format, path, size_bytes,
+    load_ms and memory_mb
+    """
+    model_path = Path(model_path)
+    requested = ['pickle'] + [name for name in formats if name != 'pickle']
+    unknown = set(requested) - set(ARTIFACT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown artifact formats: {sorted(unknown)}")
+
+    results = []
+    for artifact_format in requested:
+        if not supports_format(model, artifact_format):
+            logger.info(f"Skipping {artifact_format} artifact (not supported for "
+                        f"{type(model).__name__} or package not installed)")
+            continue
+        path = dump_artifact(model, model_path, artifact_format)
+        results.append({**benchmark_artifact(path, artifact_format, n_repeats=n_repeats),
+                        'path': path.name})
+
+    written = {result['format'] for result in results}
+    for artifact_format in ARTIFACT_FORMATS:
+        stale = artifact_path(model_path, artifact_format)
+        if artifact_format not in written and stale.exists():
+            shutil.rmtree(stale) if stale.is_dir() else stale.unlink()
+
+    fastest = min(results, key=lambda result: result['load_ms'])['format']
+    index = {
+        'model': model_path.name,
+        'model_stamp': model_stamp(model_path),
+        'fastest': fastest,
+        'formats': {result['format']: result for result in results},
+    }
+    tmp = index_path(model_path).with_suffix('.tmp')
+    tmp.write_text(json.dumps(index, indent=2))
+    os.replace(tmp, index_path(model_path))
+    logger.info(f"Saved {model_path.name} as {sorted(written)}; fastest to load: {fastest}")
+    return results
+
+
+def load_fastest(model_path, mmap=True):
+    """
+    Load the fastest variant of the model saved at ``model_path``
+
+    Variants are tried in order of measured load time; one whose package is
+    missing or that fails to load is skipped. Without an index, or when
+    ``model_path`` changed after the index was written, the pickle is loaded.
+
+    Returns:
+    --------
+    model, name of the format it was loaded from
+    """
+    model_path = Path(model_path)
+    try:
+        index = json.loads(index_path(model_path).read_text())
+        if index['model_stamp'] != model_stamp(model_path):
+            raise ValueError("index is older than the model")
+        ranked = sorted(index['formats'].values(), key=lambda result: result['load_ms'])
+    except (OSError, ValueError, KeyError) as e:
+        logger.info(f"No usable artifact index for {model_path.name} ({e}), loading the pickle")
+        ranked = []
+
+    for result in ranked:
+        artifact_format = result['format']
+        path = artifact_path(model_path, artifact_format)
+        if (artifact_format == 'lz4' and not HAS_LZ4) or (artifact_format == 'zstd' and not HAS_ZSTD) \
+                or not path.exists():
+            continue
+        try:
+            return load_artifact(path, artifact_format, mmap=mmap), artifact_format
+        except Exception as e:
+            logger.warning(f"Could not load {path.name}: {e}")
+    return load_artifact(model_path, 'pickle', mmap=mmap), 'pickle'
@@ -0,0 +1,193 @@
+"""
+Execution backends for cross-validation and hyperparameter search
+
+``ModelTrainer`` runs its cross-validation and search fits through joblib,
+inside ``ExecutionBackend.context``. The backend decides where the fits run:
+
+- 'loky' (default): a pool of local worker processes. Arrays larger than
+  ``max_nbytes`` are dumped to a memory-mapped file once per parallel call
+  and shared by every task instead of being pickled into each one.
+- 'threading' / 'sequential': in-process, for debugging and tiny data.
+- 'dask': the workers of a dask.distributed cluster, possibly on several
+  machines. The training arrays are scattered to the workers once and the
+  tasks only carry references to them. Without ``scheduler_address`` a
+  ``LocalCluster`` with ``local_workers`` processes is started as a
+  stand-in, so the same code path can be exercised on one host. A backend
+  pickled after its LocalCluster started (e.g. into train_all's family
+  processes) connects to that cluster instead of starting another.
+
+``fanout_stats`` summarises how the tasks of one parallel call were spread
+over the workers (task count, wall time, slowest task relative to the
+median, and parallel efficiency); ModelTrainer logs it to MLflow.
+"""
+import contextlib
+import os
+
+import numpy as np
+from joblib import parallel_config
+import logging
+
+try:
+    import distributed  # noqa: F401
+    HAS_DASK = True
+except ImportError:
+    HAS_DASK = False
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('loky', 'threading', 'sequential', 'dask')
+
+
+class ExecutionBackend:
+    """
+    Where joblib-parallel training work runs
+
+    Parameters:
+    -----------
+    name : {'loky', 'threading', 'sequential', 'dask'}
+    n_jobs : int
+        Parallel tasks (-1: every local core, or every cluster worker thread)
+    scheduler_address : str, optional
+        dask scheduler to connect to, e.g. 'tcp://scheduler:8786'
+    local_workers : int, optional
+        Worker processes of the LocalCluster started when no scheduler
+        address is given (default: os.cpu_count())
+    max_nbytes : str or int
+        loky only: arrays above this size are memory-mapped once per call
+    """
+
+    def __init__(self, name='loky', n_jobs=-1, scheduler_address=None, local_workers=None,
+                 max_nbytes='1M'):
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown execution backend: {name}")
+        if name == 'dask' and not HAS_DASK:
+            raise ImportError("The 'dask' backend requires dask.distributed (pip install distributed)")
+        self.name = name
+        self.n_jobs = n_jobs
+        self.scheduler_address = scheduler_address
+        self.local_workers = local_workers
+        self.max_nbytes = max_nbytes
+        self._client = None
+
+    def __getstate__(self):
+        # Worker processes rebuild their own client from the address. A
+        # LocalCluster started here is shared by passing its address, rather
+        # than having every worker process start a full-size cluster of its own.
+        state = dict(self.__dict__)
+        if self._client is not None and not self.scheduler_address:
+            state['scheduler_address'] = self._client.scheduler.address
+        state['_client'] = None
+        return state
+
+    def __repr__(self):
+        return f"ExecutionBackend({self.name!r}, n_jobs={self.n_jobs})"
+
+    @property
+    def client(self):
+        """dask.distributed Client, started on first use (dask backend only)"""
+        if self._client is None:
+            from distributed import Client, LocalCluster
+
+            if self.scheduler_address:
+                self._client = Client(self.scheduler_address)
+            else:
+                cluster = LocalCluster(n_workers=self.local_workers or os.cpu_count() or 1,
+                                       threads_per_worker=1, processes=True)
+                self._client = Client(cluster)
+            logger.info(f"Connected to dask scheduler {self._client.scheduler.address}")
+        return self._client
+
+    def n_workers(self, n_jobs=None):
+        """Number of tasks that can run at once (for ``n_jobs``, default: the backend's)"""
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
+        if n_jobs is None:
+            n_jobs = 1
+        if self.name == 'sequential':
+            return 1
+        if self.name == 'dask':
+            threads = max(1, sum(self.client.nthreads().values()))
+            return threads if n_jobs < 0 else min(n_jobs, threads)
+        if n_jobs < 0:
+            # joblib convention: -1 is every core, -2 all but one, ...
+            return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+        return max(1, n_jobs)
+
+    @contextlib.contextmanager
+    def context(self, *arrays, n_jobs=None):
+        """
+        Run joblib calls (sklearn's n_jobs, search engines) on this backend
+
+        ``arrays`` are the training data shared by every task: scattered to
+        the cluster once on 'dask', memory-mapped once per call on 'loky'.
+        ``n_jobs`` replaces the backend's for the calls in this context;
+        callers pass n_jobs=None to sklearn so this setting applies.
+        """
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
+        if self.name == 'dask':
+            scatter = [array for array in arrays if array is not None] or None
+            with parallel_config(backend='dask', n_jobs=n_jobs, wait_for_workers_timeout=60,
+                                 scatter=scatter, client=self.client):
+                yield self
+        elif self.name == 'loky':
+            with parallel_config(backend='loky', n_jobs=n_jobs, max_nbytes=self.max_nbytes):
+                yield self
+        else:
+            with parallel_config(backend=self.name, n_jobs=n_jobs):
+                yield self
+
+    def close(self):
+        """Shut down a client (and its local cluster) started by this backend"""
+        if self._client is not None:
+            cluster = self._client.cluster
+            self._client.close()
+            if cluster is not None and not self.scheduler_address:
+                cluster.close()
+            self._client = None
+
+
+def make_backend(backend=None, n_jobs=-1):
+    """ExecutionBackend from an instance, a backend name or None (loky)"""
+    if isinstance(backend, ExecutionBackend):
+        return backend
+    return ExecutionBackend(backend or 'loky', n_jobs=n_jobs)
+
+
+def fanout_stats(task_seconds, wall_seconds, n_workers, prefix):
+    """
+    Summarise one parallel call
+
+    Parameters:
+    -----------
+    task_seconds : sequence of float
+        Duration of every task (one fit and score)
+    wall_seconds : float
+        Elapsed time of the whole call
+    n_workers : int
+        Tasks that could run at once
+    prefix : str
+        Prefix of the metric names, e.g. 'cv' or 'search'
+
+    Returns:
+    --------
+    dict of metrics: tasks, workers, wall time, total / median / max task
+    time, straggler ratio (max / median task) and parallel efficiency
+    (total task time / (wall time x busy workers))
+    """
+    task_seconds = np.asarray(task_seconds, dtype=float)
+    n_tasks = len(task_seconds)
+    if n_tasks == 0:
+        return {}
+    median = float(np.median(task_seconds))
+    busy = max(1, min(n_workers, n_tasks))
+    efficiency = float(task_seconds.sum() / (wall_seconds * busy)) if wall_seconds > 0 else 1.0
+    return {
+        f'{prefix}_n_tasks': n_tasks,
+        f'{prefix}_n_workers': n_workers,
+        f'{prefix}_wall_seconds': wall_seconds,
+        f'{prefix}_task_seconds_total': float(task_seconds.sum()),
+        f'{prefix}_task_seconds_p50': median,
+        f'{prefix}_task_seconds_max': float(task_seconds.max()),
+        f'{prefix}_straggler_ratio': float(task_seconds.max() / median) if median > 0 else 1.0,
+        f'{prefix}_parallel_efficiency': efficiency,
+    }
@@ -0,0 +1,267 @@
+"""
+Streaming parser for the raw 76-attribute ``cleveland.data`` format
+
+Each patient record is 76 whitespace-separated values spread over several
+lines; the 76th value is the literal token ``name`` (the anonymised patient
+name) and marks the end of the record. Missing values are coded as -9.
+
+The file is read in fixed-size byte chunks cut after the last complete
+record; only the bytes of an unfinished record are carried to the next
+chunk, so memory stays bounded by the chunk size however large the
+(possibly concatenated) extract is. Each chunk is rewritten to one record
+per line and parsed by the pandas C parser. Chunks where that finds a
+problem are re-parsed token by token: records with the wrong number of
+values or non-numeric tokens are counted in a ParseReport and skipped.
+
+Usage:
+    python src/cleveland_parser.py data/raw/cleveland.data --output data/processed/cleveland_full.parquet
+"""
+import argparse
+import io
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Attributes 1-75 of heart-disease.names (the 76th, 'name', ends each record)
+ATTRIBUTES = [
+    'id', 'ccf', 'age', 'sex', 'painloc', 'painexer', 'relrest', 'pncaden', 'cp', 'trestbps',
+    'htn', 'chol', 'smoke', 'cigs', 'years', 'fbs', 'dm', 'famhist', 'restecg', 'ekgmo',
+    'ekgday', 'ekgyr', 'dig', 'prop', 'nitr', 'pro', 'diuretic', 'proto', 'thaldur', 'thaltime',
+    'met', 'thalach', 'thalrest', 'tpeakbps', 'tpeakbpd', 'dummy', 'trestbpd', 'exang', 'xhypo',
+    'oldpeak', 'slope', 'rldv5', 'rldv5e', 'ca', 'restckm', 'exerckm', 'restef', 'restwm',
+    'exeref', 'exerwm', 'thal', 'thalsev', 'thalpul', 'earlobe', 'cmo', 'cday', 'cyr', 'num',
+    'lmt', 'ladprox', 'laddist', 'diag', 'cxmain', 'ramus', 'om1', 'om2', 'rcaprox', 'rcadist',
+    'lvx1', 'lvx2', 'lvx3', 'lvx4', 'lvf', 'cathef', 'junk',
+]
+RECORD_END = b'name'
+MISSING_VALUE = -9
+
+CHUNK_BYTES = 4 * 2 ** 20
+BATCH_ROWS = 65536
+
+# Longest run of bytes without a record end before it is reported and dropped
+MAX_RECORD_BYTES = 64 * 1024
+
+_WHITESPACE = bytes.maketrans(b'\t\n\r\x0b\x0c', b'     ')
+
+# Malformed records kept as examples in a ParseReport (all are counted)
+MAX_REPORTED_ERRORS = 100
+
+
+class ParseReport:
+    """Record counts and examples of malformed records seen by a parser"""
+
+    def __init__(self, max_errors=MAX_REPORTED_ERRORS):
+        self.records = 0
+        self.malformed = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, record_index, reason, tokens):
+        self.malformed += 1
+        if len(self.errors) < self.max_errors:
+            preview = b' '.join(tokens[:8]).decode('latin-1')
+            self.errors.append({'record': record_index, 'reason': reason, 'start': preview})
+
+    def to_dict(self):
+        return {'records': self.records, 'malformed': self.malformed, 'errors': self.errors}
+
+
+def _last_record_end(data):
+    """Offset just past the last whole ``name`` token followed by whitespace (0 if none)"""
+    pos = len(data)
+    while True:
+        pos = data.rfind(RECORD_END, 0, pos)
+        if pos < 0:
+            return 0
+        end = pos + len(RECORD_END)
+        if (pos == 0 or data[pos - 1:pos].isspace()) and data[end:end + 1].isspace():
+            return end
+
+
+def _parse_csv(data):
+    """
+    Fast path: one record per line through the pandas C parser
+
+    Returns None unless every record has exactly 75 numeric values.
+    """
+    text = (b' ' + data.translate(_WHITESPACE) + b' ').replace(b' name ', b'\n')
+    n_records = text.count(b'\n')
+    try:
+        values = pd.read_csv(io.BytesIO(text), sep=' ', skipinitialspace=True, header=None,
+                             names=range(len(ATTRIBUTES) + 1), dtype=np.float64,
+                             engine='c').to_numpy()
+    except ValueError:
+        return None
+    # A missing value is coded -9, so NaN means the record had too few/many tokens
+    if len(values) != n_records or np.isnan(values[:, :-1]).any() or not np.isnan(values[:, -1]).all():
+        return None
+    return values[:, :-1]
+
+
+def _parse_tokens(data, first_index, report):
+    """Slow path: split into tokens and check each record, reporting malformed ones"""
+    n_values = len(ATTRIBUTES)
+    tokens = np.array(data.split(), dtype=np.bytes_)
+    ends = np.flatnonzero(tokens == RECORD_END)
+
+    # Values of record k are tokens[ends[k-1] + 1:ends[k]]
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    lengths = ends - starts
+    for k in np.flatnonzero(lengths != n_values):
+        report.add_error(first_index + int(k), f"{lengths[k]} values, expected {n_values}",
+                         list(tokens[starts[k]:ends[k]]))
+
+    complete = np.flatnonzero(lengths == n_values)
+    records = tokens[starts[complete][:, None] + np.arange(n_values)]
+    try:
+        return records.astype(np.float64), len(ends)
+    except ValueError:
+        pass
+    good = np.ones(len(records), dtype=bool)
+    for row, values in enumerate(records):
+        try:
+            values.astype(np.float64)
+        except ValueError:
+            good[row] = False
+            report.add_error(first_index + int(complete[row]), "non-numeric value", list(values))
+    return records[good].astype(np.float64), len(ends)
+
+
+def iter_arrays(path, report=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Yield float64 arrays of shape (records, 75), one per chunk, with -9 as NaN
+
+    Parameters:
+    -----------
+    report : ParseReport, optional
+        Filled with record counts and malformed records
+    chunk_bytes : int
+        Bytes read at a time
+    """
+    report = report if report is not None else ParseReport()
+    carry = b''
+    record_index = 0
+
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_bytes)
+            data = carry + chunk if chunk else carry + b'\n'
+            cut = _last_record_end(data)
+            if cut:
+                block = _parse_csv(data[:cut])
+                if block is not None:
+                    n_records = len(block)
+                else:
+                    block, n_records = _parse_tokens(data[:cut], record_index, report)
+                record_index += n_records
+                if len(block):
+                    block[block == MISSING_VALUE] = np.nan
+                    report.records += len(block)
+                    yield block
+            carry = data[cut:]
+
+            if not chunk:
+                break
+            if len(carry) > MAX_RECORD_BYTES:
+                # No record end in sight: drop the run instead of growing without bound
+                report.add_error(record_index, "no record end", carry.split())
+                record_index += 1
+                carry = b''
+
+    if carry.strip():
+        report.add_error(record_index, "truncated record (no 'name' token)", carry.split())
+
+
+def iter_batches(path, columns=None, batch_rows=BATCH_ROWS, report=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Yield pyarrow RecordBatches of at most ``batch_rows`` records
+
+    Attributes are float32 with missing values (-9) as nulls. ``columns``
+    selects a subset of ATTRIBUTES.
+    """
+    import pyarrow as pa
+
+    columns = list(columns or ATTRIBUTES)
+    unknown = set(columns) - set(ATTRIBUTES)
+    if unknown:
+        raise ValueError(f"Unknown attributes: {sorted(unknown)}")
+    indices = [ATTRIBUTES.index(column) for column in columns]
+
+    pending = []
+    n_pending = 0
+
+    def make_batch():
+        values = np.concatenate(pending)[:, indices].astype(np.float32)
+        return pa.RecordBatch.from_arrays(
+            [pa.array(values[:, j], from_pandas=True) for j in range(len(columns))], names=columns
+        )
+
+    for block in iter_arrays(path, report=report, chunk_bytes=chunk_bytes):
+        while len(block):
+            take = block[:batch_rows - n_pending]
+            block = block[len(take):]
+            pending.append(take)
+            n_pending += len(take)
+            if n_pending == batch_rows:
+                yield make_batch()
+                pending, n_pending = [], 0
+    if pending:
+        yield make_batch()
+
+
+def read_cleveland(path, columns=None, report=None):
+    """Parse a whole file into a DataFrame (float32 columns, NaN for missing)"""
+    blocks = list(iter_arrays(path, report=report))
+    values = np.concatenate(blocks) if blocks else np.empty((0, len(ATTRIBUTES)))
+    df = pd.DataFrame(values.astype(np.float32), columns=ATTRIBUTES)
+    return df[list(columns)] if columns is not None else df
+
+
+def to_parquet(path, output_path, columns=None, batch_rows=BATCH_ROWS):
+    """
+    Stream a raw file into a Parquet file, one row group per batch
+
+    Returns:
+    --------
+    ParseReport
+    """
+    import pyarrow.parquet as pq
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    report = ParseReport()
+    writer = None
+    for batch in iter_batches(path, columns=columns, batch_rows=batch_rows, report=report):
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, batch.schema, compression='zstd')
+        writer.write_batch(batch)
+    if writer is not None:
+        writer.close()
+
+    logger.info(f"Parsed {report.records} records from {path} "
+                f"({report.malformed} malformed) into {output_path}")
+    return report
+
+
+def main():
+    """Command line interface to convert a raw file to Parquet"""
+    parser = argparse.ArgumentParser(description="Parse the raw 76-attribute cleveland.data format")
+    parser.add_argument('input', type=Path, help="raw file (cleveland.data or a concatenated extract)")
+    parser.add_argument('--output', type=Path, required=True, help="Parquet file to write")
+    parser.add_argument('--columns', nargs='+', default=None, help="attributes to keep")
+    args = parser.parse_args()
+
+    report = to_parquet(args.input, args.output, columns=args.columns)
+    print(f"{report.records:,} records written to {args.output}, {report.malformed:,} malformed")
+    for error in report.errors[:10]:
+        print(f"  record {error['record']}: {error['reason']} ({error['start']} ...)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Typed columnar copies of the dataset
+
+Ingestion writes ``heart_disease.parquet`` (or ``.feather``) next to the
+processed CSV, already downcast to ``config.COLUMN_DTYPES``. Parquet files
+carry per-row-group min/max statistics, so ``read_columnar`` only decodes
+the requested columns and skips row groups (and, for a partitioned copy,
+whole partition directories) that a filter rules out.
+
+Filters use the pyarrow/pandas DNF notation: a list of
+``(column, op, value)`` tuples that must all hold, or a list of such lists
+of which any may hold. ``op`` is one of =, ==, !=, <, <=, >, >=, in, not in.
+The same filters are applied in pandas when the CSV is read instead.
+
+A copy records the SHA-256 of the CSV it was converted from in its schema
+metadata. ``find_columnar_copy`` only prefers a copy whose recorded digest
+matches the CSV on disk, so a replaced CSV is never shadowed by an old copy,
+whatever the files' modification times say.
+"""
+from pathlib import Path
+import operator
+
+import pandas as pd
+import logging
+
+try:
+    from data_cache import file_digest
+except ImportError:  # imported as part of the ``src`` package
+    from src.data_cache import file_digest
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COLUMNAR_FORMATS = ('parquet', 'feather')
+
+# Rows per Parquet row group; smaller groups let filters skip more data
+ROW_GROUP_SIZE = 128 * 1024
+
+# Schema metadata key holding the SHA-256 of the source CSV
+SOURCE_DIGEST_KEY = b'source_sha256'
+
+# CSV digests by (path, size, mtime), so repeated loads hash a file once
+_csv_digests = {}
+
+_COMPARISONS = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+
+def columnar_path(csv_path, file_format='parquet'):
+    """Path of the columnar copy of a CSV file"""
+    return Path(csv_path).with_suffix(f'.{file_format}')
+
+
+def is_columnar(path):
+    """True for a Parquet/Feather file or a partitioned dataset directory"""
+    path = Path(path)
+    return path.is_dir() or path.suffix.lstrip('.') in COLUMNAR_FORMATS
+
+
+def _csv_digest(csv_path):
+    stat = csv_path.stat()
+    key = (str(csv_path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _csv_digests:
+        _csv_digests[key] = file_digest(csv_path)
+    return _csv_digests[key]
+
+
+def _dataset(path):
+    import pyarrow.dataset as ds
+
+    path = Path(path)
+    file_format = 'parquet' if path.is_dir() else path.suffix.lstrip('.')
+    if file_format == 'feather':
+        file_format = 'ipc'
+    return ds.dataset(path, format=file_format, partitioning='hive' if path.is_dir() else None)
+
+
+def source_digest(path):
+    """SHA-256 of the CSV a columnar copy was written from (None if not recorded)"""
+    metadata = _dataset(path).schema.metadata or {}
+    digest = metadata.get(SOURCE_DIGEST_KEY)
+    return digest.decode() if digest is not None else None
+
+
+def find_columnar_copy(csv_path):
+    """
+    Columnar copy of ``csv_path`` written from its current content, if any
+
+    A copy is used when the source digest it records matches the CSV's
+    SHA-256; copies without a recorded digest count as stale. Without the
+    CSV, any copy is used. Returns None when pyarrow is not installed or no
+    up-to-date copy exists.
+    """
+    if not HAS_PYARROW:
+        return None
+    csv_path = Path(csv_path)
+    for file_format in COLUMNAR_FORMATS:
+        path = columnar_path(csv_path, file_format)
+        if not path.exists():
+            continue
+        if not csv_path.exists():
+            return path
+        if source_digest(path) == _csv_digest(csv_path):
+            return path
+        logger.info(f"Ignoring {path}: not written from the current {csv_path.name}")
+    return None
+
+
+def write_columnar(df, path, file_format='parquet', partition_cols=None,
+                   row_group_size=ROW_GROUP_SIZE, compression='zstd', source_digest=None):
+    """
+    Write a typed frame as Parquet (with column statistics) or Feather
+
+    Parameters:
+    -----------
+    partition_cols : list of str, optional
+        Write a hive-partitioned Parquet directory (``column=value/``), one
+        partition per value. Rows are grouped by partition, so the original
+        row order is not kept.
+    source_digest : str, optional
+        SHA-256 of the CSV the frame was read from (``data_cache.file_digest``),
+        stored in the schema metadata for ``find_columnar_copy``
+
+    Returns:
+    --------
+    path written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+
+    if file_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format: {file_format}")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if source_digest is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               SOURCE_DIGEST_KEY: source_digest.encode()})
+
+    if partition_cols:
+        if file_format != 'parquet':
+            raise ValueError("Partitioned copies are only supported for Parquet")
+        pq.write_to_dataset(table, path, partition_cols=list(partition_cols),
+                            row_group_size=row_group_size, compression=compression,
+                            write_statistics=True, existing_data_behavior='delete_matching')
+    elif file_format == 'parquet':
+        pq.write_table(table, path, row_group_size=row_group_size, compression=compression,
+                       write_statistics=True)
+    else:
+        feather.write_feather(table, path, compression=compression)
+
+    logger.info(f"Wrote {len(df)} rows to {path}")
+    return path
+
+
+def read_columnar(path, columns=None, filters=None):
+    """
+    Read a columnar copy, projecting ``columns`` and pushing ``filters`` down
+
+    Column dtypes (including nullable integers) are restored from the pandas
+    metadata stored with the data. Partition columns come back as strings.
+    """
+    import pyarrow.parquet as pq
+
+    dataset = _dataset(path)
+    expression = pq.filters_to_expression(filters) if filters else None
+    table = dataset.to_table(columns=columns, filter=expression)
+    return table.to_pandas()
+
+
+def _disjunction(filters):
+    """DNF filters as a list of conjunctions"""
+    return filters if isinstance(filters[0], list) else [filters]
+
+
+def filter_columns(filters):
+    """Columns referenced by DNF ``filters``"""
+    if not filters:
+        return []
+    return list(dict.fromkeys(column for conjunction in _disjunction(filters)
+                              for column, _, _ in conjunction))
+
+
+def apply_filters(df, filters):
+    """Rows of ``df`` matching DNF ``filters`` (the pandas fallback of read_columnar)"""
+    if not filters:
+        return df
+    disjunction = _disjunction(filters)
+
+    keep = pd.Series(False, index=df.index)
+    for conjunction in disjunction:
+        match = pd.Series(True, index=df.index)
+        for column, op, value in conjunction:
+            if op == 'in':
+                match &= df[column].isin(value)
+            elif op == 'not in':
+                match &= ~df[column].isin(value) & df[column].notna()
+            elif op in _COMPARISONS:
+                match &= _COMPARISONS[op](df[column], value).fillna(False).astype(bool)
+            else:
+                raise ValueError(f"Unknown filter operator: {op}")
+        keep |= match
+    return df[keep.to_numpy()].reset_index(drop=True)
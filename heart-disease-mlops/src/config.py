@@ -18,6 +18,7 @@ DATASET_FILE = PROCESSED_DATA_DIR / "heart_disease.csv"
 # Model paths
 MODEL_FILE = MODELS_DIR / "best_model.pkl"
 PREPROCESSOR_FILE = MODELS_DIR / "preprocessor.pkl"
+DRIFT_REFERENCE_FILE = MODELS_DIR / "drift_reference.json"
 
 # MLflow settings
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "./mlruns")
@@ -35,6 +36,33 @@ RANDOM_SEED = 42
 TEST_SIZE = 0.2
 CV_FOLDS = 5
 
+# Compression: keep the smallest candidate whose validation ROC AUC is within this
+# tolerance of the best candidate (see src/model_compression.py)
+COMPRESSION_AUC_TOLERANCE = float(os.getenv("COMPRESSION_AUC_TOLERANCE", 0.01))
+
+# Model selection policy (see src/profiling.py): the best SELECTION_METRIC
+# among models meeting the serving SLOs; unset SLOs are not enforced. Models
+# within SELECTION_TOLERANCE of the best are equivalent and the fastest wins.
+# The default is cross-validated on the training rows; the test split only
+# reports the promoted model.
+SELECTION_METRIC = os.getenv("SELECTION_METRIC", "oof_roc_auc")
+SELECTION_TOLERANCE = float(os.getenv("SELECTION_TOLERANCE", 0.0))
+SLO_LATENCY_P99_MS = float(os.environ["SLO_LATENCY_P99_MS"]) if "SLO_LATENCY_P99_MS" in os.environ else None
+SLO_MEMORY_MB = float(os.environ["SLO_MEMORY_MB"]) if "SLO_MEMORY_MB" in os.environ else None
+
+# Model artifact formats written next to best_model.pkl (see src/artifacts.py);
+# the API loads whichever was measured fastest to load
+MODEL_ARTIFACT_FORMATS = os.getenv("MODEL_ARTIFACT_FORMATS", "pickle,lz4,zstd,flat").split(",")
+
+# Batches up to this many rows are scored with the compiled tree predictor
+# (see src/tree_predictor.py); larger ones with the sklearn model, whose
+# multi-threaded Cython traversal wins on big batches
+COMPILED_PREDICTOR_MAX_ROWS = int(os.getenv("COMPILED_PREDICTOR_MAX_ROWS", 256))
+
+# Numeric precision of inference: float64, float32 or int8 (see src/precision.py).
+# Reduced precisions score every batch with the reduced-precision predictor
+INFERENCE_PRECISION = os.getenv("INFERENCE_PRECISION", "float64")
+
 # Feature names
 FEATURE_NAMES = [
     'age', 'sex', 'cp', 'trestbps', 'chol', 'fbs',
@@ -43,6 +71,30 @@ FEATURE_NAMES = [
 
 TARGET_NAME = 'target'
 
+# Measured (non-categorical) features
+CONTINUOUS_FEATURES = ['age', 'trestbps', 'chol', 'thalach', 'oldpeak']
+
+# Compact storage dtypes for the dataset columns. Integer columns that
+# contain missing values (typically 'ca' and 'thal') are read as the
+# matching nullable pandas type (e.g. 'uint8' -> 'UInt8').
+FEATURE_DTYPES = {
+    'age': 'uint8',
+    'sex': 'uint8',
+    'cp': 'uint8',
+    'trestbps': 'uint16',
+    'chol': 'uint16',
+    'fbs': 'uint8',
+    'restecg': 'uint8',
+    'thalach': 'uint8',
+    'exang': 'uint8',
+    'oldpeak': 'float32',
+    'slope': 'uint8',
+    'ca': 'UInt8',
+    'thal': 'UInt8',
+}
+COLUMN_DTYPES = {**FEATURE_DTYPES, TARGET_NAME: 'uint8'}
+assert list(FEATURE_DTYPES) == FEATURE_NAMES, "FEATURE_DTYPES must follow FEATURE_NAMES"
+
 # Logging settings
 LOG_FILE = LOGS_DIR / "api_logs.log"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -0,0 +1,266 @@
+"""
+On-disk cache for prepared train/test matrices
+
+Entries are content-addressed: the key is a hash of the data file, the split
+parameters and the preprocessing code version, so a changed CSV or a changed
+preprocessor never serves stale matrices. Feature matrices are stored as
+``.npy`` files and loaded memory-mapped.
+
+Usage:
+    python src/data_cache.py list
+    python src/data_cache.py prune [--stale] [--older-than DAYS] [--all]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "cache"
+DIGEST_INDEX = "digests.json"
+META_FILE = "meta.json"
+ARRAY_FILES = ["X_train", "X_test", "y_train", "y_test", "train_index", "test_index"]
+
+
+def file_digest(filepath, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PreparedDataCache:
+    """
+    Content-addressed store of ``prepare_data`` outputs
+
+    Each entry is a directory named after its cache key holding the
+    processed matrices, the labels, the original row indices, the fitted
+    preprocessor state and a ``meta.json`` description. The preprocessor is
+    stored as its attribute dict rather than as a pickled instance, so an
+    entry written by ``python src/train.py`` (module ``preprocessing``) can be
+    read back through ``src.preprocessing`` and vice versa.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def data_digest(self, data_path):
+        """
+        Content hash of the data file
+
+        Digests are memoised by (path, size, mtime) so unchanged multi-GB
+        extracts are not re-hashed on every run.
+        """
+        data_path = Path(data_path).resolve()
+        stat = data_path.stat()
+        stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+        index_file = self.cache_dir / DIGEST_INDEX
+        index = {}
+        if index_file.exists():
+            try:
+                index = json.loads(index_file.read_text())
+            except ValueError:
+                index = {}
+
+        entry = index.get(str(data_path))
+        if entry is not None and entry.get('stamp') == stamp:
+            return entry['digest']
+
+        digest = file_digest(data_path)
+        index[str(data_path)] = {'stamp': stamp, 'digest': digest}
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        index_file.write_text(json.dumps(index, indent=2))
+        return digest
+
+    def key(self, data_path, test_size, random_state, code_version, **options):
+        """Build the cache key for a data file, split configuration and preprocessing options"""
+        payload = json.dumps({
+            'data': self.data_digest(data_path),
+            'test_size': test_size,
+            'random_state': random_state,
+            'code_version': code_version,
+            **options,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+    def load(self, key):
+        """
+        Load a cached entry
+
+        Returns:
+        --------
+        X_train, X_test, y_train, y_test, preprocessor_state, or None on a miss
+        """
+        entry_dir = self.cache_dir / key
+        meta_file = entry_dir / META_FILE
+        if not meta_file.exists():
+            return None
+
+        try:
+            meta = json.loads(meta_file.read_text())
+            arrays = {
+                name: np.load(entry_dir / f"{name}.npy", mmap_mode='r')
+                for name in ARRAY_FILES
+            }
+            preprocessor_state = joblib.load(entry_dir / "preprocessor_state.pkl")
+        except (OSError, ValueError, EOFError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+
+        columns = meta['columns']
+        target = meta['target_name']
+        train_index = pd.Index(np.asarray(arrays['train_index']))
+        test_index = pd.Index(np.asarray(arrays['test_index']))
+
+        X_train = pd.DataFrame(arrays['X_train'], columns=columns, index=train_index, copy=False)
+        X_test = pd.DataFrame(arrays['X_test'], columns=columns, index=test_index, copy=False)
+        y_train = pd.Series(np.asarray(arrays['y_train']), index=train_index, name=target)
+        y_test = pd.Series(np.asarray(arrays['y_test']), index=test_index, name=target)
+
+        os.utime(meta_file)
+        logger.info(f"Loaded prepared data from cache entry {key}")
+        return X_train, X_test, y_train, y_test, preprocessor_state
+
+    def save(self, key, X_train, X_test, y_train, y_test, preprocessor, **meta):
+        """Write an entry atomically and return its directory"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_dir = self.cache_dir / key
+        staging = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir))
+
+        try:
+            arrays = {
+                'X_train': X_train.to_numpy(),
+                'X_test': X_test.to_numpy(),
+                'y_train': np.asarray(y_train),
+                'y_test': np.asarray(y_test),
+                'train_index': X_train.index.to_numpy(),
+                'test_index': X_test.index.to_numpy(),
+            }
+            for name, array in arrays.items():
+                np.save(staging / f"{name}.npy", np.ascontiguousarray(array))
+            joblib.dump(vars(preprocessor), staging / "preprocessor_state.pkl")
+
+            meta.update({
+                'key': key,
+                'columns': X_train.columns.tolist(),
+                'target_name': y_train.name,
+                'n_train': len(X_train),
+                'n_test': len(X_test),
+                'created': datetime.now().isoformat(),
+            })
+            (staging / META_FILE).write_text(json.dumps(meta, indent=2, default=str))
+
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir)
+            os.replace(staging, entry_dir)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+
+        logger.info(f"Cached prepared data as entry {key}")
+        return entry_dir
+
+    def entries(self):
+        """Return metadata for every entry, most recently used first"""
+        if not self.cache_dir.exists():
+            return []
+
+        entries = []
+        for meta_file in self.cache_dir.glob(f"*/{META_FILE}"):
+            try:
+                meta = json.loads(meta_file.read_text())
+            except ValueError:
+                continue
+            entry_dir = meta_file.parent
+            meta['path'] = str(entry_dir)
+            meta['size_bytes'] = sum(f.stat().st_size for f in entry_dir.iterdir())
+            meta['last_used'] = meta_file.stat().st_mtime
+            entries.append(meta)
+
+        return sorted(entries, key=lambda m: m['last_used'], reverse=True)
+
+    def is_stale(self, meta, code_version=None):
+        """An entry is stale if its data file changed or its code version is outdated"""
+        if code_version is not None and meta.get('code_version') != code_version:
+            return True
+        data_path = meta.get('data_path')
+        if not data_path or not Path(data_path).exists():
+            return True
+        return self.data_digest(data_path) != meta.get('data_digest')
+
+    def prune(self, stale=False, older_than_days=None, remove_all=False, code_version=None):
+        """Remove entries and return the list of removed keys"""
+        cutoff = None
+        if older_than_days is not None:
+            cutoff = time.time() - older_than_days * 86400
+
+        removed = []
+        for meta in self.entries():
+            if (remove_all
+                    or (cutoff is not None and meta['last_used'] < cutoff)
+                    or (stale and self.is_stale(meta, code_version))):
+                shutil.rmtree(meta['path'], ignore_errors=True)
+                removed.append(meta['key'])
+
+        logger.info(f"Pruned {len(removed)} cache entries")
+        return removed
+
+
+def main():
+    """Command line interface to list or prune the cache"""
+    parser = argparse.ArgumentParser(description="Manage the prepared-data cache")
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help="List cache entries")
+
+    prune_parser = subparsers.add_parser('prune', help="Remove cache entries")
+    prune_parser.add_argument('--stale', action='store_true',
+                              help="Remove entries whose data file or preprocessing code changed")
+    prune_parser.add_argument('--older-than', type=float, metavar='DAYS',
+                              help="Remove entries not used in the last DAYS days")
+    prune_parser.add_argument('--all', action='store_true', help="Remove every entry")
+
+    args = parser.parse_args()
+    cache = PreparedDataCache(args.cache_dir)
+
+    if args.command == 'list':
+        entries = cache.entries()
+        print(f"{'KEY':<22}{'ROWS':>8}{'SIZE (KB)':>12}  {'LAST USED':<20}DATA")
+        for meta in entries:
+            last_used = datetime.fromtimestamp(meta['last_used']).strftime('%Y-%m-%d %H:%M:%S')
+            rows = meta['n_train'] + meta['n_test']
+            print(f"{meta['key']:<22}{rows:>8}{meta['size_bytes'] / 1024:>12.1f}  "
+                  f"{last_used:<20}{meta.get('data_path')}")
+        print(f"\n{len(entries)} entries in {cache.cache_dir}")
+    else:
+        from preprocessing import preprocessor_version
+
+        removed = cache.prune(
+            stale=args.stale,
+            older_than_days=args.older_than,
+            remove_all=args.all,
+            code_version=preprocessor_version(),
+        )
+        for key in removed:
+            print(f"Removed {key}")
+        print(f"\n{len(removed)} entries removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,74 @@
 """
 Script to download and prepare the Heart Disease dataset from UCI ML Repository
 """
+import argparse
 import os
+import json
 import shutil
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    from cleveland_parser import to_parquet as parse_full_cleveland
+    from columnar import HAS_PYARROW, columnar_path, write_columnar
+    from config import COLUMN_DTYPES, TARGET_NAME
+    from data_cache import file_digest
+    from manifest import MANIFEST_FILE, IngestManifest
+    from preprocessing import apply_schema
+except ImportError:  # imported as part of the ``src`` package
+    from src.cleveland_parser import to_parquet as parse_full_cleveland
+    from src.columnar import HAS_PYARROW, columnar_path, write_columnar
+    from src.config import COLUMN_DTYPES, TARGET_NAME
+    from src.data_cache import file_digest
+    from src.manifest import MANIFEST_FILE, IngestManifest
+    from src.preprocessing import apply_schema
+
 # Define paths
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 
+# Column names based on UCI documentation
+COLUMN_NAMES = [
+    'age',           # Age in years
+    'sex',           # Sex (1 = male; 0 = female)
+    'cp',            # Chest pain type (1-4)
+    'trestbps',      # Resting blood pressure (mm Hg)
+    'chol',          # Serum cholesterol (mg/dl)
+    'fbs',           # Fasting blood sugar > 120 mg/dl (1 = true; 0 = false)
+    'restecg',       # Resting ECG results (0-2)
+    'thalach',       # Maximum heart rate achieved
+    'exang',         # Exercise induced angina (1 = yes; 0 = no)
+    'oldpeak',       # ST depression induced by exercise
+    'slope',         # Slope of peak exercise ST segment (1-3)
+    'ca',            # Number of major vessels colored by fluoroscopy (0-3)
+    'thal',          # Thalassemia (3 = normal; 6 = fixed defect; 7 = reversible defect)
+    'target'         # Heart disease diagnosis (0 = no disease, 1-4 = disease)
+]
+
+# Per-site files of the UCI release (processed.<site>.data) and the
+# site-partitioned dataset they are ingested into
+SITE_FILE_PATTERN = "processed.*.data"
+SITE_DATASET_DIR = PROCESSED_DATA_DIR / "heart_disease_sites"
+INGEST_REPORT_FILE = "_ingest_report.json"
+
+# All 76 attributes of the raw Cleveland records (see cleveland_parser.py)
+FULL_CLEVELAND_FILE = PROCESSED_DATA_DIR / "cleveland_full.parquet"
+
 # Create directories
 RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
 PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-def download_dataset():
+def download_dataset(manifest=None):
     """
     Download heart disease dataset from local source
     
+    With an IngestManifest, files whose content did not change since the
+    last copy are not copied again.
+    
     The dataset is available at:
     - Local: raw_dataSet/heart+disease (within project directory)
     - Web: https://archive.ics.uci.edu/dataset/45/heart+disease
@@ -35,18 +84,23 @@ def download_dataset():
     if source_path.exists():
         print(f"\n✓ Found local dataset at: {source_path}")
         
-        # Copy relevant files
+        # Copy relevant files (every site's processed file)
         files_to_copy = [
-            "processed.cleveland.data",
             "cleveland.data",
             "heart-disease.names"
-        ]
+        ] + sorted(path.name for path in source_path.glob(SITE_FILE_PATTERN))
         
         for filename in files_to_copy:
             src = source_path / filename
             if src.exists():
                 dst = RAW_DATA_DIR / filename
+                step = f"copy:{filename}"
+                if manifest is not None and manifest.is_current(step, [src], [dst]):
+                    print(f"  = Unchanged: {filename}")
+                    continue
                 shutil.copy2(src, dst)
+                if manifest is not None:
+                    manifest.record(step, [src], [dst])
                 print(f"  ✓ Copied: {filename}")
         
         print("\n✓ Dataset files copied successfully!")
@@ -60,32 +114,24 @@ def download_dataset():
     
     return True
 
-def load_and_prepare_data():
+def load_and_prepare_data(columnar_format='parquet', partition_cols=None, manifest=None):
     """
     Load the Cleveland dataset (most commonly used) and prepare it
+    
+    Besides ``heart_disease.csv``, a typed columnar copy
+    (``heart_disease.<columnar_format>``, None to skip) is written for
+    HeartDiseasePreprocessor.load_data. With ``partition_cols`` a
+    hive-partitioned Parquet dataset is also written to
+    ``heart_disease_partitioned/``.
+    
+    With an IngestManifest, nothing is parsed or written when the raw file
+    and every output are unchanged since the last run; the existing
+    ``heart_disease.csv`` is returned instead.
     """
     print("\n" + "=" * 80)
     print("Preparing Dataset")
     print("=" * 80)
     
-    # Column names based on UCI documentation
-    column_names = [
-        'age',           # Age in years
-        'sex',           # Sex (1 = male; 0 = female)
-        'cp',            # Chest pain type (1-4)
-        'trestbps',      # Resting blood pressure (mm Hg)
-        'chol',          # Serum cholesterol (mg/dl)
-        'fbs',           # Fasting blood sugar > 120 mg/dl (1 = true; 0 = false)
-        'restecg',       # Resting ECG results (0-2)
-        'thalach',       # Maximum heart rate achieved
-        'exang',         # Exercise induced angina (1 = yes; 0 = no)
-        'oldpeak',       # ST depression induced by exercise
-        'slope',         # Slope of peak exercise ST segment (1-3)
-        'ca',            # Number of major vessels colored by fluoroscopy (0-3)
-        'thal',          # Thalassemia (3 = normal; 6 = fixed defect; 7 = reversible defect)
-        'target'         # Heart disease diagnosis (0 = no disease, 1-4 = disease)
-    ]
-    
     # Load the processed Cleveland data
     data_file = RAW_DATA_DIR / "processed.cleveland.data"
     
@@ -94,8 +140,21 @@ def load_and_prepare_data():
         print("Please run the download step first.")
         return None
     
+    output_file = PROCESSED_DATA_DIR / "heart_disease.csv"
+    dict_file = DATA_DIR / "DATA_DICTIONARY.md"
+    outputs = [output_file, dict_file]
+    write_columnar_copy = bool(columnar_format) and HAS_PYARROW
+    if write_columnar_copy:
+        outputs.append(columnar_path(output_file, columnar_format))
+        if partition_cols:
+            outputs.append(PROCESSED_DATA_DIR / "heart_disease_partitioned")
+    
+    if manifest is not None and manifest.is_current('prepare', [data_file], outputs):
+        print(f"\n✓ {data_file.name} unchanged; keeping {output_file}")
+        return pd.read_csv(output_file)
+    
     # Read the data
-    df = pd.read_csv(data_file, names=column_names, na_values='?')
+    df = pd.read_csv(data_file, names=COLUMN_NAMES, na_values='?')
     
     print(f"\n✓ Loaded dataset with {len(df)} records and {len(df.columns)} features")
     print(f"  - Shape: {df.shape}")
@@ -109,10 +168,23 @@ def load_and_prepare_data():
     print(f"  - Class 1 (Disease): {(df['target'] == 1).sum()} samples")
     
     # Save processed data
-    output_file = PROCESSED_DATA_DIR / "heart_disease.csv"
     df.to_csv(output_file, index=False)
     print(f"\n✓ Saved processed data to: {output_file}")
     
+    # Typed columnar copy, tagged with the CSV's digest so loaders can tell it is current
+    if write_columnar_copy:
+        typed = apply_schema(df)
+        columnar_file = write_columnar(typed, columnar_path(output_file, columnar_format),
+                                       file_format=columnar_format,
+                                       source_digest=file_digest(output_file))
+        print(f"✓ Saved columnar copy to: {columnar_file}")
+        if partition_cols:
+            partitioned_dir = write_columnar(typed, PROCESSED_DATA_DIR / "heart_disease_partitioned",
+                                             partition_cols=partition_cols)
+            print(f"✓ Saved partitioned copy to: {partitioned_dir}")
+    elif columnar_format:
+        print("⚠ pyarrow is not installed; skipping the columnar copy")
+    
     # Create data dictionary
     data_dict = """
 # Heart Disease Dataset - Data Dictionary
@@ -170,23 +242,214 @@ def load_and_prepare_data():
 - 303 instances in Cleveland dataset
 """
     
-    dict_file = DATA_DIR / "DATA_DICTIONARY.md"
     with open(dict_file, 'w') as f:
         f.write(data_dict)
     print(f"✓ Created data dictionary: {dict_file}")
     
+    if manifest is not None:
+        version = manifest.record('prepare', [data_file], outputs)
+        print(f"✓ Dataset version: {version}")
+    
     return df
 
+def site_name(path):
+    """Site of a ``processed.<site>.data`` file"""
+    return Path(path).name.split('.')[1]
+
+
+def site_partition(output_dir, site):
+    """Partition file written by parse_site_file for ``site``"""
+    return Path(output_dir) / f"site={site}" / "part-00000.parquet"
+
+
+def to_site_schema(df):
+    """
+    Cast a parsed site frame to one schema shared by every site
+    
+    Integer features use the nullable version of their declared type, so
+    all partitions agree whether or not a site has missing values. Values
+    that do not fit the declared type (non-integral or out of range) are set
+    to missing.
+    
+    Returns:
+    --------
+    typed frame, dict of column -> number of values that did not fit
+    """
+    typed = pd.DataFrame(index=df.index)
+    mismatches = {}
+    for column in COLUMN_NAMES:
+        dtype = str(COLUMN_DTYPES[column]).lower()
+        values = df[column].astype('float64')
+        if np.dtype(dtype).kind == 'f':
+            typed[column] = values.astype(dtype)
+            continue
+        info = np.iinfo(dtype)
+        bad = values.notna() & ((values % 1 != 0) | ~values.between(info.min, info.max))
+        if bad.any():
+            mismatches[column] = int(bad.sum())
+            values[bad] = np.nan
+        nullable = dtype if column == TARGET_NAME else dtype.replace('uint', 'UInt').replace('int', 'Int')
+        typed[column] = values.astype(nullable)
+    return typed, mismatches
+
+
+def parse_site_file(path, output_dir):
+    """
+    Parse one site's processed file and write its partition
+    
+    '?' and non-numeric tokens become missing values (the latter are
+    counted as invalid), rows without a diagnosis are dropped, the target
+    is made binary and the columns are cast with to_site_schema. The rows
+    are written to ``output_dir/site=<site>/part-00000.parquet`` by the
+    worker, so only the report travels back to the parent process.
+    
+    Returns:
+    --------
+    dict report: site, rows, dropped_rows, missing_values, invalid_values,
+    schema_mismatches and class_counts
+    """
+    site = site_name(path)
+    try:
+        df = pd.read_csv(path, header=None, dtype='float64', na_values='?', skipinitialspace=True)
+        invalid = pd.Series(0, index=df.columns)
+    except ValueError:
+        # Non-numeric tokens: parse as text and count what does not convert
+        raw = pd.read_csv(path, header=None, dtype=str, na_values='?', skipinitialspace=True)
+        df = raw.apply(pd.to_numeric, errors='coerce')
+        invalid = (df.isna() & raw.notna()).sum()
+    if df.shape[1] != len(COLUMN_NAMES):
+        raise ValueError(f"{path}: expected {len(COLUMN_NAMES)} columns, found {df.shape[1]}")
+    df.columns = invalid.index = COLUMN_NAMES
+    
+    has_target = df[TARGET_NAME].notna()
+    df = df[has_target].reset_index(drop=True)
+    df[TARGET_NAME] = (df[TARGET_NAME] > 0).astype(int)
+    
+    typed, mismatches = to_site_schema(df)
+    write_columnar(typed, site_partition(output_dir, site))
+    
+    return {
+        'site': site,
+        'path': str(path),
+        'rows': len(typed),
+        'dropped_rows': int((~has_target).sum()),
+        'missing_values': {k: int(v) for k, v in typed.isna().sum().items() if v},
+        'invalid_values': {k: int(v) for k, v in invalid.items() if v},
+        'schema_mismatches': mismatches,
+        'class_counts': {str(k): int(v) for k, v in typed[TARGET_NAME].value_counts().sort_index().items()},
+    }
+
+
+def ingest_sites(raw_dir=RAW_DATA_DIR, output_dir=SITE_DATASET_DIR, max_workers=None,
+                 manifest=None):
+    """
+    Ingest every ``processed.<site>.data`` file into one site-partitioned dataset
+    
+    Site files are parsed concurrently in a process pool; each worker writes
+    its own partition. The dataset can be read with
+    HeartDiseasePreprocessor.load_data(output_dir), e.g. with
+    filters=[('site', '=', 'cleveland')].
+    
+    Without a manifest the dataset is rebuilt from scratch. With an
+    IngestManifest only new or changed site files are parsed, partitions of
+    sites whose file was removed are deleted, and the reports of unchanged
+    sites are reused.
+    
+    Returns:
+    --------
+    list of per-site reports (see parse_site_file), also written to
+    ``output_dir/_ingest_report.json``
+    """
+    site_files = sorted(Path(raw_dir).glob(SITE_FILE_PATTERN))
+    if not site_files:
+        raise FileNotFoundError(f"No {SITE_FILE_PATTERN} files in {raw_dir}")
+    
+    output_dir = Path(output_dir)
+    reports = {}
+    if manifest is None:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        output_dir.mkdir(parents=True)
+        pending = site_files
+    else:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        sites = {site_name(path) for path in site_files}
+        for partition in output_dir.glob("site=*"):
+            site = partition.name.split('=', 1)[1]
+            if site not in sites:
+                shutil.rmtree(partition)
+                manifest.forget(f"site:{site}")
+        pending = []
+        for path in site_files:
+            step = f"site:{site_name(path)}"
+            if manifest.is_current(step, [path], [site_partition(output_dir, site_name(path))]):
+                reports[path] = manifest.step(step)['report']
+            else:
+                pending.append(path)
+    
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(pending)))
+    if max_workers == 1:
+        parsed = [parse_site_file(path, output_dir) for path in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parsed = list(executor.map(parse_site_file, pending, [output_dir] * len(pending),
+                                       chunksize=max(1, len(pending) // (4 * max_workers))))
+    for path, report in zip(pending, parsed):
+        reports[path] = report
+        if manifest is not None:
+            manifest.record(f"site:{report['site']}", [path],
+                            [site_partition(output_dir, report['site'])], report=report)
+    reports = [reports[path] for path in site_files]
+    
+    (output_dir / INGEST_REPORT_FILE).write_text(json.dumps(reports, indent=2))
+    
+    print(f"\n✓ Ingested {len(reports)} sites into: {output_dir} "
+          f"({len(pending)} parsed, {len(reports) - len(pending)} unchanged)")
+    for report in reports:
+        issues = sum(report['invalid_values'].values()) + report['dropped_rows']
+        print(f"  - {report['site']:<15}{report['rows']:>8} rows  "
+              f"{sum(report['missing_values'].values()):>6} missing  {issues:>4} invalid/dropped")
+        if report['schema_mismatches']:
+            print(f"    ⚠ values not fitting the schema set to missing: {report['schema_mismatches']}")
+    return reports
+
+
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Download and prepare the heart disease dataset")
+    parser.add_argument('--force', action='store_true',
+                        help="reprocess every input even if the manifest shows it unchanged")
+    args = parser.parse_args()
+    
     print("\n" + "=" * 80)
     print("HEART DISEASE DATASET PREPARATION")
     print("=" * 80)
     
+    # Content hashes of inputs and outputs of previous runs
+    manifest = IngestManifest(PROCESSED_DATA_DIR / MANIFEST_FILE.name)
+    if args.force:
+        manifest.steps = {}
+    
     # Step 1: Download dataset
-    if download_dataset():
+    if download_dataset(manifest):
         # Step 2: Prepare dataset
-        df = load_and_prepare_data()
+        df = load_and_prepare_data(manifest=manifest)
+        
+        # Step 3: Combine every site into one partitioned dataset
+        if HAS_PYARROW:
+            ingest_sites(manifest=manifest)
+            
+            # Step 4: Parse the full 76-attribute Cleveland records
+            raw_cleveland = RAW_DATA_DIR / "cleveland.data"
+            if raw_cleveland.exists():
+                if manifest.is_current('cleveland_full', [raw_cleveland], [FULL_CLEVELAND_FILE]):
+                    print(f"\n✓ {raw_cleveland.name} unchanged; keeping {FULL_CLEVELAND_FILE}")
+                else:
+                    report = parse_full_cleveland(raw_cleveland, FULL_CLEVELAND_FILE)
+                    manifest.record('cleveland_full', [raw_cleveland], [FULL_CLEVELAND_FILE])
+                    print(f"\n✓ Parsed {report.records} full Cleveland records "
+                          f"({report.malformed} malformed) into: {FULL_CLEVELAND_FILE}")
+        
+        manifest.save()
         
         if df is not None:
             print("\n" + "=" * 80)
@@ -194,6 +457,9 @@ def main():
             print("=" * 80)
             print(f"\nProcessed data available at:")
             print(f"  {PROCESSED_DATA_DIR / 'heart_disease.csv'}")
+            if HAS_PYARROW:
+                print(f"  {SITE_DATASET_DIR} (all sites, partitioned by site)")
+                print(f"  {FULL_CLEVELAND_FILE} (76 attributes)")
             print(f"\nYou can now proceed with EDA and model training.")
             print("=" * 80 + "\n")
     else:
@@ -0,0 +1,212 @@
+"""
+Streaming feature-drift statistics for the serving path
+
+Training saves a ``DriftReference`` (per-feature quantile bins and the
+training distribution over them). At serving time ``FeatureDriftMonitor``
+folds every preprocessed request into running statistics in O(1) per row:
+Welford/Chan mean and variance plus histogram counts over the reference
+bins. Drift scores are only computed when Prometheus scrapes ``/metrics``.
+"""
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from prometheus_client.core import GaugeMetricFamily
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Smoothing for empty bins in the PSI computation
+PSI_EPSILON = 1e-4
+
+
+class DriftReference:
+    """
+    Reference distribution of each feature, computed on the training set
+
+    Cut points are per-feature quantiles, padded with +inf so all features
+    share the same number of bins and can be binned in one vectorized pass.
+    """
+
+    def __init__(self, feature_names, cut_points, proportions, mean, std, n_samples):
+        self.feature_names = list(feature_names)
+        self.cut_points = np.asarray(cut_points, dtype=float)
+        self.proportions = np.asarray(proportions, dtype=float)
+        self.mean = np.asarray(mean, dtype=float)
+        self.std = np.asarray(std, dtype=float)
+        self.n_samples = int(n_samples)
+
+    @property
+    def n_bins(self):
+        return self.cut_points.shape[1] + 1
+
+    @classmethod
+    def from_frame(cls, X, n_bins=10):
+        """Build the reference from a (preprocessed) training DataFrame"""
+        values = np.asarray(X, dtype=float)
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+
+        cuts = []
+        for j in range(values.shape[1]):
+            column = values[:, j]
+            column = column[~np.isnan(column)]
+            feature_cuts = np.unique(np.quantile(column, quantiles))
+            cuts.append(np.pad(feature_cuts, (0, n_bins - 1 - len(feature_cuts)),
+                               constant_values=np.inf))
+        cut_points = np.vstack(cuts)
+
+        counts = bin_counts(values, cut_points)
+        proportions = counts / counts.sum(axis=1, keepdims=True)
+
+        return cls(
+            feature_names=X.columns,
+            cut_points=cut_points,
+            proportions=proportions,
+            mean=np.nanmean(values, axis=0),
+            std=np.nanstd(values, axis=0),
+            n_samples=len(values),
+        )
+
+    def save(self, filepath):
+        """Save reference as JSON"""
+        payload = {
+            'feature_names': self.feature_names,
+            # JSON has no infinity; padded cut points are stored as null
+            'cut_points': [[None if np.isinf(c) else float(c) for c in row]
+                           for row in self.cut_points],
+            'proportions': self.proportions.tolist(),
+            'mean': self.mean.tolist(),
+            'std': self.std.tolist(),
+            'n_samples': self.n_samples,
+        }
+        Path(filepath).write_text(json.dumps(payload, indent=2))
+        logger.info(f"Drift reference saved to {filepath}")
+
+    @classmethod
+    def load(cls, filepath):
+        """Load reference from JSON"""
+        payload = json.loads(Path(filepath).read_text())
+        payload['cut_points'] = [[np.inf if c is None else c for c in row]
+                                 for row in payload['cut_points']]
+        return cls(**payload)
+
+
+def bin_counts(values, cut_points):
+    """
+    Histogram every feature of ``values`` over its reference bins at once
+
+    Bin ``k`` of feature ``j`` holds values with exactly ``k`` cut points
+    less than or equal to them (``np.searchsorted(..., side='right')``).
+    Missing values are not counted.
+    """
+    n_features, n_cuts = cut_points.shape
+    n_bins = n_cuts + 1
+
+    bins = (values[:, :, None] >= cut_points[None, :, :]).sum(axis=2)
+    flat = bins + np.arange(n_features) * n_bins
+    flat = flat[~np.isnan(values)]
+
+    counts = np.bincount(flat.ravel(), minlength=n_features * n_bins)
+    return counts.reshape(n_features, n_bins)
+
+
+class FeatureDriftMonitor:
+    """
+    Running per-feature statistics compared against a ``DriftReference``
+
+    Instances are Prometheus collectors: register one with the registry and
+    PSI, KS and live mean/std gauges are computed at scrape time.
+    """
+
+    def __init__(self, reference):
+        self.reference = reference
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear the running statistics"""
+        n_features = len(self.reference.feature_names)
+        with self._lock:
+            self.n = np.zeros(n_features)
+            self.mean = np.zeros(n_features)
+            self.m2 = np.zeros(n_features)
+            self.counts = np.zeros((n_features, self.reference.n_bins), dtype=np.int64)
+
+    def update(self, X):
+        """Fold a batch of preprocessed rows into the running statistics"""
+        if isinstance(X, pd.DataFrame):
+            X = X[self.reference.feature_names]
+        values = np.atleast_2d(np.asarray(X, dtype=float))
+        if len(values) == 0:
+            return
+
+        present = ~np.isnan(values)
+        n_batch = present.sum(axis=0)
+        safe_n = np.maximum(n_batch, 1)
+        batch_mean = np.where(present, values, 0.0).sum(axis=0) / safe_n
+        batch_m2 = np.where(present, values - batch_mean, 0.0) ** 2
+        batch_m2 = batch_m2.sum(axis=0)
+        counts = bin_counts(values, self.reference.cut_points)
+
+        with self._lock:
+            # Chan et al. parallel update of Welford's mean/variance
+            total = self.n + n_batch
+            safe_total = np.maximum(total, 1)
+            delta = batch_mean - self.mean
+            self.mean = self.mean + delta * n_batch / safe_total
+            self.m2 = self.m2 + batch_m2 + delta ** 2 * self.n * n_batch / safe_total
+            self.n = total
+            self.counts += counts
+
+    def std(self):
+        """Running population standard deviation per feature"""
+        return np.sqrt(self.m2 / np.maximum(self.n, 1))
+
+    def psi(self):
+        """Population stability index per feature"""
+        live = self.counts / np.maximum(self.counts.sum(axis=1, keepdims=True), 1)
+        expected = np.maximum(self.reference.proportions, PSI_EPSILON)
+        actual = np.maximum(live, PSI_EPSILON)
+        return ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+
+    def ks(self):
+        """Binned Kolmogorov-Smirnov statistic per feature"""
+        live = self.counts / np.maximum(self.counts.sum(axis=1, keepdims=True), 1)
+        cdf_gap = np.cumsum(live, axis=1) - np.cumsum(self.reference.proportions, axis=1)
+        return np.abs(cdf_gap).max(axis=1)
+
+    def describe(self):
+        """Metric families exposed, without computing any scores"""
+        return []
+
+    def collect(self):
+        """Compute drift gauges for a Prometheus scrape"""
+        with self._lock:
+            if not self.n.any():
+                observed = None
+            else:
+                observed = (self.psi(), self.ks(), self.mean.copy(), self.std(), self.n.max())
+
+        if observed is None:
+            return
+        psi, ks, mean, std, n_observed = observed
+
+        families = {
+            'feature_drift_psi': ("Population stability index vs. training distribution", psi),
+            'feature_drift_ks': ("Binned KS statistic vs. training distribution", ks),
+            'feature_live_mean': ("Running mean of preprocessed feature", mean),
+            'feature_live_std': ("Running std of preprocessed feature", std),
+        }
+        for name, (documentation, values) in families.items():
+            gauge = GaugeMetricFamily(name, documentation, labels=['feature'])
+            for feature, value in zip(self.reference.feature_names, values):
+                gauge.add_metric([feature], float(value))
+            yield gauge
+
+        yield GaugeMetricFamily(
+            'feature_drift_observations', 'Rows folded into the drift statistics',
+            value=float(n_observed)
+        )
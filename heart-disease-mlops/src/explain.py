@@ -0,0 +1,158 @@
+"""
+Per-feature contributions of predictions
+
+An explanation splits each row's model output into a base value (the
+expected output over the training data) plus one additive contribution
+per feature:
+
+- linear models: the coefficient times the scaled feature, exactly. The
+  preprocessor standardizes every feature, so a contribution is measured
+  from the training mean and the base value is the intercept.
+- tree ensembles: path contributions from the compiled predictor (see
+  ``FlatTreeEnsemble.contributions``), which also sum exactly to the output.
+
+Outputs are in the space the model adds up in: probabilities for forests
+(``output_space='probability'``), log-odds for binary boosting and logistic
+regression ('log_odds'), softmax inputs for multiclass ones ('raw_score').
+
+Explainers precompute what they need (coefficients, per-node expectations)
+once; ``ExplainerCache`` keeps them per model version so the API builds
+them on the first request after a model is loaded.
+"""
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from scipy.special import expit, softmax
+from sklearn.linear_model import LogisticRegression
+import logging
+
+try:
+    from tree_predictor import FlatTreeEnsemble, compile_predictor
+except ImportError:  # imported as part of the ``src`` package
+    from src.tree_predictor import FlatTreeEnsemble, compile_predictor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# base_values: (n_outputs,); contributions: (n_rows, n_features, n_outputs);
+# outputs = base_values + contributions summed over features; probabilities
+# of every class, shape (n_rows, n_classes)
+Explanation = namedtuple('Explanation', ['base_values', 'contributions', 'outputs',
+                                         'probabilities', 'output_space'])
+
+
+def _output_space(n_outputs):
+    return 'log_odds' if n_outputs == 1 else 'raw_score'
+
+
+class LinearExplainer:
+    """
+    Exact contributions of a logistic regression
+
+    Parameters:
+    -----------
+    model : fitted LogisticRegression, or a precision.LinearPredictor (its
+        dequantized weights are explained, matching what it serves)
+    """
+
+    def __init__(self, model):
+        if hasattr(model, 'weights'):
+            coef, intercept = model.weights(), model.intercept
+        else:
+            coef, intercept = model.coef_, model.intercept_
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = model.classes_
+        feature_names = getattr(model, 'feature_names_in_', None)
+        self.feature_names_in_ = None if feature_names is None else list(feature_names)
+        self.output_space = _output_space(len(self.coef))
+
+    def explain(self, X):
+        if hasattr(X, 'columns') and self.feature_names_in_ is not None \
+                and list(X.columns) != self.feature_names_in_:
+            raise ValueError("The feature names should match those that were passed during fit")
+        X = np.asarray(X, dtype=np.float64)
+        contributions = X[:, :, np.newaxis] * self.coef.T
+        outputs = contributions.sum(axis=1) + self.intercept
+        if outputs.shape[1] == 1:
+            positive = expit(outputs[:, 0])
+            probabilities = np.column_stack([1 - positive, positive])
+        else:
+            probabilities = softmax(outputs, axis=1)
+        return Explanation(self.intercept, contributions, outputs, probabilities,
+                           self.output_space)
+
+
+class TreeExplainer:
+    """
+    Path contributions of a compiled tree ensemble
+
+    Parameters:
+    -----------
+    ensemble : tree_predictor.FlatTreeEnsemble
+    """
+
+    def __init__(self, ensemble):
+        self.ensemble = ensemble
+        self.classes_ = ensemble.classes_
+        self.feature_names_in_ = ensemble.feature_names_in_
+        self.output_space = 'probability' if ensemble.loss is None else \
+            _output_space(ensemble.value.shape[1])
+        # Per-node expectations, computed once
+        ensemble.expected_values()
+
+    def explain(self, X):
+        base_values, contributions = self.ensemble.contributions(X)
+        outputs = contributions.sum(axis=1) + base_values
+        probabilities = self.ensemble.proba_from_decision(outputs)
+        return Explanation(base_values, contributions, outputs, probabilities,
+                           self.output_space)
+
+
+def make_explainer(model, predictor=None):
+    """
+    Explainer for ``model``, or None if its type is not supported
+
+    ``predictor`` is the compiled or reduced-precision predictor the model
+    is served with; when it can be explained, the explanations match the
+    served probabilities.
+    """
+    if predictor is not None and hasattr(predictor, 'weights'):
+        return LinearExplainer(predictor)
+    if isinstance(model, LogisticRegression):
+        return LinearExplainer(model)
+    if not isinstance(predictor, FlatTreeEnsemble):
+        predictor = compile_predictor(model)
+    if isinstance(predictor, FlatTreeEnsemble) and predictor.cover is not None:
+        return TreeExplainer(predictor)
+    logger.info(f"No explainer for {type(model).__name__}")
+    return None
+
+
+class ExplainerCache:
+    """
+    Explainers by model version, built on first use
+
+    Parameters:
+    -----------
+    maxsize : int
+        Versions kept; the least recently used is dropped beyond that
+    """
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self._explainers = OrderedDict()
+
+    def get(self, version, model, predictor=None):
+        """Explainer of ``model`` at ``version`` (None if not supported)"""
+        if version in self._explainers:
+            self._explainers.move_to_end(version)
+            return self._explainers[version]
+        explainer = make_explainer(model, predictor)
+        self._explainers[version] = explainer
+        while len(self._explainers) > self.maxsize:
+            self._explainers.popitem(last=False)
+        return explainer
+
+    def __len__(self):
+        return len(self._explainers)
@@ -0,0 +1,183 @@
+"""
+Ingestion manifest: content hashes of inputs and fingerprints of outputs
+
+Each ingestion step (copying a raw file, preparing the dataset, parsing a
+site file, ...) is recorded with the SHA-256 digests of its inputs and
+outputs. A step is skipped when its inputs hash to the recorded values and
+its outputs are still the files it wrote. Digests are memoised by
+(size, mtime), so checking an unchanged tree does not re-read it.
+
+Every recorded output carries a dataset version ID derived from the step's
+input and output digests, which training logs to MLflow.
+
+Usage:
+    python src/manifest.py [data/processed/heart_disease.csv]
+"""
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from data_cache import file_digest
+except ImportError:  # imported as part of the ``src`` package
+    from src.data_cache import file_digest
+
+BASE_DIR = Path(__file__).parent.parent
+MANIFEST_FILE = BASE_DIR / "data" / "processed" / "_manifest.json"
+VERSION_LENGTH = 12
+
+
+def _stamp(path):
+    """Cheap change detector for a file: size and modification time"""
+    stat = Path(path).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class IngestManifest:
+    """
+    JSON record of ingestion steps, their inputs and their outputs
+
+    Paths are stored relative to the manifest's directory, so the data
+    directory can be moved without invalidating it. Directories are
+    fingerprinted through the files they contain.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self.steps = {}
+        self.digests = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+                self.steps = data.get('steps', {})
+                self.digests = data.get('digests', {})
+            except ValueError:
+                pass
+
+    def _key(self, path):
+        path = Path(path).resolve()
+        try:
+            return os.path.relpath(path, self.root.resolve())
+        except ValueError:  # another drive
+            return str(path)
+
+    def digest(self, path):
+        """SHA-256 of a file (or of a directory's files), memoised by size and mtime"""
+        path = Path(path)
+        if path.is_dir():
+            digest = hashlib.sha256()
+            for child in sorted(p for p in path.rglob('*') if p.is_file()):
+                digest.update(str(child.relative_to(path)).encode())
+                digest.update(self.digest(child).encode())
+            return digest.hexdigest()
+
+        key = self._key(path)
+        stamp = _stamp(path)
+        entry = self.digests.get(key)
+        if entry is None or entry['stamp'] != stamp:
+            entry = {'stamp': stamp, 'digest': file_digest(path)}
+            self.digests[key] = entry
+        return entry['digest']
+
+    def _fingerprints(self, paths):
+        return {self._key(path): self.digest(path) for path in paths}
+
+    def is_current(self, step, inputs, outputs):
+        """True if ``step`` was recorded with these inputs and its outputs are unchanged"""
+        entry = self.steps.get(step)
+        if entry is None:
+            return False
+        if any(not Path(path).exists() for path in list(inputs) + list(outputs)):
+            return False
+        if set(entry['outputs']) != {self._key(path) for path in outputs}:
+            return False
+        return (entry['inputs'] == self._fingerprints(inputs)
+                and entry['outputs'] == self._fingerprints(outputs))
+
+    def record(self, step, inputs, outputs, **extra):
+        """Record a completed step and return its dataset version ID"""
+        inputs = self._fingerprints(inputs)
+        outputs = self._fingerprints(outputs)
+        payload = json.dumps({'inputs': inputs, 'outputs': outputs}, sort_keys=True)
+        version = hashlib.sha256(payload.encode()).hexdigest()[:VERSION_LENGTH]
+        self.steps[step] = {
+            'inputs': inputs,
+            'outputs': outputs,
+            'version': version,
+            'updated': datetime.now().isoformat(),
+            **extra,
+        }
+        return version
+
+    def forget(self, step):
+        """Drop a step, e.g. when its input disappeared"""
+        self.steps.pop(step, None)
+
+    def step(self, name):
+        """Recorded entry of a step (None if unknown)"""
+        return self.steps.get(name)
+
+    def version_of(self, path):
+        """
+        Dataset version ID of the step that wrote ``path``
+
+        None if no step recorded it or the file changed since.
+        """
+        key = self._key(path)
+        for entry in self.steps.values():
+            if key in entry['outputs']:
+                if Path(path).exists() and self.digest(path) == entry['outputs'][key]:
+                    return entry['version']
+                return None
+        return None
+
+    def save(self):
+        """Write the manifest atomically"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Forget digests of files that no longer exist
+        self.digests = {
+            key: entry for key, entry in self.digests.items()
+            if (self.root / key).exists()
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({'steps': self.steps, 'digests': self.digests}, indent=2))
+        os.replace(tmp, self.path)
+
+
+def dataset_version(data_path, manifest_path=None):
+    """
+    Version ID of a dataset file for experiment tracking
+
+    The ID recorded by ingestion when the file is in the manifest
+    (``_manifest.json`` next to it by default), otherwise a prefix of its
+    content hash so hand-made datasets are still identifiable.
+    """
+    data_path = Path(data_path)
+    manifest = IngestManifest(manifest_path or data_path.parent / MANIFEST_FILE.name)
+    version = manifest.version_of(data_path)
+    if version is not None:
+        return version
+    return file_digest(data_path)[:VERSION_LENGTH]
+
+
+def main():
+    """Print the dataset version of a file and the manifest's steps"""
+    parser = argparse.ArgumentParser(description="Show the ingestion manifest")
+    parser.add_argument('data', nargs='?', type=Path,
+                        default=MANIFEST_FILE.parent / "heart_disease.csv")
+    args = parser.parse_args()
+
+    manifest = IngestManifest(args.data.parent / MANIFEST_FILE.name)
+    print(f"{'STEP':<32}{'VERSION':<14}UPDATED")
+    for name, entry in sorted(manifest.steps.items()):
+        print(f"{name:<32}{entry['version']:<14}{entry['updated'][:19]}")
+    if args.data.exists():
+        print(f"\nDataset version of {args.data}: {dataset_version(args.data)}")
+
+
+if __name__ == "__main__":
+    main()
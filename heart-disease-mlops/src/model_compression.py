@@ -0,0 +1,252 @@
+"""
+Post-training model compression
+
+Builds compact candidates for a trained model and measures them:
+
+- pruned:    a subset of a random forest's trees, chosen greedily to match
+             the full forest's probabilities (no labels needed, no refit)
+- shallow:   random forests retrained with fewer and shallower trees
+- distilled: a single decision tree trained on the teacher's probabilities
+             over the training rows plus jittered copies of them
+
+Candidates are chosen without touching the test split: ``compress``
+refits the teacher on part of the training rows, builds the candidates
+from it and scores them on the held-out validation rows (ROC AUC /
+accuracy, node count and serving cost: latency, throughput, size, load
+time and memory, see profiling.py). ``pareto_front`` keeps the candidates
+no other candidate beats on both latency and AUC, and
+``select_candidate`` picks the smallest model within an AUC tolerance of
+the best. The selected recipe is then rebuilt from the full teacher on
+all training rows; ``candidate_oof_proba`` gives its out-of-fold
+probabilities, so it can be compared with the other models on the same
+cross-validated metrics.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+import logging
+
+try:
+    from profiling import profile_model
+except ImportError:  # imported as part of the ``src`` package
+    from src.profiling import profile_model
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRUNED_SIZES = (5, 10, 25, 50)
+SHALLOW_GRID = [
+    {'n_estimators': n_estimators, 'max_depth': max_depth}
+    for n_estimators in (10, 25, 50) for max_depth in (3, 5)
+]
+STUDENT_DEPTHS = (3, 4, 5, 6, 8)
+
+
+def prune_forest(forest, X, n_trees):
+    """
+    Keep the ``n_trees`` trees whose average best reproduces the forest
+
+    Trees are added greedily, each time the one that minimises the squared
+    error between the subset's and the full forest's positive-class
+    probabilities on X.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    per_tree = np.stack([tree.predict_proba(X)[:, 1] for tree in forest.estimators_])
+    target = per_tree.mean(axis=0)
+
+    selected = []
+    running_sum = np.zeros_like(target)
+    available = np.ones(len(per_tree), dtype=bool)
+    for k in range(min(n_trees, len(per_tree))):
+        errors = (((running_sum + per_tree) / (k + 1) - target) ** 2).mean(axis=1)
+        errors[~available] = np.inf
+        best = int(np.argmin(errors))
+        selected.append(best)
+        available[best] = False
+        running_sum += per_tree[best]
+
+    pruned = copy.deepcopy(forest)
+    pruned.estimators_ = [forest.estimators_[i] for i in selected]
+    pruned.n_estimators = len(selected)
+    pruned.n_jobs = None
+    return pruned
+
+
+def distill(teacher, X, n_copies=4, noise=0.1, max_depth=5, random_state=42):
+    """
+    Train a decision tree on the teacher's probabilities
+
+    The transfer set is X plus ``n_copies`` copies jittered with Gaussian
+    noise (in units of each feature's standard deviation). Every row
+    appears once per class, weighted by the teacher's probability of that
+    class, so the student learns soft labels.
+    """
+    rng = np.random.default_rng(random_state)
+    values = np.asarray(X, dtype=np.float64)
+    scale = np.nanstd(values, axis=0)
+    transfer = np.vstack([values] + [values + rng.normal(0, noise, values.shape) * scale
+                                     for _ in range(n_copies)])
+    transfer = _like(X, transfer)
+
+    proba = teacher.predict_proba(transfer)[:, 1]
+    X_soft = pd.concat([transfer, transfer]) if hasattr(transfer, 'columns') \
+        else np.vstack([transfer, transfer])
+    y_soft = np.concatenate([np.zeros(len(transfer)), np.ones(len(transfer))])
+    weights = np.concatenate([1 - proba, proba])
+
+    student = DecisionTreeClassifier(max_depth=max_depth, random_state=random_state)
+    return student.fit(X_soft, y_soft, sample_weight=weights)
+
+
+def _like(X, values):
+    """Wrap ``values`` as a DataFrame with X's columns when X is a DataFrame"""
+    return pd.DataFrame(values, columns=X.columns) if hasattr(X, 'columns') else values
+
+
+def count_nodes(model):
+    """Total decision-tree nodes in a tree or tree ensemble (0 for other models)"""
+    if hasattr(model, 'tree_'):
+        return int(model.tree_.node_count)
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None:
+        return 0
+    return int(sum(count_nodes(tree) for tree in np.ravel(estimators)))
+
+
+def evaluate_candidate(name, model, X_val, y_val, n_repeats=200):
+    """Validation accuracy, AUC, serving cost and node count of one candidate"""
+    proba = model.predict_proba(X_val)[:, 1]
+    return {
+        'candidate': name,
+        'val_roc_auc': roc_auc_score(y_val, proba),
+        'val_accuracy': accuracy_score(y_val, (proba > 0.5).astype(int)),
+        **profile_model(model, X_val, n_repeats=n_repeats),
+        'n_nodes': count_nodes(model),
+    }
+
+
+def candidate_recipes(teacher, random_state=42):
+    """
+    How to build each compact candidate of ``teacher``
+
+    Returns:
+    --------
+    dict of name -> function(fitted teacher, X, y) returning the fitted candidate
+    """
+    recipes = {}
+
+    if isinstance(teacher, RandomForestClassifier):
+        for n_trees in PRUNED_SIZES:
+            if n_trees < teacher.n_estimators:
+                recipes[f'pruned_{n_trees}'] = \
+                    lambda fitted, X, y, n_trees=n_trees: prune_forest(fitted, X, n_trees)
+
+        for params in SHALLOW_GRID:
+            name = f"shallow_{params['n_estimators']}x{params['max_depth']}"
+            recipes[name] = lambda fitted, X, y, params=params: clone(fitted).set_params(
+                n_jobs=None, random_state=random_state, **params).fit(X, y)
+
+    for depth in STUDENT_DEPTHS:
+        recipes[f'distilled_depth{depth}'] = lambda fitted, X, y, depth=depth: distill(
+            fitted, X, max_depth=depth, random_state=random_state)
+    return recipes
+
+
+def build_candidates(teacher, X_train, y_train, random_state=42):
+    """Compact candidate models for ``teacher`` (name -> fitted model)"""
+    return {name: recipe(teacher, X_train, y_train)
+            for name, recipe in candidate_recipes(teacher, random_state).items()}
+
+
+def build_candidate(name, teacher, X_train, y_train, random_state=42):
+    """The candidate called ``name`` ('teacher' is ``teacher`` itself)"""
+    if name == 'teacher':
+        return teacher
+    return candidate_recipes(teacher, random_state)[name](teacher, X_train, y_train)
+
+
+def candidate_oof_proba(name, teacher, X_train, y_train, splits, random_state=42):
+    """
+    Out-of-fold positive-class probabilities of the candidate recipe ``name``
+
+    For every (train, test) split the teacher is refitted on the fold's
+    training rows and the candidate built from it, as ``compress`` does on
+    the full training set.
+    """
+    y_train = np.asarray(y_train)
+    oof_proba = np.empty(len(y_train))
+    for train_idx, test_idx in splits:
+        X_fold, y_fold = _take_rows(X_train, train_idx), y_train[train_idx]
+        fold_teacher = clone(teacher).fit(X_fold, y_fold)
+        model = build_candidate(name, fold_teacher, X_fold, y_fold, random_state=random_state)
+        oof_proba[test_idx] = model.predict_proba(_take_rows(X_train, test_idx))[:, 1]
+    return oof_proba
+
+
+def _take_rows(X, indices):
+    return X.iloc[indices] if hasattr(X, 'iloc') else X[indices]
+
+
+def pareto_front(table, cost='latency_p50_ms', score='val_roc_auc'):
+    """Rows of ``table`` not dominated on (lower cost, higher score)"""
+    ordered = table.sort_values([cost, score], ascending=[True, False])
+    best_score = -np.inf
+    keep = []
+    for index, row in ordered.iterrows():
+        if row[score] > best_score:
+            keep.append(index)
+            best_score = row[score]
+    return table.index.isin(keep)
+
+
+def select_candidate(table, auc_tolerance=0.01, size='size_bytes', score='val_roc_auc'):
+    """Name of the smallest candidate whose AUC is within ``auc_tolerance`` of the best"""
+    eligible = table[table[score] >= table[score].max() - auc_tolerance]
+    return eligible.sort_values([size, 'latency_p50_ms']).iloc[0]['candidate']
+
+
+def compress(teacher, X_train, y_train, auc_tolerance=0.01, n_repeats=200, validation_size=0.25,
+             random_state=42):
+    """
+    Build, measure and select compact versions of ``teacher``
+
+    Parameters:
+    -----------
+    teacher : fitted estimator, refitted (as a clone) for the selection
+    X_train, y_train : the rows ``teacher`` was trained on
+    validation_size : float
+        Share of the training rows held out to score the candidates; the
+        test split is left for reporting the selected model
+
+    Returns:
+    --------
+    selected model (rebuilt from ``teacher`` on all training rows), its
+    name, and a DataFrame with one row per candidate (the teacher included
+    as 'teacher') of validation metrics and boolean 'pareto' and
+    'selected' columns
+    """
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, np.asarray(y_train), test_size=validation_size, random_state=random_state,
+        stratify=y_train
+    )
+    fit_teacher = clone(teacher).fit(X_fit, y_fit)
+    candidates = {'teacher': fit_teacher}
+    candidates.update(build_candidates(fit_teacher, X_fit, y_fit, random_state=random_state))
+
+    table = pd.DataFrame([
+        evaluate_candidate(name, model, X_val, y_val, n_repeats=n_repeats)
+        for name, model in candidates.items()
+    ])
+    table['pareto'] = pareto_front(table)
+    selected = select_candidate(table, auc_tolerance=auc_tolerance)
+    table['selected'] = table['candidate'] == selected
+    logger.info(f"Selected {selected} from {len(candidates)} compression candidates "
+                f"on {len(y_val)} validation rows")
+    model = build_candidate(selected, teacher, X_train, y_train, random_state=random_state)
+    return model, selected, table
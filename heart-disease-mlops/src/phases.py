@@ -0,0 +1,215 @@
+"""
+Per-phase timing and resource instrumentation
+
+``PhaseRecorder.phase(name)`` is a context manager that records one span
+of a run: wall time, CPU time of this process and the process's peak
+resident memory. Spans nest, so a training run becomes a small tree such
+as::
+
+    run
+    ├── cv        (cross-validation pass)
+    ├── fit       (final fit on the training split)
+    ├── evaluate  (test metrics, profiling)
+    └── log_model (MLflow model serialization)
+
+Spans with the same name under the same parent (e.g. repeated fits) are
+merged: times add up and ``count`` is incremented. ``metrics()`` flattens
+the tree into MLflow metric names like ``phase_cv_wall_s`` or
+``phase_prepare.split_cpu_s``, so runs can be compared phase by phase;
+``to_dict()`` gives the tree for a JSON artifact.
+
+Peak memory is the process high-water mark (``ru_maxrss``) at the end of a
+span; ``peak_rss_growth_mb`` is how much the span raised it. CPU time
+covers this process only, not joblib worker processes.
+
+A phase named in ``profile_phases`` is additionally run under cProfile and
+its statistics are kept for ``write_profiles``.
+"""
+import cProfile
+import contextlib
+import io
+import os
+import pstats
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Functions listed in the text summary of a cProfile capture
+PROFILE_TOP_FUNCTIONS = 40
+
+
+def peak_rss_mb():
+    """High-water resident memory of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    scale = 2 ** 20 if os.uname().sysname == 'Darwin' else 2 ** 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class Span:
+    """One named phase and its children"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = None
+        self.peak_rss_growth_mb = 0.0
+        self.children = {}
+
+    def child(self, name):
+        if name not in self.children:
+            self.children[name] = Span(name)
+        return self.children[name]
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'count': self.count,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'peak_rss_mb': self.peak_rss_mb,
+            'peak_rss_growth_mb': self.peak_rss_growth_mb,
+            'children': [child.to_dict() for child in self.children.values()],
+        }
+
+
+class PhaseRecorder:
+    """
+    Record a tree of timed phases
+
+    Parameters:
+    -----------
+    name : str
+        Name of the root span
+    profile_phases : iterable of str, optional
+        Phase names (leaf names, or dotted paths such as 'prepare.fit_transform')
+        to capture with cProfile
+    """
+
+    def __init__(self, name='run', profile_phases=None):
+        self.root = Span(name)
+        self.profile_phases = set(profile_phases or ())
+        self.profiles = {}
+        self._stack = [self.root]
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+
+    def _path(self, span_names):
+        return '.'.join(span_names)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Record the enclosed block as a child of the current phase"""
+        span = self._stack[-1].child(name)
+        path = self._path(s.name for s in self._stack[1:] + [span])
+        profiler = None
+        if name in self.profile_phases or path in self.profile_phases:
+            profiler = cProfile.Profile()
+
+        self._stack.append(span)
+        rss_before = peak_rss_mb()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield span
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                if path in self.profiles:
+                    self.profiles[path].add(profiler)
+                else:
+                    self.profiles[path] = pstats.Stats(profiler)
+            span.wall_seconds += time.perf_counter() - wall_start
+            span.cpu_seconds += time.process_time() - cpu_start
+            span.count += 1
+            rss_after = peak_rss_mb()
+            if rss_after is not None:
+                span.peak_rss_mb = rss_after
+                span.peak_rss_growth_mb += rss_after - rss_before
+            self._stack.pop()
+
+    def finish(self):
+        """Close the root span (wall and CPU time since the recorder was created)"""
+        self.root.wall_seconds = time.perf_counter() - self._started
+        self.root.cpu_seconds = time.process_time() - self._cpu_started
+        self.root.peak_rss_mb = peak_rss_mb()
+        self.root.count = 1
+        return self
+
+    def metrics(self, prefix='phase'):
+        """Flat metrics: <prefix>_<dotted path>_{wall_s, cpu_s, peak_rss_mb, count}"""
+        metrics = {}
+
+        def visit(span, names):
+            path = self._path(names)
+            metrics[f'{prefix}_{path}_wall_s'] = span.wall_seconds
+            metrics[f'{prefix}_{path}_cpu_s'] = span.cpu_seconds
+            if span.peak_rss_mb is not None:
+                metrics[f'{prefix}_{path}_peak_rss_mb'] = span.peak_rss_mb
+            if span.count > 1:
+                metrics[f'{prefix}_{path}_count'] = span.count
+            for child in span.children.values():
+                visit(child, names + [child.name])
+
+        for child in self.root.children.values():
+            visit(child, [child.name])
+        if self.root.wall_seconds:
+            metrics[f'{prefix}_total_wall_s'] = self.root.wall_seconds
+            metrics[f'{prefix}_total_cpu_s'] = self.root.cpu_seconds
+        return metrics
+
+    def to_dict(self):
+        return self.root.to_dict()
+
+    def write_profiles(self, directory):
+        """
+        Write each cProfile capture as ``<path>.prof`` (for snakeviz / pstats)
+        and ``<path>.txt`` (top functions by cumulative time)
+
+        Returns:
+        --------
+        list of written paths
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        for path, stats in self.profiles.items():
+            stats.dump_stats(directory / f"{path}.prof")
+            text = io.StringIO()
+            pstats.Stats(str(directory / f"{path}.prof"), stream=text) \
+                .sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+            (directory / f"{path}.txt").write_text(text.getvalue())
+            written += [directory / f"{path}.prof", directory / f"{path}.txt"]
+        return written
+
+    def summary(self):
+        """Indented text table of the span tree"""
+        lines = [f"{'PHASE':<36}{'WALL (s)':>10}{'CPU (s)':>10}{'PEAK RSS (MB)':>15}"]
+
+        def visit(span, depth):
+            rss = f"{span.peak_rss_mb:.1f}" if span.peak_rss_mb is not None else '-'
+            label = '  ' * depth + span.name + (f" x{span.count}" if span.count > 1 else '')
+            lines.append(f"{label:<36}{span.wall_seconds:>10.3f}{span.cpu_seconds:>10.3f}{rss:>15}")
+            for child in span.children.values():
+                visit(child, depth + 1)
+
+        visit(self.root, 0)
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def maybe_phase(recorder, name):
+    """``recorder.phase(name)``, or nothing when recorder is None"""
+    if recorder is None:
+        yield None
+    else:
+        with recorder.phase(name) as span:
+            yield span
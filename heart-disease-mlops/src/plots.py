@@ -0,0 +1,89 @@
+"""
+Rendering of training plots
+
+ModelTrainer only captures plot data (confusion matrix counts, ROC points,
+feature importances) while a model is evaluated. The figures are rendered
+afterwards by ``render_plot`` in worker processes, so training time does
+not include rasterization.
+"""
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+# A plot waiting to be rendered and logged to the MLflow run ``run_id``
+PlotJob = namedtuple('PlotJob', ['run_id', 'kind', 'filename', 'data'])
+
+
+def _pyplot():
+    """Import pyplot with a non-interactive backend (safe in worker processes)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def render_confusion_matrix(path, cm):
+    """Render confusion matrix heatmap"""
+    import seaborn as sns
+    plt = _pyplot()
+
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(np.asarray(cm), annot=True, fmt='d', cmap='Blues',
+                xticklabels=['No Disease', 'Disease'],
+                yticklabels=['No Disease', 'Disease'])
+    plt.title('Confusion Matrix')
+    plt.ylabel('True Label')
+    plt.xlabel('Predicted Label')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def render_roc_curve(path, fpr, tpr, auc):
+    """Render ROC curve"""
+    plt = _pyplot()
+
+    plt.figure(figsize=(8, 6))
+    plt.plot(fpr, tpr, linewidth=2, label=f'ROC curve (AUC = {auc:.3f})')
+    plt.plot([0, 1], [0, 1], 'k--', linewidth=2, label='Random Classifier')
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel('False Positive Rate')
+    plt.ylabel('True Positive Rate')
+    plt.title('Receiver Operating Characteristic (ROC) Curve')
+    plt.legend(loc="lower right")
+    plt.grid(alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def render_feature_importances(path, importances, feature_names):
+    """Render feature importances bar chart, most important first"""
+    plt = _pyplot()
+    importances = np.asarray(importances)
+    indices = np.argsort(importances)[::-1]
+
+    plt.figure(figsize=(10, 6))
+    plt.title("Feature Importances")
+    plt.bar(range(len(importances)), importances[indices])
+    plt.xticks(range(len(importances)),
+               [feature_names[i] for i in indices],
+               rotation=45, ha='right')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+RENDERERS = {
+    'confusion_matrix': render_confusion_matrix,
+    'roc_curve': render_roc_curve,
+    'feature_importances': render_feature_importances,
+}
+
+
+def render_plot(kind, data, path):
+    """Render one plot to ``path`` (process pool entry point)"""
+    RENDERERS[kind](Path(path), **data)
+    return str(path)
@@ -0,0 +1,202 @@
+"""
+Reduced-precision inference
+
+The serving path computes in float64 by default: pandas frames, the scaler
+output and sklearn's internal conversions. The heart-disease features are
+small integers and a few measurements with 2-3 significant digits, so
+float32 loses nothing that matters and halves the bytes moved per row.
+
+Precisions (``config.INFERENCE_PRECISION``):
+
+- 'float64': the sklearn model (or its compiled tree predictor) as trained.
+- 'float32': the preprocessor imputes and scales in float32
+  (``HeartDiseasePreprocessor.transform(X, dtype=np.float32)``); logistic
+  regression uses float32 coefficients, tree ensembles float32 leaf values.
+- 'int8': as float32, plus 8-bit quantized logistic regression weights
+  (symmetric, one scale per class row, dequantized on use) and per-feature
+  quantized tree thresholds (exact, see tree_predictor.py). Activations stay
+  float32: quantizing them would need calibration ranges, and NumPy has no
+  int8 matrix product that would make it faster.
+
+``precision_report`` checks parity on the test split (largest probability
+difference and prediction agreement with float64, ROC AUC and accuracy)
+and measures throughput of each precision against float64.
+"""
+import numpy as np
+import pandas as pd
+from scipy.special import expit, softmax
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+import logging
+
+try:
+    from profiling import DEFAULT_BATCH_SIZES, measure_throughput
+    from tree_predictor import compile_predictor
+except ImportError:  # imported as part of the ``src`` package
+    from src.profiling import DEFAULT_BATCH_SIZES, measure_throughput
+    from src.tree_predictor import compile_predictor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ('float64', 'float32', 'int8')
+
+
+def input_dtype(precision):
+    """dtype the preprocessor should produce for ``precision``"""
+    return np.float64 if precision == 'float64' else np.float32
+
+
+class LinearPredictor:
+    """
+    Logistic regression in float32, optionally with int8 weights
+
+    Parameters:
+    -----------
+    model : fitted LogisticRegression
+    precision : {'float32', 'int8'}
+    """
+
+    def __init__(self, model, precision='float32'):
+        if precision not in ('float32', 'int8'):
+            raise ValueError(f"Unknown precision: {precision}")
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        self.precision = precision
+        self.weight_scale = None
+        if precision == 'int8':
+            scale = np.abs(coef).max(axis=1, keepdims=True) / 127
+            self.weight_scale = np.where(scale > 0, scale, 1.0).astype(np.float32)
+            self.coef = np.round(coef / self.weight_scale).astype(np.int8)
+        else:
+            self.coef = coef.astype(np.float32)
+        self.intercept = np.asarray(model.intercept_, dtype=np.float32)
+        self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+        feature_names = getattr(model, 'feature_names_in_', None)
+        self.feature_names_in_ = None if feature_names is None else list(feature_names)
+
+    def __repr__(self):
+        return f"LinearPredictor(n_features={self.n_features_in_}, precision={self.precision})"
+
+    @property
+    def nbytes(self):
+        """Memory held by the weights"""
+        scale_bytes = 0 if self.weight_scale is None else self.weight_scale.nbytes
+        return self.coef.nbytes + self.intercept.nbytes + scale_bytes
+
+    def weights(self):
+        """Coefficients as float32 (dequantized for int8)"""
+        if self.weight_scale is None:
+            return self.coef
+        return self.coef.astype(np.float32) * self.weight_scale
+
+    def decision_function(self, X):
+        if hasattr(X, 'columns') and self.feature_names_in_ is not None \
+                and list(X.columns) != self.feature_names_in_:
+            raise ValueError("The feature names should match those that were passed during fit")
+        X = np.asarray(X, dtype=np.float32)
+        scores = X @ self.weights().T + self.intercept
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            positive = expit(scores)
+            return np.column_stack([1 - positive, positive])
+        return softmax(scores, axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def reduced_precision_predictor(model, precision):
+    """
+    Predictor computing ``model``'s probabilities at ``precision``
+
+    Returns None when there is nothing faster than the sklearn model
+    (a float64 model that compile_predictor does not support, or a model
+    type without a reduced-precision implementation).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    if precision != 'float64' and isinstance(model, LogisticRegression):
+        return LinearPredictor(model, precision)
+    compiled = compile_predictor(model)
+    if compiled is None or precision == 'float64':
+        if compiled is None and precision != 'float64':
+            logger.info(f"No {precision} predictor for {type(model).__name__}, using float64")
+        return compiled
+    if hasattr(compiled, 'with_precision'):
+        return compiled.with_precision(precision)
+    return compiled
+
+
+class _ServingPath:
+    """Preprocessing and prediction of raw rows, as the API does them"""
+
+    def __init__(self, preprocessor, predictor, dtype):
+        self.preprocessor = preprocessor
+        self.predictor = predictor
+        self.dtype = dtype
+
+    def predict_proba(self, X):
+        dtype = None if self.dtype == np.float64 else self.dtype
+        return self.predictor.predict_proba(self.preprocessor.transform(X, dtype=dtype))
+
+
+def precision_report(model, X_test, y_test, preprocessor=None, X_test_raw=None,
+                     batch_sizes=DEFAULT_BATCH_SIZES, min_seconds=0.05):
+    """
+    Accuracy parity and throughput of every precision on a test split
+
+    Parameters:
+    -----------
+    X_test : DataFrame
+        Preprocessed (float64) test rows, used for parity
+    preprocessor, X_test_raw : optional
+        The fitted preprocessor and the raw test rows; when given,
+        throughput covers preprocessing plus prediction (the serving path)
+        and parity uses the reduced-precision preprocessing too
+
+    Returns:
+    --------
+    DataFrame with one row per precision: predictor, max_abs_proba_diff and
+    prediction_agreement (against the float64 sklearn model),
+    test_roc_auc, test_accuracy, predictor_bytes and
+    throughput_b<N>_rows_per_s (plus speedup_b<N> relative to float64)
+    """
+    end_to_end = preprocessor is not None and X_test_raw is not None
+    reference = model.predict_proba(X_test)
+
+    rows = []
+    for precision in PRECISIONS:
+        dtype = input_dtype(precision)
+        predictor = model if precision == 'float64' else \
+            (reduced_precision_predictor(model, precision) or model)
+        if end_to_end:
+            path = _ServingPath(preprocessor, predictor, dtype)
+            proba = path.predict_proba(X_test_raw)
+            benchmark_rows = X_test_raw
+        else:
+            path = predictor
+            proba = predictor.predict_proba(X_test.astype(dtype))
+            benchmark_rows = X_test.astype(dtype)
+
+        predictions = np.argmax(proba, axis=1)
+        rows.append({
+            'precision': precision,
+            'predictor': repr(predictor) if predictor is not model else type(model).__name__,
+            'max_abs_proba_diff': float(np.abs(proba - reference).max()),
+            'prediction_agreement': float(np.mean(predictions == np.argmax(reference, axis=1))),
+            'test_roc_auc': roc_auc_score(y_test, proba[:, 1]),
+            'test_accuracy': accuracy_score(y_test, model.classes_[predictions]),
+            'predictor_bytes': getattr(predictor, 'nbytes', np.nan),
+            **measure_throughput(path, benchmark_rows, batch_sizes=batch_sizes,
+                                 min_seconds=min_seconds),
+        })
+
+    report = pd.DataFrame(rows)
+    for batch_size in batch_sizes:
+        column = f'throughput_b{batch_size}_rows_per_s'
+        report[f'speedup_b{batch_size}'] = report[column] / report.loc[0, column]
+    return report
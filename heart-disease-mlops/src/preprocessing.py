@@ -8,32 +8,173 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.impute import SimpleImputer
 import joblib
 from pathlib import Path
+import hashlib
 import logging
 
+try:
+    from columnar import (
+        apply_filters, filter_columns, find_columnar_copy, is_columnar, read_columnar
+    )
+    from config import COLUMN_DTYPES
+    from data_cache import PreparedDataCache
+    from phases import maybe_phase
+    from shared_data import memmap_data
+except ImportError:  # imported as part of the ``src`` package
+    from src.columnar import (
+        apply_filters, filter_columns, find_columnar_copy, is_columnar, read_columnar
+    )
+    from src.config import COLUMN_DTYPES
+    from src.data_cache import PreparedDataCache
+    from src.phases import maybe_phase
+    from src.shared_data import memmap_data
+
+# Use the multi-threaded pyarrow CSV reader when it is installed
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def apply_schema(df, schema=COLUMN_DTYPES):
+    """
+    Downcast columns to the compact dtypes declared in ``schema``
+    
+    Integer columns with missing values use the nullable pandas type.
+    Columns whose values do not fit the declared type (non-integral or out
+    of range) are kept as float32 and a warning is logged. Columns not in
+    the schema are left untouched.
+    """
+    df = df.copy()
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        
+        numpy_name = str(dtype).lower()
+        if np.dtype(numpy_name).kind == 'f':
+            df[column] = df[column].astype(numpy_name)
+            continue
+        
+        values = df[column].astype('float64')
+        present = values.dropna()
+        info = np.iinfo(numpy_name)
+        if not ((present % 1 == 0).all() and present.between(info.min, info.max).all()):
+            logger.warning(f"Column '{column}' does not fit {dtype}; keeping float32")
+            df[column] = values.astype('float32')
+        elif values.isna().any():
+            nullable_name = numpy_name.replace('uint', 'UInt') if numpy_name.startswith('u') \
+                else numpy_name.replace('int', 'Int')
+            df[column] = values.astype(nullable_name)
+        else:
+            df[column] = values.astype(numpy_name)
+    return df
+
+
+def default_dtypes(df):
+    """Upcast compact columns to what pd.read_csv infers: int64, or float64 with missing values"""
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        if pd.api.types.is_integer_dtype(dtype):
+            dtypes[column] = 'float64' if df[column].isna().any() else 'int64'
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[column] = 'float64'
+    return df.astype(dtypes)
+
+
 class HeartDiseasePreprocessor:
     """
     Preprocessor for heart disease dataset
     Handles missing values, scaling, and feature encoding
     """
     
-    def __init__(self):
+    def __init__(self, impute=True):
+        """
+        Parameters:
+        -----------
+        impute : bool
+            Median-impute missing values. Set to False for models that
+            handle NaN natively (e.g. HistGradientBoostingClassifier); the
+            scaler then ignores NaNs when fitting and passes them through.
+        """
         self.scaler = StandardScaler()
         self.imputer = SimpleImputer(strategy='median')
+        self.impute = impute
         self.feature_names = None
         self.is_fitted = False
         
-    def load_data(self, filepath):
-        """Load data from CSV file"""
-        logger.info(f"Loading data from {filepath}")
-        df = pd.read_csv(filepath)
+    def load_data(self, filepath, compact=True, columns=None, filters=None, prefer_columnar=True):
+        """
+        Load data from a CSV file or its columnar copy
+        
+        Parameters:
+        -----------
+        filepath : str or Path
+            CSV file, or a Parquet/Feather file or partitioned directory
+        compact : bool
+            Parse the schema columns as float32 and downcast them to the
+            dtypes in ``config.COLUMN_DTYPES`` (columnar copies are stored
+            that way already). With False the CSV is parsed with pandas'
+            default dtypes and no columnar copy is preferred; a columnar
+            ``filepath`` is upcast to int64/float64 (its values stay the
+            stored float32 ones).
+        columns : list of str, optional
+            Only load these columns
+        filters : list, optional
+            Row filters in DNF notation, e.g. [('age', '>=', 60)]; see
+            columnar.py. Pushed down to the row groups of a Parquet copy.
+        prefer_columnar : bool
+            Read an up-to-date ``.parquet``/``.feather`` copy next to the CSV
+            instead of parsing it (only with ``compact``)
+        """
+        source = Path(filepath)
+        if not is_columnar(source) and prefer_columnar and compact:
+            source = find_columnar_copy(source) or source
+        
+        logger.info(f"Loading data from {source}")
+        if is_columnar(source):
+            df = read_columnar(source, columns=columns, filters=filters)
+            if not compact:
+                df = default_dtypes(df)
+            logger.info(f"Loaded {len(df)} records with {len(df.columns)} columns")
+            return df
+        
+        # Filter columns must be parsed even when not projected
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(list(columns) + filter_columns(filters)))
+        
+        if not compact:
+            df = pd.read_csv(filepath, usecols=usecols)
+            df = apply_filters(df, filters)
+            df = df[columns] if columns is not None else df
+            logger.info(f"Loaded {len(df)} records with {len(df.columns)} columns")
+            return df
+        
+        parse_dtypes = {column: 'float32' for column in COLUMN_DTYPES}
+        df = apply_schema(pd.read_csv(filepath, dtype=parse_dtypes, engine=CSV_ENGINE, usecols=usecols))
+        df = apply_filters(df, filters)
+        df = df[columns] if columns is not None else df
+        
+        # 8 bytes per cell is what pandas' default int64/float64 inference uses
+        default_bytes = df.shape[0] * df.shape[1] * 8 + df.index.memory_usage()
+        compact_bytes = df.memory_usage(deep=True).sum()
         logger.info(f"Loaded {len(df)} records with {len(df.columns)} columns")
+        logger.info(
+            f"Memory: {default_bytes / 1024:.1f} KB with default dtypes -> "
+            f"{compact_bytes / 1024:.1f} KB compact ({default_bytes / compact_bytes:.1f}x smaller)"
+        )
         return df
     
     def handle_missing_values(self, X):
         """Handle missing values using median imputation"""
+        # Preprocessors pickled before the impute option always imputed
+        if not getattr(self, 'impute', True):
+            return pd.DataFrame(X.to_numpy(dtype='float64', na_value=np.nan),
+                                columns=X.columns, index=X.index)
+        
         if not self.is_fitted:
             X_imputed = self.imputer.fit_transform(X)
         else:
@@ -63,8 +204,17 @@ class HeartDiseasePreprocessor:
         logger.info("Preprocessing complete!")
         return X_scaled
     
-    def transform(self, X):
-        """Transform new data using fitted preprocessor"""
+    def transform(self, X, dtype=None):
+        """
+        Transform new data using fitted preprocessor
+        
+        Parameters:
+        -----------
+        dtype : numpy dtype, optional
+            Compute in this precision (e.g. np.float32 for reduced-precision
+            serving, see precision.py) from the fitted medians, means and
+            scales, instead of through sklearn's float64 conversions
+        """
         if not self.is_fitted:
             raise ValueError("Preprocessor must be fitted before transform")
         
@@ -72,6 +222,9 @@ class HeartDiseasePreprocessor:
         if self.feature_names is not None:
             X = X[self.feature_names]
         
+        if dtype is not None:
+            return self._transform_as(X, np.dtype(dtype))
+        
         # Handle missing values
         X_imputed = self.handle_missing_values(X)
         
@@ -80,6 +233,36 @@ class HeartDiseasePreprocessor:
         
         return X_scaled
     
+    def _transform_as(self, X, dtype):
+        """Impute and scale in ``dtype`` (same steps as the sklearn transformers)"""
+        values = X.to_numpy(dtype=dtype, na_value=np.nan)
+        if getattr(self, 'impute', True):
+            missing = np.isnan(values)
+            if missing.any():
+                medians = self.imputer.statistics_.astype(dtype)
+                values[missing] = np.broadcast_to(medians, values.shape)[missing]
+        values -= self.scaler.mean_.astype(dtype)
+        values /= self.scaler.scale_.astype(dtype)
+        return pd.DataFrame(values, columns=X.columns, index=X.index)
+    
+    def partial_fit(self, X):
+        """
+        Update the scaler statistics with new data without refitting
+        
+        The imputer medians stay fixed (a running median is not available
+        incrementally); the scaler mean and variance are merged with the
+        statistics of all samples seen so far.
+        """
+        if not self.is_fitted:
+            raise ValueError("Preprocessor must be fitted before partial_fit")
+        
+        if self.feature_names is not None:
+            X = X[self.feature_names]
+        self.scaler.partial_fit(self.handle_missing_values(X))
+        logger.info(f"Scaler updated with {len(X)} samples "
+                    f"({int(np.max(self.scaler.n_samples_seen_))} seen in total)")
+        return self
+    
     def save(self, filepath):
         """Save preprocessor to file"""
         joblib.dump(self, filepath)
@@ -93,7 +276,13 @@ class HeartDiseasePreprocessor:
         return preprocessor
 
 
-def prepare_data(data_path, test_size=0.2, random_state=42):
+def preprocessor_version():
+    """Fingerprint of this module's source, used to invalidate cached data"""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+
+
+def prepare_data(data_path, test_size=0.2, random_state=42, cache_dir=None, impute=True,
+                 memmap_dir=None, phases=None):
     """
     Prepare data for training
     
@@ -105,33 +294,88 @@ def prepare_data(data_path, test_size=0.2, random_state=42):
         Proportion of data for testing
     random_state : int
         Random seed for reproducibility
+    cache_dir : str or Path, optional
+        Directory of the prepared-data cache. When given, outputs are
+        reused from (or stored in) a content-addressed cache entry and the
+        feature matrices are returned memory-mapped.
+    impute : bool
+        Median-impute missing values (False keeps NaN for models that
+        handle missing values natively)
+    memmap_dir : str or Path, optional
+        Write the processed matrices and labels to .npy files here and
+        return them memory-mapped, so parallel training workers share one
+        copy (see shared_data). Files are content-addressed: preparing the
+        same data again reuses them instead of adding copies. Matrices served by the cache are already
+        memory-mapped and are not written again.
+    phases : phases.PhaseRecorder, optional
+        Records the wall time, CPU time and peak memory of each step
+        (cache_load, load, split, fit_transform, transform, cache_save,
+        memmap); log it with ModelTrainer.log_phases
     
     Returns:
     --------
     X_train, X_test, y_train, y_test, preprocessor
     """
+    cache = key = None
+    if cache_dir is not None:
+        cache = PreparedDataCache(cache_dir)
+        with maybe_phase(phases, 'cache_load'):
+            key = cache.key(data_path, test_size, random_state, preprocessor_version(), impute=impute)
+            cached = cache.load(key)
+        if cached is not None:
+            X_train, X_test, y_train, y_test, state = cached
+            preprocessor = HeartDiseasePreprocessor(impute=impute)
+            preprocessor.__dict__.update(state)
+            if memmap_dir is not None:
+                with maybe_phase(phases, 'memmap'):
+                    X_train, X_test, y_train, y_test = memmap_data(memmap_dir, X_train, X_test,
+                                                                   y_train, y_test)
+            return X_train, X_test, y_train, y_test, preprocessor
+    
     # Load data
-    preprocessor = HeartDiseasePreprocessor()
-    df = preprocessor.load_data(data_path)
+    preprocessor = HeartDiseasePreprocessor(impute=impute)
+    with maybe_phase(phases, 'load'):
+        df = preprocessor.load_data(data_path)
     
     # Separate features and target
     X = df.drop('target', axis=1)
     y = df['target']
     
     # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=random_state, stratify=y
-    )
+    with maybe_phase(phases, 'split'):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, random_state=random_state, stratify=y
+        )
     
     logger.info(f"Train set: {len(X_train)} samples")
     logger.info(f"Test set: {len(X_test)} samples")
     logger.info(f"Class distribution in training: {y_train.value_counts().to_dict()}")
     
     # Fit and transform training data
-    X_train_processed = preprocessor.fit_transform(X_train)
+    with maybe_phase(phases, 'fit_transform'):
+        X_train_processed = preprocessor.fit_transform(X_train)
     
     # Transform test data
-    X_test_processed = preprocessor.transform(X_test)
+    with maybe_phase(phases, 'transform'):
+        X_test_processed = preprocessor.transform(X_test)
+    
+    if cache is not None:
+        with maybe_phase(phases, 'cache_save'):
+            cache.save(
+                key, X_train_processed, X_test_processed, y_train, y_test, preprocessor,
+                data_path=str(Path(data_path).resolve()),
+                data_digest=cache.data_digest(data_path),
+                test_size=test_size,
+                random_state=random_state,
+                impute=impute,
+                code_version=preprocessor_version(),
+            )
+    
+    if memmap_dir is not None:
+        with maybe_phase(phases, 'memmap'):
+            X_train_processed, X_test_processed, y_train, y_test = memmap_data(
+                memmap_dir, X_train_processed, X_test_processed, y_train, y_test
+            )
     
     return X_train_processed, X_test_processed, y_train, y_test, preprocessor
 
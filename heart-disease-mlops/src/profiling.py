@@ -0,0 +1,193 @@
+"""
+Inference profiling and SLO-aware model selection
+
+``profile_model`` measures what a model costs to serve: single-row
+latency (p50/p99) of the predictor the API answers single rows with, batch
+throughput at several batch sizes, serialized artifact size, load time and
+the memory allocated while loading. For tree ensembles the API serves the
+compiled predictor (see tree_predictor.py), so that is what the latency
+and the latency SLO measure; sklearn's own predict_proba latency is kept
+as ``sklearn_latency_*``.
+``SelectionPolicy`` picks a model from a comparison table by a quality
+metric, subject to latency / memory / size SLOs.
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+import pandas as pd
+import logging
+
+try:
+    from tree_predictor import compile_predictor
+except ImportError:  # imported as part of the ``src`` package
+    from src.tree_predictor import compile_predictor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1000)
+
+
+def _take_rows(X, indices):
+    """Select rows by position from a DataFrame or array"""
+    return X.iloc[indices] if hasattr(X, 'iloc') else np.asarray(X)[indices]
+
+
+def measure_latency(model, X, n_repeats=200):
+    """Median and 99th percentile single-row predict_proba latency (ms)"""
+    model.predict_proba(_take_rows(X, [0]))  # warm-up
+    timings = np.empty(n_repeats)
+    for i in range(n_repeats):
+        row = _take_rows(X, [i % len(X)])
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings[i] = time.perf_counter() - start
+    timings *= 1000
+    return {
+        'latency_p50_ms': float(np.percentile(timings, 50)),
+        'latency_p99_ms': float(np.percentile(timings, 99)),
+    }
+
+
+def measure_throughput(model, X, batch_sizes=DEFAULT_BATCH_SIZES, min_seconds=0.05, min_calls=3):
+    """Rows scored per second by predict_proba at each batch size"""
+    throughput = {}
+    for batch_size in batch_sizes:
+        batch = _take_rows(X, np.arange(batch_size) % len(X))
+        calls = 0
+        start = time.perf_counter()
+        while calls < min_calls or time.perf_counter() - start < min_seconds:
+            model.predict_proba(batch)
+            calls += 1
+        throughput[f'throughput_b{batch_size}_rows_per_s'] = \
+            calls * batch_size / (time.perf_counter() - start)
+    return throughput
+
+
+def measure_artifact(model):
+    """Serialized size, load time and memory allocated by loading the joblib artifact"""
+    fd, path = tempfile.mkstemp(suffix='.pkl')
+    os.close(fd)
+    try:
+        joblib.dump(model, path)
+        size_bytes = os.path.getsize(path)
+
+        start = time.perf_counter()
+        joblib.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        # Separate load under tracemalloc, which slows allocation down
+        tracemalloc.start()
+        loaded = joblib.load(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del loaded
+    finally:
+        os.remove(path)
+
+    return {'size_bytes': size_bytes, 'load_ms': load_ms, 'memory_mb': peak / 2 ** 20}
+
+
+def profile_model(model, X, n_repeats=200, batch_sizes=DEFAULT_BATCH_SIZES):
+    """
+    Serving cost of a fitted model
+
+    Parameters:
+    -----------
+    X : DataFrame or array
+        Preprocessed rows to score (cycled when shorter than a batch)
+
+    Returns:
+    --------
+    dict with latency_p50_ms and latency_p99_ms (of the served predictor:
+    compiled for models compile_predictor supports, the model otherwise),
+    throughput_b<N>_rows_per_s, size_bytes, load_ms and memory_mb, plus
+    sklearn_latency_p50_ms and sklearn_latency_p99_ms for compiled models
+    """
+    compiled = compile_predictor(model)
+    served = model if compiled is None else compiled
+    profile = {
+        **measure_latency(served, X, n_repeats=n_repeats),
+        **measure_throughput(model, X, batch_sizes=batch_sizes),
+        **measure_artifact(model),
+    }
+    if compiled is not None:
+        latency = measure_latency(model, X, n_repeats=n_repeats)
+        profile.update({f'sklearn_{name}': value for name, value in latency.items()})
+    return profile
+
+
+class SelectionPolicy:
+    """
+    Choose the best model by a quality metric within serving SLOs
+
+    Parameters:
+    -----------
+    metric : str
+        Quality column to maximise (e.g. 'oof_roc_auc', cross-validated on
+        the training rows, so the test split stays for reporting)
+    max_latency_p99_ms, max_memory_mb, max_size_bytes : float, optional
+        SLOs; models exceeding any of them, or without a measurement of
+        them, are not eligible. Latency is that of the served predictor
+        (see profile_model).
+    tolerance : float
+        Models within this much of the best eligible metric are treated as
+        equivalent, and the one with the lowest ``tie_breaker`` wins
+    tie_breaker : str
+        Cost column used among equivalent models
+    """
+
+    def __init__(self, metric='oof_roc_auc', max_latency_p99_ms=None, max_memory_mb=None,
+                 max_size_bytes=None, tolerance=0.0, tie_breaker='latency_p99_ms'):
+        self.metric = metric
+        self.limits = {
+            'latency_p99_ms': max_latency_p99_ms,
+            'memory_mb': max_memory_mb,
+            'size_bytes': max_size_bytes,
+        }
+        self.tolerance = tolerance
+        self.tie_breaker = tie_breaker
+
+    def violations(self, row):
+        """SLOs a comparison-table row does not meet (a missing measurement fails its SLO)"""
+        violations = []
+        for column, limit in self.limits.items():
+            if limit is None:
+                continue
+            value = row.get(column, np.nan)
+            if pd.isna(value):
+                violations.append(f"{column} not measured")
+            elif value > limit:
+                violations.append(f"{column} {value:.4g} > {limit:.4g}")
+        return violations
+
+    def required_columns(self):
+        """Columns a comparison table needs for this policy"""
+        limited = [column for column, limit in self.limits.items() if limit is not None]
+        return [self.metric, self.tie_breaker, *limited]
+
+    def select(self, table):
+        """
+        Index label of the selected row of a comparison table
+        (one row per model, with quality and profile_model columns)
+        """
+        missing = [column for column in self.required_columns() if column not in table]
+        if missing:
+            raise ValueError(f"Comparison table has no {', '.join(missing)} column(s); "
+                             f"train with evaluation='cv' and profile_inference=True")
+
+        eligible = table[[not self.violations(row) for _, row in table.iterrows()]]
+        if eligible.empty:
+            details = {name: self.violations(row) for name, row in table.iterrows()}
+            raise ValueError(f"No model meets the serving SLOs: {details}")
+
+        best = eligible[self.metric].max()
+        equivalent = eligible[eligible[self.metric] >= best - self.tolerance]
+        selected = equivalent.sort_values(self.tie_breaker).index[0]
+        logger.info(f"Selected {selected}: {self.metric} {table.loc[selected, self.metric]:.4f} "
+                    f"(best eligible {best:.4f}), {len(table) - len(eligible)} models over SLO")
+        return selected
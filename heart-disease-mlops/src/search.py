@@ -0,0 +1,391 @@
+"""
+Budgeted hyperparameter search engines
+
+Alternatives to the exhaustive GridSearchCV in
+``ModelTrainer.hyperparameter_tuning``. Both engines search the same
+``param_grid``, stop when a fit or time budget is used up, drop clearly
+losing candidates early, and stream every trial to MLflow in batches.
+
+- SuccessiveHalvingSearch: evaluates all candidates on a small resource
+  (training rows or n_estimators) and promotes the best 1/factor to the
+  next, larger rung.
+- BayesianSearch: sequential model-based optimization. A random forest
+  surrogate scores untried grid points by expected improvement. A trial's
+  folds run in parallel batches of n_jobs, and the trial is pruned between
+  batches once it is clearly behind the best one.
+"""
+import math
+import time
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy.stats import norm
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Largest number of grid points a BayesianSearch scores with its surrogate
+MAX_SURROGATE_CANDIDATES = 2000
+
+
+class TrialLog:
+    """
+    Buffer trials and flush them to an MLflow run in batches
+
+    Each trial is logged as metrics at step = trial number. The full trial
+    list, including parameters, is written as ``trials.json`` on close.
+
+    Parameters:
+    -----------
+    run : tracking.RunLogger, optional
+        Run to log to; batches go through its background thread and spool,
+        so a slow or unreachable server never blocks the search. Without a
+        run, trials are only kept in ``trials``.
+    """
+
+    def __init__(self, run=None, batch_size=50):
+        self.run = run
+        self.batch_size = batch_size
+        self.trials = []
+        self._buffer = []
+
+    def add(self, trial):
+        trial['number'] = len(self.trials)
+        self.trials.append(trial)
+        self._buffer.append(trial)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.run is None or not self._buffer:
+            self._buffer = []
+            return
+        for trial in self._buffer:
+            metrics = {
+                'trial_score': trial['score'],
+                'trial_fits': trial['n_fits'],
+                'trial_pruned': float(trial['status'] == 'pruned'),
+            }
+            if trial.get('resource') is not None:
+                metrics['trial_resource'] = trial['resource']
+            self.run.log_metrics(metrics, step=trial['number'], timestamp=trial['end_time'])
+        self.run.flush()
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        if self.run is not None and self.trials:
+            trials = [{**trial, 'params': {key: _jsonable(value) for key, value in trial['params'].items()}}
+                      for trial in self.trials]
+            self.run.log_dict({'trials': trials}, 'trials.json')
+
+
+def _jsonable(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+class BudgetedSearch:
+    """
+    Common budget accounting, cross-validation and refit for search engines
+
+    Parameters:
+    -----------
+    estimator : sklearn estimator
+        Base estimator; candidates are clones with grid parameters set
+    param_grid : dict or list of dicts
+        Same format as GridSearchCV
+    max_fits : int, optional
+        Maximum number of model fits (one fold = one fit)
+    time_budget : float, optional
+        Maximum search time in seconds
+    """
+
+    def __init__(self, estimator, param_grid, scoring='roc_auc', cv=5, max_fits=None,
+                 time_budget=None, random_state=42, n_jobs=None, trial_log=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.scoring = scoring
+        self.cv = cv
+        self.max_fits = max_fits
+        self.time_budget = time_budget
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.trial_log = trial_log
+
+    def _start(self):
+        self.n_fits_ = 0
+        self.fit_seconds_ = []
+        self.trials_ = []
+        self._started = time.time()
+        self._rng = np.random.default_rng(self.random_state)
+
+    def _budget_allows(self, n_fits):
+        """Check whether ``n_fits`` more fits fit in the fit and time budgets"""
+        if self.max_fits is not None and self.n_fits_ + n_fits > self.max_fits:
+            return False
+        if self.time_budget is not None and time.time() - self._started >= self.time_budget:
+            return False
+        return True
+
+    def _splits(self, X, y):
+        cv = StratifiedKFold(n_splits=self.cv, shuffle=True, random_state=self.random_state)
+        return list(cv.split(X, y))
+
+    def _record(self, params, scores, status, started, resource=None):
+        trial = {
+            'params': params,
+            'score': float(np.mean(scores)) if len(scores) else float('nan'),
+            'fold_scores': [float(score) for score in scores],
+            'n_fits': len(scores),
+            'status': status,
+            'resource': resource,
+            'duration': time.time() - started,
+            'end_time': time.time(),
+        }
+        self.trials_.append(trial)
+        if self.trial_log is not None:
+            self.trial_log.add(trial)
+        return trial
+
+    def _refit(self, X, y, extra_params=None):
+        params = {**self.best_params_, **(extra_params or {})}
+        self.best_estimator_ = clone(self.estimator).set_params(**params).fit(X, y)
+        logger.info(f"Search finished after {self.n_fits_} fits, {len(self.trials_)} trials "
+                    f"in {time.time() - self._started:.1f}s")
+        return self
+
+
+def _fit_and_score(estimator, params, X, y, train_idx, test_idx, scoring):
+    """Fit one fold and return its score and the seconds it took"""
+    started = time.time()
+    model = clone(estimator).set_params(**params)
+    model.fit(_rows(X, train_idx), _rows(y, train_idx))
+    score = get_scorer(scoring)(model, _rows(X, test_idx), _rows(y, test_idx))
+    return score, time.time() - started
+
+
+def _rows(data, indices):
+    return data.iloc[indices] if hasattr(data, 'iloc') else np.asarray(data)[indices]
+
+
+class SuccessiveHalvingSearch(BudgetedSearch):
+    """
+    Successive halving over training rows or boosting/forest size
+
+    Parameters:
+    -----------
+    resource : {'n_samples', 'n_estimators'}
+        What grows between rungs
+    factor : int
+        Only the best 1/factor of the candidates are promoted at each rung
+    min_resources : int, optional
+        Resource of the first rung (default: 20 rows per fold, or 10 estimators)
+    max_resources : int, optional
+        Resource of the last rung (default: all rows, or the estimator's n_estimators)
+    """
+
+    def __init__(self, estimator, param_grid, resource='n_samples', factor=3,
+                 min_resources=None, max_resources=None, **kwargs):
+        super().__init__(estimator, param_grid, **kwargs)
+        self.resource = resource
+        self.factor = factor
+        self.min_resources = min_resources
+        self.max_resources = max_resources
+
+    def _schedule(self, n_candidates, n_samples):
+        """Resource per rung, from smallest to largest"""
+        if self.resource == 'n_samples':
+            max_r = self.max_resources or n_samples
+            min_r = self.min_resources or min(max_r, 20 * self.cv)
+        elif self.resource == 'n_estimators':
+            max_r = self.max_resources or self.estimator.get_params()['n_estimators']
+            min_r = self.min_resources or min(max_r, 10)
+        else:
+            raise ValueError(f"Unknown resource: {self.resource}")
+
+        n_rungs = 1 + int(math.log(max(n_candidates, 1), self.factor) + 1e-9)
+        n_rungs = min(n_rungs, 1 + int(math.log(max_r / min_r, self.factor) + 1e-9))
+        return [int(max_r / self.factor ** (n_rungs - 1 - i)) for i in range(n_rungs)]
+
+    def fit(self, X, y):
+        self._start()
+        candidates = list(ParameterGrid(self.param_grid))
+        if self.resource in candidates[0]:
+            raise ValueError(f"'{self.resource}' is the halving resource and cannot be in param_grid")
+        order = self._rng.permutation(len(candidates))
+        candidates = [candidates[i] for i in order]
+
+        if self.max_fits is not None:
+            # Halving costs about cv * n * factor / (factor - 1) fits for n candidates
+            affordable = int(self.max_fits * (self.factor - 1) / (self.factor * self.cv))
+            candidates = candidates[:max(1, affordable)]
+
+        schedule = self._schedule(len(candidates), len(X))
+        permutation = self._rng.permutation(len(X))
+        y_values = np.asarray(y)
+        best = None
+
+        for rung, resource in enumerate(schedule):
+            if not self._budget_allows(len(candidates) * self.cv):
+                logger.info(f"Budget exhausted before rung {rung}")
+                break
+
+            if self.resource == 'n_samples':
+                subset = np.sort(permutation[:resource])
+                X_rung, y_rung = _rows(X, subset), y_values[subset]
+                extra = {}
+            else:
+                X_rung, y_rung = X, y_values
+                extra = {'n_estimators': resource}
+
+            splits = self._splits(X_rung, y_rung)
+            started = time.time()
+            outputs = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_and_score)(self.estimator, {**params, **extra}, X_rung, y_rung,
+                                        train_idx, test_idx, self.scoring)
+                for params in candidates for train_idx, test_idx in splits
+            )
+            fold_scores = [score for score, _ in outputs]
+            self.fit_seconds_.extend(seconds for _, seconds in outputs)
+            self.n_fits_ += len(fold_scores)
+
+            last_rung = rung == len(schedule) - 1
+            n_keep = max(1, math.ceil(len(candidates) / self.factor))
+            scores = [np.mean(fold_scores[i * self.cv:(i + 1) * self.cv])
+                      for i in range(len(candidates))]
+            ranking = np.argsort(scores)[::-1]
+            for rank, i in enumerate(ranking):
+                status = 'complete' if last_rung else ('promoted' if rank < n_keep else 'pruned')
+                self._record(candidates[i], fold_scores[i * self.cv:(i + 1) * self.cv],
+                             status, started, resource=resource)
+
+            best = (candidates[ranking[0]], scores[ranking[0]])
+            candidates = [candidates[i] for i in ranking[:n_keep]]
+
+        if best is None:
+            raise RuntimeError("Budget too small to evaluate a single rung")
+
+        self.best_params_, self.best_score_ = best
+        final_extra = {'n_estimators': schedule[-1]} if self.resource == 'n_estimators' else {}
+        return self._refit(X, y, final_extra)
+
+
+class BayesianSearch(BudgetedSearch):
+    """
+    Sequential model-based optimization over the grid points
+
+    Parameters:
+    -----------
+    n_initial : int
+        Random trials before the surrogate is used
+    prune_z : float
+        A trial stops after a batch of folds when its mean score plus
+        prune_z standard errors is still below the best completed trial
+
+    Trials run one after another (each picks its point from the results of
+    the previous ones); the folds of a trial run in batches of
+    ``effective_n_jobs(n_jobs)`` in parallel. With one job every fold is a
+    batch, so pruning is as early as possible.
+    """
+
+    def __init__(self, estimator, param_grid, n_initial=5, prune_z=2.0, **kwargs):
+        super().__init__(estimator, param_grid, **kwargs)
+        self.n_initial = n_initial
+        self.prune_z = prune_z
+
+    def _encode(self, candidates):
+        """Numeric matrix for the surrogate: numbers as (log-)values, others as category codes"""
+        keys = sorted({key for params in candidates for key in params})
+        columns = []
+        for key in keys:
+            values = [params.get(key) for params in candidates]
+            numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+            if numeric:
+                column = np.asarray(values, dtype=float)
+                if column.min() > 0 and column.max() / column.min() >= 10:
+                    column = np.log10(column)
+            else:
+                codes = {}
+                column = np.asarray([codes.setdefault(repr(v), len(codes)) for v in values], dtype=float)
+            columns.append(column)
+        return np.column_stack(columns) if columns else np.zeros((len(candidates), 1))
+
+    def _next_candidate(self, candidates, encoded, tried):
+        untried = np.flatnonzero(~tried)
+        if tried.sum() < self.n_initial:
+            return int(self._rng.choice(untried))
+
+        observed = np.flatnonzero(tried)
+        scores = np.asarray([self._scores[i] for i in observed])
+        surrogate = RandomForestRegressor(n_estimators=50, min_samples_leaf=1,
+                                          random_state=self.random_state)
+        surrogate.fit(encoded[observed], scores)
+
+        per_tree = np.stack([tree.predict(encoded[untried]) for tree in surrogate.estimators_])
+        mean, std = per_tree.mean(axis=0), np.maximum(per_tree.std(axis=0), 1e-9)
+        improvement = mean - scores.max() - 0.01
+        z = improvement / std
+        expected_improvement = improvement * norm.cdf(z) + std * norm.pdf(z)
+        return int(untried[np.argmax(expected_improvement)])
+
+    def _evaluate(self, params, X, y, splits, parallel):
+        """Cross-validate in batches of parallel folds, stopping once clearly worse than the best"""
+        started = time.time()
+        scores = []
+        batch_size = max(1, effective_n_jobs(self.n_jobs))
+        for start in range(0, len(splits), batch_size):
+            outputs = parallel(
+                delayed(_fit_and_score)(self.estimator, params, X, y, train_idx, test_idx,
+                                        self.scoring)
+                for train_idx, test_idx in splits[start:start + batch_size]
+            )
+            scores.extend(score for score, _ in outputs)
+            self.fit_seconds_.extend(seconds for _, seconds in outputs)
+            self.n_fits_ += len(outputs)
+            if self._best_score is not None and 2 <= len(scores) < len(splits):
+                stderr = max(np.std(scores, ddof=1) / np.sqrt(len(scores)), 0.01)
+                if np.mean(scores) + self.prune_z * stderr < self._best_score:
+                    return self._record(params, scores, 'pruned', started)
+        return self._record(params, scores, 'complete', started)
+
+    def fit(self, X, y):
+        self._start()
+        candidates = list(ParameterGrid(self.param_grid))
+        if len(candidates) > MAX_SURROGATE_CANDIDATES:
+            keep = self._rng.choice(len(candidates), MAX_SURROGATE_CANDIDATES, replace=False)
+            candidates = [candidates[i] for i in keep]
+        encoded = self._encode(candidates)
+        tried = np.zeros(len(candidates), dtype=bool)
+        splits = self._splits(X, y)
+
+        self._scores = {}
+        self._best_score = None
+        best_index = None
+
+        # One pool for the whole search, reused by every trial's batches
+        with Parallel(n_jobs=self.n_jobs) as parallel:
+            while not tried.all() and self._budget_allows(self.cv):
+                i = self._next_candidate(candidates, encoded, tried)
+                tried[i] = True
+                trial = self._evaluate(candidates[i], X, y, splits, parallel)
+                self._scores[i] = trial['score']
+                if trial['status'] == 'complete' and (self._best_score is None
+                                                      or trial['score'] > self._best_score):
+                    self._best_score = trial['score']
+                    best_index = i
+
+        if best_index is None:
+            raise RuntimeError("Budget too small to complete a single trial")
+
+        self.best_params_ = candidates[best_index]
+        self.best_score_ = self._best_score
+        return self._refit(X, y)
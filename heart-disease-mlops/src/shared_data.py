@@ -0,0 +1,198 @@
+"""
+Training matrices shared between worker processes through memory maps
+
+Every process that receives a pickled ``X_train`` holds its own copy, which
+multiplies memory by the number of workers. Matrices written once as
+``.npy`` files and opened with ``mmap_mode='r'`` are instead shared: every
+process maps the same file and the OS keeps one copy of its pages.
+
+- ``memmap_frame`` / ``memmap_data`` write frames and labels to a directory
+  and return read-only memory-mapped versions with the same columns and
+  index. Files are named by a hash of their content: unchanged inputs map
+  the file an earlier run wrote instead of adding a copy, so the directory
+  holds one file per distinct matrix. Nothing is deleted automatically
+  (a file may be mapped by another run); clear the directory when no
+  training is running to reclaim the space.
+- joblib (loky) workers receive memory-mapped arrays as a reference to
+  their file. ``SharedFrame`` does the same for ``ProcessPoolExecutor``
+  workers (``ModelTrainer.train_all``): a memory-mapped frame is sent as
+  its file name, columns and index, and mapped again by the worker.
+- ``worker_memory`` reports a process's peak resident memory and its
+  private (unshared) memory, which is what the sharing saves.
+"""
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import logging
+
+try:
+    from phases import peak_rss_mb
+except ImportError:  # imported as part of the ``src`` package
+    from src.phases import peak_rss_mb
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backing_file(data):
+    """
+    File of the memory map holding exactly this DataFrame, Series or array
+
+    None if the data is not memory-mapped or is only part of a mapped file
+    (a row slice or column subset). Frames with several dtypes are copied by
+    to_numpy, so are never backed by one file.
+    """
+    values = data.to_numpy() if hasattr(data, 'to_numpy') else data
+    base = values
+    while base is not None:
+        if isinstance(base, np.memmap):
+            return base.filename if base.shape == values.shape and base.dtype == values.dtype else None
+        base = getattr(base, 'base', None)
+    return None
+
+
+def content_name(array):
+    """File name of an array's content-addressed .npy copy"""
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha256(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(memoryview(array).cast('B'))
+    return f"{digest.hexdigest()[:24]}.npy"
+
+
+def memmap_array(array, path):
+    """
+    Write an array to ``path`` (.npy) and return it memory-mapped read-only
+
+    An existing file at ``path`` is mapped as is (``path`` is expected to
+    name the content, see ``content_name``). The file is written under a
+    temporary name and renamed, so concurrent writers never expose a
+    partial file.
+    """
+    path = Path(path)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.stem}-{uuid.uuid4().hex[:8]}.npy")
+        try:
+            np.save(tmp, np.ascontiguousarray(array))
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+    return np.load(path, mmap_mode='r')
+
+
+def memmap_frame(data, directory):
+    """
+    Memory-mapped copy of a DataFrame (one homogeneous matrix), Series or
+    array, stored in ``directory`` under its content hash
+
+    Data that is already memory-mapped is returned unchanged.
+    """
+    if backing_file(data) is not None:
+        return data
+    directory = Path(directory)
+    if not isinstance(data, (pd.DataFrame, pd.Series)):
+        array = np.asarray(data)
+        return memmap_array(array, directory / content_name(array))
+    array = data.to_numpy()
+    values = memmap_array(array, directory / content_name(array))
+    if isinstance(data, pd.DataFrame):
+        return pd.DataFrame(values, columns=data.columns, index=data.index, copy=False)
+    return pd.Series(values, index=data.index, name=data.name, copy=False)
+
+
+def memmap_data(directory, *frames):
+    """
+    Memory-mapped copies of several frames or arrays, stored in ``directory``
+
+    Files are content-addressed: data already written by an earlier call
+    or run is mapped again rather than copied, and files are never
+    overwritten, so concurrent runs can share the directory.
+    """
+    return [None if data is None else memmap_frame(data, directory) for data in frames]
+
+
+class SharedFrame:
+    """
+    Picklable reference to a memory-mapped DataFrame, Series or array
+
+    Pickling sends the file name, columns and index only; ``load`` maps the
+    file again in the receiving process.
+    """
+
+    def __init__(self, data):
+        self.filename = backing_file(data)
+        if self.filename is None:
+            raise ValueError("SharedFrame requires memory-mapped data (see memmap_frame)")
+        self.kind = ('frame' if isinstance(data, pd.DataFrame)
+                     else 'series' if isinstance(data, pd.Series) else 'array')
+        self.index = getattr(data, 'index', None)
+        self.columns = getattr(data, 'columns', None)
+        self.name = getattr(data, 'name', None)
+
+    def load(self):
+        values = np.load(self.filename, mmap_mode='r')
+        if self.kind == 'frame':
+            return pd.DataFrame(values, columns=self.columns, index=self.index, copy=False)
+        if self.kind == 'series':
+            return pd.Series(values, index=self.index, name=self.name, copy=False)
+        return values
+
+
+def share(data):
+    """SharedFrame for memory-mapped data, anything else unchanged"""
+    if data is not None and backing_file(data) is not None:
+        return SharedFrame(data)
+    return data
+
+
+def resolve(data):
+    """Inverse of ``share``: load a SharedFrame, pass anything else through"""
+    return data.load() if isinstance(data, SharedFrame) else data
+
+
+def worker_memory():
+    """
+    Memory of the calling process
+
+    Returns:
+    --------
+    dict with pid, peak_rss_mb (high-water resident memory, including
+    shared mapped pages) and private_mb (unique set size: memory that no
+    other process shares; None without psutil)
+    """
+    private_mb = None
+    if psutil is not None:
+        private_mb = psutil.Process().memory_full_info().uss / 2 ** 20
+    return {'pid': os.getpid(), 'peak_rss_mb': peak_rss_mb(), 'private_mb': private_mb}
+
+
+def memory_stats(reports, prefix):
+    """
+    Summarise worker_memory reports of several processes
+
+    The largest value per process is kept, then the maximum and mean over
+    processes are reported as ``<prefix>_peak_rss_mb_max``, ...
+    """
+    per_worker = {}
+    for report in reports:
+        current = per_worker.setdefault(report['pid'], dict(report))
+        for key in ('peak_rss_mb', 'private_mb'):
+            if report[key] is not None and (current[key] is None or report[key] > current[key]):
+                current[key] = report[key]
+
+    stats = {f'{prefix}_n_processes': len(per_worker)}
+    for key in ('peak_rss_mb', 'private_mb'):
+        values = [report[key] for report in per_worker.values() if report[key] is not None]
+        if values:
+            stats[f'{prefix}_{key}_max'] = float(np.max(values))
+            stats[f'{prefix}_{key}_mean'] = float(np.mean(values))
+    return stats
@@ -0,0 +1,258 @@
+"""
+Synthetic patient generator fitted to the Cleveland data
+
+``SyntheticPatientGenerator`` fits a Gaussian copula per class to
+``data/processed/heart_disease.csv``: each feature keeps its empirical
+marginal distribution and the features keep their rank correlations,
+which also preserves how the categorical codes co-occur. Missing values
+in ``ca``/``thal`` are reproduced at their per-class rates.
+
+Rows are generated in vectorized NumPy chunks, so any number of rows can
+be streamed to sharded CSV/Parquet files or fed to load generators. The
+output only depends on the seed (and the chunk size).
+
+Usage:
+    python src/synthetic.py --rows 10000000 --output data/synthetic --format parquet
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+import logging
+
+try:
+    from config import CONTINUOUS_FEATURES, DATASET_FILE, FEATURE_DTYPES, FEATURE_NAMES, TARGET_NAME
+except ImportError:  # imported as part of the ``src`` package
+    from src.config import CONTINUOUS_FEATURES, DATASET_FILE, FEATURE_DTYPES, FEATURE_NAMES, TARGET_NAME
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Decimal places kept for continuous features (integers elsewhere)
+DECIMALS = {'oldpeak': 1}
+
+
+def normal_scores(values):
+    """Map a column to standard normal scores by mid-rank (NaN stays NaN)"""
+    scores = np.full(len(values), np.nan)
+    present = ~np.isnan(values)
+    ranks = pd.Series(values[present]).rank(method='average').to_numpy()
+    scores[present] = ndtri((ranks - 0.5) / present.sum())
+    return scores
+
+
+def nearest_correlation(matrix, eps=1e-6):
+    """Clip eigenvalues so a pairwise correlation estimate is positive definite"""
+    matrix = np.nan_to_num((matrix + matrix.T) / 2)
+    np.fill_diagonal(matrix, 1.0)
+    eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+    matrix = eigenvectors @ np.diag(np.maximum(eigenvalues, eps)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(matrix))
+    return matrix / np.outer(scale, scale)
+
+
+class SyntheticPatientGenerator:
+    """
+    Per-class Gaussian copula over the 13 features
+
+    Attributes (per class, in ``self.classes``):
+        prior           class probability
+        quantiles       sorted observed values of each feature
+        cholesky        Cholesky factor of the normal-score correlation
+        missing_rate    probability each feature is missing
+    """
+
+    def __init__(self, feature_names=FEATURE_NAMES, continuous=CONTINUOUS_FEATURES):
+        self.feature_names = list(feature_names)
+        self.continuous = np.array([name in continuous for name in self.feature_names])
+        self.classes = {}
+
+    def fit(self, df):
+        """Fit the per-class copulas to a frame with features and target"""
+        counts = df[TARGET_NAME].value_counts()
+        for label, count in counts.sort_index().items():
+            X = df.loc[df[TARGET_NAME] == label, self.feature_names].astype('float64').to_numpy()
+            scores = np.column_stack([normal_scores(X[:, j]) for j in range(X.shape[1])])
+            correlation = nearest_correlation(pd.DataFrame(scores).corr().to_numpy())
+            self.classes[int(label)] = {
+                'prior': count / len(df),
+                'quantiles': [np.sort(X[~np.isnan(X[:, j]), j]) for j in range(X.shape[1])],
+                'cholesky': np.linalg.cholesky(correlation),
+                'missing_rate': np.isnan(X).mean(axis=0),
+            }
+        logger.info(f"Fitted synthetic generator on {len(df)} rows, classes {sorted(self.classes)}")
+        return self
+
+    @classmethod
+    def from_csv(cls, data_path=DATASET_FILE):
+        """Fit to the processed dataset CSV"""
+        return cls().fit(pd.read_csv(data_path))
+
+    def _sample_class(self, params, n_rows, rng, missing):
+        """Draw ``n_rows`` feature rows of one class"""
+        z = rng.standard_normal((n_rows, len(self.feature_names))) @ params['cholesky'].T
+        u = ndtr(z)
+        X = np.empty_like(u)
+        for j, observed in enumerate(params['quantiles']):
+            n = len(observed)
+            if self.continuous[j]:
+                # Interpolate between order statistics so values are not just resampled
+                X[:, j] = np.interp(u[:, j] * (n - 1), np.arange(n), observed)
+                X[:, j] = np.round(X[:, j], DECIMALS.get(self.feature_names[j], 0))
+            else:
+                X[:, j] = observed[np.minimum((u[:, j] * n).astype(np.int64), n - 1)]
+        if missing:
+            X[rng.random(X.shape) < params['missing_rate']] = np.nan
+        return X
+
+    def sample(self, n_rows, rng=None, missing=True):
+        """
+        Generate one chunk of rows
+
+        Parameters:
+        -----------
+        n_rows : int
+        rng : numpy Generator or int seed
+        missing : bool
+            Reproduce missing ``ca``/``thal`` values (False for API payloads,
+            which require every feature)
+
+        Returns:
+        --------
+        DataFrame with the feature columns and the target, in the compact
+        dtypes of config.FEATURE_DTYPES
+        """
+        rng = np.random.default_rng(rng)
+        labels = np.array(sorted(self.classes))
+        priors = np.array([self.classes[label]['prior'] for label in labels])
+        y = rng.choice(labels, size=n_rows, p=priors / priors.sum())
+
+        X = np.empty((n_rows, len(self.feature_names)))
+        for label in labels:
+            rows = np.flatnonzero(y == label)
+            X[rows] = self._sample_class(self.classes[label], len(rows), rng, missing)
+
+        df = pd.DataFrame(X, columns=self.feature_names)
+        for column in self.feature_names:
+            dtype = FEATURE_DTYPES.get(column, 'float32')
+            if np.dtype(str(dtype).lower()).kind != 'f' and df[column].isna().any():
+                dtype = 'UInt8' if str(dtype).lower() == 'uint8' else 'float32'
+            df[column] = df[column].astype(dtype)
+        df[TARGET_NAME] = y.astype('uint8')
+        return df
+
+    def iter_chunks(self, n_rows, chunk_size=100_000, seed=42, missing=True):
+        """Yield ``n_rows`` rows as DataFrames of at most ``chunk_size`` rows"""
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        seeds = seed.spawn(-(-n_rows // chunk_size))
+        for chunk_seed, start in zip(seeds, range(0, n_rows, chunk_size)):
+            yield self.sample(min(chunk_size, n_rows - start), np.random.default_rng(chunk_seed),
+                              missing=missing)
+
+    def iter_records(self, n_rows, chunk_size=10_000, seed=42):
+        """Yield API request payloads (feature dicts without the target)"""
+        integer = [name for name in self.feature_names if name not in DECIMALS]
+        for chunk in self.iter_chunks(n_rows, chunk_size=chunk_size, seed=seed, missing=False):
+            features = chunk[self.feature_names].astype('float64').round(DECIMALS)
+            for record in features.to_dict(orient='records'):
+                record.update({name: int(record[name]) for name in integer})
+                yield record
+
+    def write_shards(self, n_rows, output_dir, rows_per_shard=1_000_000, file_format='csv',
+                     chunk_size=100_000, seed=42):
+        """
+        Stream ``n_rows`` rows to ``part-00000.<format>`` shards
+
+        Returns:
+        --------
+        list of shard paths
+        """
+        if file_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unknown file format: {file_format}")
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        chunk_size = min(chunk_size, rows_per_shard)
+
+        paths = []
+        seeds = np.random.SeedSequence(seed).spawn(-(-n_rows // rows_per_shard))
+        for shard, (shard_seed, start) in enumerate(zip(seeds, range(0, n_rows, rows_per_shard))):
+            path = output_dir / f"part-{shard:05d}.{file_format}"
+            chunks = self.iter_chunks(min(rows_per_shard, n_rows - start), chunk_size=chunk_size,
+                                      seed=shard_seed)
+            if file_format == 'csv':
+                for i, chunk in enumerate(chunks):
+                    chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                writer = None
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+                writer.close()
+            paths.append(path)
+            logger.info(f"Wrote {path}")
+        return paths
+
+    def to_dict(self):
+        """JSON-serializable fitted parameters"""
+        return {
+            'feature_names': self.feature_names,
+            'continuous': self.continuous.tolist(),
+            'classes': {
+                str(label): {
+                    'prior': params['prior'],
+                    'quantiles': [values.tolist() for values in params['quantiles']],
+                    'cholesky': params['cholesky'].tolist(),
+                    'missing_rate': params['missing_rate'].tolist(),
+                }
+                for label, params in self.classes.items()
+            },
+        }
+
+    def save(self, filepath):
+        Path(filepath).write_text(json.dumps(self.to_dict()))
+
+    @classmethod
+    def load(cls, filepath):
+        state = json.loads(Path(filepath).read_text())
+        generator = cls(state['feature_names'])
+        generator.continuous = np.array(state['continuous'])
+        generator.classes = {
+            int(label): {
+                'prior': params['prior'],
+                'quantiles': [np.array(values) for values in params['quantiles']],
+                'cholesky': np.array(params['cholesky']),
+                'missing_rate': np.array(params['missing_rate']),
+            }
+            for label, params in state['classes'].items()
+        }
+        return generator
+
+
+def main():
+    """Command line interface to write sharded synthetic datasets"""
+    parser = argparse.ArgumentParser(description="Generate synthetic heart disease patients")
+    parser.add_argument('--rows', type=int, required=True, help="number of rows to generate")
+    parser.add_argument('--output', type=Path, required=True, help="output directory")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--rows-per-shard', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data', type=Path, default=DATASET_FILE, help="CSV to fit")
+    args = parser.parse_args()
+
+    generator = SyntheticPatientGenerator.from_csv(args.data)
+    paths = generator.write_shards(args.rows, args.output, rows_per_shard=args.rows_per_shard,
+                                   file_format=args.format, seed=args.seed)
+    print(f"{args.rows:,} rows written to {len(paths)} shards in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""
+Buffered, asynchronous MLflow logging
+
+``start_run`` returns a ``RunLogger`` that collects params, metrics and tags
+in memory and writes them with ``MlflowClient.log_batch``. Every backend
+call (batches, artifact and model uploads, run termination) runs on one
+background thread in submission order, so training code never waits on the
+tracking server. Runs are created on a separate background thread; training
+waits at most ``CREATE_RUN_TIMEOUT`` seconds for the server's run id
+before continuing offline. Operations that fail, including creating the
+run when the server is unreachable or slow, are appended to a local spool
+and replayed later by ``sync_spool``.
+
+Usage:
+    python src/tracking.py list
+    python src/tracking.py sync
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import mlflow
+import mlflow.sklearn
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIR = Path(os.getenv(
+    "MLFLOW_SPOOL_DIR", Path(__file__).parent.parent / "mlflow_spool"
+))
+OFFLINE_PREFIX = "offline-"
+
+# log_batch limits of the MLflow tracking API
+MAX_BATCH_METRICS = 1000
+MAX_BATCH_PARAMS = 100
+MAX_BATCH_TAGS = 100
+
+# Seconds start_run waits for the server to create a run before going offline,
+# and seconds after a failed or slow creation during which runs start offline
+# straight away instead of waiting again
+CREATE_RUN_TIMEOUT = float(os.getenv("MLFLOW_CREATE_RUN_TIMEOUT", 5))
+OFFLINE_BACKOFF = float(os.getenv("MLFLOW_OFFLINE_BACKOFF", 60))
+
+# One worker keeps every backend operation in submission order. Its queue is
+# drained at interpreter exit, so queued uploads are not lost. Runs are
+# created on their own worker, so creation never waits behind uploads.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mlflow-logger")
+_creator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mlflow-create-run")
+_spool_lock = threading.Lock()
+_experiment_ids = {}
+# Tracking URI -> time until which runs start offline
+_offline_until = {}
+
+
+def wait():
+    """Block until every queued logging operation has been sent or spooled"""
+    _executor.submit(lambda: None).result()
+
+
+def _experiment_id(client, experiment_name):
+    """Look up (or create) an experiment id, cached per process"""
+    if experiment_name not in _experiment_ids:
+        experiment = client.get_experiment_by_name(experiment_name)
+        if experiment is not None:
+            _experiment_ids[experiment_name] = experiment.experiment_id
+        else:
+            _experiment_ids[experiment_name] = client.create_experiment(experiment_name)
+    return _experiment_ids[experiment_name]
+
+
+class RunLogger:
+    """
+    Buffered logger for one MLflow run
+
+    Metrics, params and tags are buffered until ``flush`` (called
+    automatically once ``batch_size`` metrics are pending and on ``end``).
+    Artifact and model uploads are queued on the background thread.
+    """
+
+    def __init__(self, run_id, client=None, spool_dir=DEFAULT_SPOOL_DIR, batch_size=MAX_BATCH_METRICS):
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self.spool_dir = Path(spool_dir)
+        self.batch_size = batch_size
+        # Once an operation is spooled, later ones follow it to keep their order
+        self.offline = run_id.startswith(OFFLINE_PREFIX)
+        self._metrics = []
+        self._params = {}
+        self._tags = {}
+
+    def log_params(self, params):
+        self._params.update({key: str(value) for key, value in params.items()})
+
+    def set_tags(self, tags):
+        self._tags.update({key: str(value) for key, value in tags.items()})
+
+    def set_tag(self, key, value):
+        self.set_tags({key: value})
+
+    def log_metrics(self, metrics, step=0, timestamp=None):
+        """Buffer metrics; ``timestamp`` is in seconds (default: now)"""
+        timestamp = int((time.time() if timestamp is None else timestamp) * 1000)
+        self._metrics.extend(
+            Metric(key, float(value), timestamp, step) for key, value in metrics.items()
+        )
+        if len(self._metrics) >= self.batch_size:
+            self.flush()
+
+    def log_metric(self, key, value, step=0):
+        self.log_metrics({key: value}, step=step)
+
+    def flush(self):
+        """Queue the buffered metrics, params and tags as one batch operation"""
+        if not (self._metrics or self._params or self._tags):
+            return
+        op = {
+            'op': 'log_batch',
+            'metrics': [[m.key, m.value, m.timestamp, m.step] for m in self._metrics],
+            'params': self._params,
+            'tags': self._tags,
+        }
+        self._metrics, self._params, self._tags = [], {}, {}
+        self._submit(op)
+
+    def log_artifacts(self, local_dir, artifact_path=None, move=False):
+        """
+        Queue a directory upload
+
+        With ``move=True`` the directory is owned by the logger and removed
+        once uploaded; otherwise it is copied first, so the caller may
+        delete or change it immediately.
+        """
+        if not move:
+            staged = Path(tempfile.mkdtemp(prefix="mlflow_artifacts_"))
+            shutil.copytree(local_dir, staged, dirs_exist_ok=True)
+            local_dir = staged
+        self._submit({'op': 'log_artifacts', 'local_dir': str(local_dir),
+                      'artifact_path': artifact_path})
+
+    def log_dict(self, dictionary, artifact_file):
+        """Queue a JSON artifact"""
+        staged = Path(tempfile.mkdtemp(prefix="mlflow_artifacts_"))
+        (staged / artifact_file).write_text(json.dumps(dictionary, indent=2))
+        self.log_artifacts(staged, move=True)
+
+    def log_model(self, model, artifact_path="model"):
+        """Serialize a scikit-learn model locally and queue its upload"""
+        staged = Path(tempfile.mkdtemp(prefix="mlflow_model_"))
+        mlflow.sklearn.save_model(model, str(staged / artifact_path))
+        self.log_artifacts(staged / artifact_path, artifact_path=artifact_path, move=True)
+
+    def end(self, status="FINISHED"):
+        """Flush and queue run termination; does not wait for the backend"""
+        self.flush()
+        self._submit({'op': 'set_terminated', 'status': status,
+                      'end_time': int(time.time() * 1000)})
+
+    def _submit(self, op):
+        _executor.submit(self._execute, op)
+
+    def _execute(self, op):
+        """Send one operation to the backend, spooling it on failure (background thread)"""
+        if not self.offline:
+            try:
+                _apply(self.client, self.run_id, op)
+                if op['op'] == 'log_artifacts':
+                    shutil.rmtree(op['local_dir'], ignore_errors=True)
+                return
+            except Exception as e:
+                logger.warning(f"MLflow {op['op']} failed for run {self.run_id} ({e}); "
+                               f"spooling to {self.spool_dir}")
+                self.offline = True
+        spool_op(self.spool_dir, self.run_id, op)
+
+
+def _apply(client, run_id, op):
+    """Perform one spool operation against the tracking backend"""
+    if op['op'] == 'log_batch':
+        metrics = [Metric(*values) for values in op['metrics']]
+        params = [Param(key, value) for key, value in op['params'].items()]
+        tags = [RunTag(key, value) for key, value in op['tags'].items()]
+        n_chunks = max(-(-len(metrics) // MAX_BATCH_METRICS), -(-len(params) // MAX_BATCH_PARAMS),
+                       -(-len(tags) // MAX_BATCH_TAGS), 1)
+        for chunk in range(n_chunks):
+            client.log_batch(
+                run_id,
+                metrics=metrics[chunk * MAX_BATCH_METRICS:(chunk + 1) * MAX_BATCH_METRICS],
+                params=params[chunk * MAX_BATCH_PARAMS:(chunk + 1) * MAX_BATCH_PARAMS],
+                tags=tags[chunk * MAX_BATCH_TAGS:(chunk + 1) * MAX_BATCH_TAGS],
+            )
+    elif op['op'] == 'log_artifacts':
+        client.log_artifacts(run_id, op['local_dir'], op.get('artifact_path'))
+    elif op['op'] == 'set_terminated':
+        client.set_terminated(run_id, op['status'], op['end_time'])
+    else:
+        raise ValueError(f"Unknown spool operation: {op['op']}")
+
+
+def spool_op(spool_dir, run_id, op):
+    """Append an operation to the run's spool file, moving any artifacts into the spool"""
+    run_dir = Path(spool_dir) / run_id
+    with _spool_lock:
+        run_dir.mkdir(parents=True, exist_ok=True)
+        if op['op'] == 'log_artifacts':
+            target = run_dir / f"artifacts_{uuid.uuid4().hex[:8]}"
+            shutil.move(op['local_dir'], target)
+            op = {**op, 'local_dir': str(target)}
+        with open(run_dir / "ops.jsonl", 'a') as f:
+            f.write(json.dumps(op) + "\n")
+
+
+def _create_run(client, experiment_name, run_name, tags):
+    return client.create_run(
+        _experiment_id(client, experiment_name), run_name=run_name, tags=tags
+    ).info.run_id
+
+
+def _abandon(future, client):
+    """Terminate a run the server created after start_run had given up on it"""
+    def terminate(done):
+        if done.exception() is None:
+            try:
+                client.set_terminated(done.result(), "KILLED")
+            except Exception:
+                pass
+    future.add_done_callback(terminate)
+
+
+def _online_run_id(client, experiment_name, run_name, tags):
+    """
+    Server run id, or None when the server does not answer within CREATE_RUN_TIMEOUT
+
+    The request runs on the creator thread, so MLflow's HTTP retries and
+    backoff never hold up the caller for longer than the timeout.
+    """
+    uri = getattr(client, 'tracking_uri', None)
+    server = uri if isinstance(uri, str) else id(client)
+    if time.time() < _offline_until.get(server, 0):
+        return None
+    future = _creator.submit(_create_run, client, experiment_name, run_name, tags)
+    try:
+        return future.result(timeout=CREATE_RUN_TIMEOUT)
+    except Exception as e:
+        reason = str(e) if future.done() else f"no answer within {CREATE_RUN_TIMEOUT:g}s"
+        logger.warning(f"MLflow unavailable ({reason}); starting runs offline for "
+                       f"{OFFLINE_BACKOFF:g}s")
+        _offline_until[server] = time.time() + OFFLINE_BACKOFF
+        _abandon(future, client)
+        return None
+
+
+@contextlib.contextmanager
+def start_run(run_name, experiment_name, tags=None, client=None, spool_dir=DEFAULT_SPOOL_DIR):
+    """
+    Create an MLflow run and yield its RunLogger
+
+    If the tracking backend is unreachable or does not create the run
+    within CREATE_RUN_TIMEOUT seconds, the run gets a local ``offline-`` id
+    and everything, including its creation, is spooled. The run is ended
+    FINISHED, or FAILED if the block raises.
+    """
+    client = client or MlflowClient()
+    tags = {**(tags or {}), 'mlflow.runName': run_name}
+    run_id = _online_run_id(client, experiment_name, run_name, tags)
+    if run_id is None:
+        run_id = f"{OFFLINE_PREFIX}{uuid.uuid4().hex}"
+        logger.warning(f"Logging run {run_name} offline as {run_id}")
+        spool_op(spool_dir, run_id, {
+            'op': 'create_run', 'experiment_name': experiment_name, 'run_name': run_name,
+            'tags': tags, 'start_time': int(time.time() * 1000),
+        })
+
+    run = RunLogger(run_id, client=client, spool_dir=spool_dir)
+    try:
+        yield run
+    except BaseException:
+        run.end(status="FAILED")
+        raise
+    run.end()
+
+
+def spooled_runs(spool_dir=DEFAULT_SPOOL_DIR):
+    """Spooled run ids with their number of pending operations"""
+    spool_dir = Path(spool_dir)
+    if not spool_dir.exists():
+        return {}
+    return {
+        ops_file.parent.name: sum(1 for _ in open(ops_file))
+        for ops_file in sorted(spool_dir.glob("*/ops.jsonl"))
+    }
+
+
+def sync_spool(spool_dir=DEFAULT_SPOOL_DIR, client=None):
+    """
+    Replay spooled operations against the tracking backend
+
+    Offline runs are created first. A run's spool is removed once all its
+    operations succeed; on failure the remaining operations are kept.
+
+    Returns:
+    --------
+    dict of spooled run id -> backend run id, for the runs fully synced
+    """
+    wait()
+    client = client or MlflowClient()
+    synced = {}
+    for spooled_id in spooled_runs(spool_dir):
+        run_dir = Path(spool_dir) / spooled_id
+        ops = [json.loads(line) for line in open(run_dir / "ops.jsonl")]
+        run_id = None if spooled_id.startswith(OFFLINE_PREFIX) else spooled_id
+
+        done = 0
+        try:
+            for op in ops:
+                if op['op'] == 'create_run':
+                    run_id = client.create_run(
+                        _experiment_id(client, op['experiment_name']), run_name=op['run_name'],
+                        tags=op['tags'], start_time=op['start_time']
+                    ).info.run_id
+                else:
+                    _apply(client, run_id, op)
+                done += 1
+        except Exception as e:
+            logger.warning(f"Sync of {spooled_id} stopped after {done}/{len(ops)} operations: {e}")
+            remaining = ops[done:]
+            if ops[0]['op'] == 'create_run' and done > 0:
+                # Keep the created run; later syncs continue in it
+                new_dir = Path(spool_dir) / run_id
+                run_dir.rename(new_dir)
+                run_dir = new_dir
+            (run_dir / "ops.jsonl").write_text("".join(json.dumps(op) + "\n" for op in remaining))
+            continue
+
+        shutil.rmtree(run_dir, ignore_errors=True)
+        synced[spooled_id] = run_id
+        logger.info(f"Synced {len(ops)} spooled operations of {spooled_id} to run {run_id}")
+    return synced
+
+
+def main():
+    """Command line interface to list or sync the offline spool"""
+    parser = argparse.ArgumentParser(description="Manage the offline MLflow logging spool")
+    parser.add_argument('--spool-dir', default=str(DEFAULT_SPOOL_DIR))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help="List spooled runs")
+    subparsers.add_parser('sync', help="Replay spooled runs to the tracking server")
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        runs = spooled_runs(args.spool_dir)
+        for run_id, n_ops in runs.items():
+            print(f"{run_id:<48}{n_ops:>6} operations")
+        print(f"\n{len(runs)} spooled runs in {args.spool_dir}")
+    else:
+        synced = sync_spool(args.spool_dir)
+        for spooled_id, run_id in synced.items():
+            print(f"Synced {spooled_id} -> {run_id}")
+        print(f"\n{len(synced)} runs synced, {len(spooled_runs(args.spool_dir))} still spooled")
+
+
+if __name__ == "__main__":
+    main()
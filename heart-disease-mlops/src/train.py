@@ -4,8 +4,14 @@ Model training module with MLflow tracking
 import numpy as np
 import pandas as pd
 from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.model_selection import cross_val_score, GridSearchCV
+from sklearn.ensemble import (
+    RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
+)
+from sklearn.inspection import permutation_importance
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.model_selection import (
+    cross_validate, GridSearchCV, StratifiedKFold
+)
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
     roc_auc_score, confusion_matrix, classification_report, roc_curve
@@ -13,53 +19,295 @@ from sklearn.metrics import (
 import mlflow
 import mlflow.sklearn
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import contextlib
+import copy
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
 import joblib
 import logging
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+try:
+    from artifacts import save_artifacts
+    from backends import fanout_stats, make_backend
+    from model_compression import candidate_oof_proba, compress
+    from phases import PhaseRecorder, maybe_phase
+    from config import COMPRESSION_AUC_TOLERANCE
+    from plots import PlotJob, render_plot
+    from profiling import profile_model
+    from search import BayesianSearch, SuccessiveHalvingSearch, TrialLog
+    from shared_data import memmap_data, memory_stats, resolve, share, worker_memory
+    from tracking import RunLogger, start_run, wait as wait_for_tracking
+except ImportError:  # imported as part of the ``src`` package
+    from src.artifacts import save_artifacts
+    from src.backends import fanout_stats, make_backend
+    from src.model_compression import candidate_oof_proba, compress
+    from src.phases import PhaseRecorder, maybe_phase
+    from src.config import COMPRESSION_AUC_TOLERANCE
+    from src.plots import PlotJob, render_plot
+    from src.profiling import profile_model
+    from src.search import BayesianSearch, SuccessiveHalvingSearch, TrialLog
+    from src.shared_data import memmap_data, memory_stats, resolve, share, worker_memory
+    from src.tracking import RunLogger, start_run, wait as wait_for_tracking
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default hyperparameters per model family
+DEFAULT_PARAMS = {
+    'logistic_regression': {
+        'max_iter': 1000,
+        'random_state': 42,
+        'solver': 'lbfgs'
+    },
+    'random_forest': {
+        'n_estimators': 100,
+        'max_depth': 10,
+        'min_samples_split': 5,
+        'min_samples_leaf': 2,
+        'random_state': 42,
+        'n_jobs': -1
+    },
+    'gradient_boosting': {
+        'n_estimators': 100,
+        'learning_rate': 0.1,
+        'max_depth': 5,
+        'min_samples_split': 5,
+        'min_samples_leaf': 2,
+        'random_state': 42
+    },
+    'hist_gradient_boosting': {
+        'max_iter': 100,
+        'learning_rate': 0.1,
+        'max_leaf_nodes': 31,
+        'min_samples_leaf': 20,
+        'early_stopping': True,
+        'validation_fraction': 0.1,
+        'n_iter_no_change': 10,
+        'random_state': 42
+    },
+}
+
+# ModelTrainer method training each family
+MODEL_FAMILIES = {
+    'logistic_regression': 'train_logistic_regression',
+    'random_forest': 'train_random_forest',
+    'gradient_boosting': 'train_gradient_boosting',
+    'hist_gradient_boosting': 'train_gradient_boosting',
+}
+
+# Extra keyword arguments for families sharing a ModelTrainer method
+FAMILY_OPTIONS = {
+    'hist_gradient_boosting': {'engine': 'hist'},
+}
+
+# Gradient boosting engines: exact (GradientBoostingClassifier, single-threaded,
+# sorts every feature at every split) or histogram-binned (multi-threaded,
+# NaN-aware, early stopping on a validation split)
+BOOSTING_ENGINES = {
+    'exact': ('gradient_boosting', GradientBoostingClassifier, "Gradient_Boosting"),
+    'hist': ('hist_gradient_boosting', HistGradientBoostingClassifier, "Hist_Gradient_Boosting"),
+}
+
+# Trees / boosting stages added per incremental retrain by default
+DEFAULT_NEW_ESTIMATORS = 20
+
+# Rows of the test split used for permutation importances of models
+# without feature_importances_
+PERMUTATION_SAMPLE_SIZE = 2000
+
+# Families whose estimator parallelises internally through n_jobs
+N_JOBS_FAMILIES = {'random_forest'}
+
+# Budgeted alternatives to the exhaustive grid in hyperparameter_tuning
+SEARCH_ENGINES = {
+    'grid': GridSearchCV,
+    'halving': SuccessiveHalvingSearch,
+    'bayes': BayesianSearch,
+}
+
 
 class ModelTrainer:
     """
     Model training class with MLflow integration
     """
     
-    def __init__(self, experiment_name="heart_disease_prediction"):
-        """Initialize trainer with MLflow experiment"""
-        mlflow.set_experiment(experiment_name)
+    def __init__(self, experiment_name="heart_disease_prediction", evaluation='holdout',
+                 cv_folds=5, cv_n_jobs=None, reuse_fold_estimators=False, render_plots=True,
+                 profile_inference=False, dataset_version=None, backend=None, memmap_dir=None,
+                 profile_phases=None):
+        """
+        Initialize trainer with MLflow experiment
+        
+        Parameters:
+        -----------
+        evaluation : {'holdout', 'cv'}
+            'holdout' scores the test split and runs a separate accuracy-only
+            cross-validation. 'cv' runs one parallel cross-validation pass,
+            keeps the out-of-fold probabilities and derives every metric and
+            the confusion matrix / ROC plots from them.
+        cv_folds : int
+            Number of stratified folds
+        cv_n_jobs : int, optional
+            Parallel fold fits of cross-validation (default: the backend's
+            n_jobs). Applied through the backend context, not passed to
+            sklearn, so the backend's parallel_config decides where they run.
+        reuse_fold_estimators : bool
+            In 'cv' mode, return a FoldEnsembleClassifier built from the fold
+            estimators instead of refitting on the full training set
+        render_plots : bool
+            Capture confusion matrix, ROC and feature importance data for
+            rendering by render_pending_plots(). False skips plots entirely.
+        profile_inference : bool
+            Also measure serving cost (single-row p50/p99 latency, batch
+            throughput, artifact size, load time and memory, see
+            profiling.profile_model) and log it with the quality metrics
+        dataset_version : str, optional
+            Version ID of the training data (see manifest.dataset_version),
+            set as the ``dataset_version`` tag of every run
+        backend : str or backends.ExecutionBackend, optional
+            Where cross-validation and search fits run: 'loky' (default,
+            local processes), 'threading', 'sequential' or 'dask' (a
+            dask.distributed cluster, or a LocalCluster stand-in). The
+            training arrays are shipped to the workers once per call, and
+            fan-out / straggler statistics are logged with each run.
+            Worker memory is sampled once per trainer, on its first
+            cross-validation, and logged with every run after that.
+        memmap_dir : str or Path, optional
+            Write training matrices that are not already memory-mapped
+            (see prepare_data(memmap_dir=...)) to .npy files here, so every
+            worker process maps one shared copy instead of unpickling its
+            own. Files are named by content hash, so later runs on the same
+            data reuse them (see shared_data). Peak and private memory of
+            the worker processes is logged either way.
+        profile_phases : list of str, optional
+            Phases (e.g. 'fit', 'cv', 'log_model') to capture with cProfile.
+            Every training run records the wall time, CPU time and peak
+            memory of its phases (see phases.PhaseRecorder), logs them as
+            phase_* metrics and a phases.json artifact, and uploads the
+            cProfile captures under profiles/.
+        """
+        if evaluation not in ('holdout', 'cv'):
+            raise ValueError(f"Unknown evaluation mode: {evaluation}")
+        try:
+            # Only needed by hyperparameter_tuning; train_* runs log through tracking.start_run
+            mlflow.set_experiment(experiment_name)
+        except Exception as e:
+            logger.warning(f"Could not set MLflow experiment ({e}); runs will be spooled offline")
         self.experiment_name = experiment_name
+        self.evaluation = evaluation
+        self.cv_folds = cv_folds
+        self.cv_n_jobs = cv_n_jobs
+        self.reuse_fold_estimators = reuse_fold_estimators
+        self.render_plots = render_plots
+        self.profile_inference = profile_inference
+        self.dataset_version = dataset_version
+        self.backend = make_backend(backend)
+        self.memmap_dir = memmap_dir
+        self._memmapped = []
+        self._cv_worker_memory = None
+        self.profile_phases = list(profile_phases or [])
+        self.phases = None
+        self.pending_plots = []
+        self._run = None
         logger.info(f"MLflow experiment: {experiment_name}")
+    
+    def _options(self, **overrides):
+        """Constructor arguments, used to rebuild this trainer in worker processes"""
+        options = {
+            'experiment_name': self.experiment_name,
+            'evaluation': self.evaluation,
+            'cv_folds': self.cv_folds,
+            'cv_n_jobs': self.cv_n_jobs,
+            'reuse_fold_estimators': self.reuse_fold_estimators,
+            'render_plots': self.render_plots,
+            'profile_inference': self.profile_inference,
+            'dataset_version': self.dataset_version,
+            'backend': self.backend,
+            'memmap_dir': self.memmap_dir,
+            'profile_phases': self.profile_phases,
+        }
+        options.update(overrides)
+        return options
+    
+    def _shared(self, *arrays):
+        """
+        Memory-mapped versions of ``arrays`` when memmap_dir is set
+        
+        Each distinct set of arrays is written once per trainer, so the
+        models and searches trained on it reuse the same files.
+        """
+        if self.memmap_dir is None:
+            return arrays
+        for originals, shared in self._memmapped:
+            if len(originals) == len(arrays) and all(a is b for a, b in zip(originals, arrays)):
+                return shared
+        shared = tuple(memmap_data(self.memmap_dir, *arrays))
+        self._memmapped.append((arrays, shared))
+        return shared
+    
+    @contextlib.contextmanager
+    def _start_run(self, run_name):
+        """Start a training run whose phases are recorded and logged when it ends"""
+        self.phases = PhaseRecorder(run_name, profile_phases=self.profile_phases)
+        with start_run(run_name, self.experiment_name, tags=self._run_tags()) as run:
+            self._run = run
+            yield run
+            self.log_phases(self.phases, run)
+    
+    def log_phases(self, recorder, run=None):
+        """
+        Log a PhaseRecorder to a run: phase_* metrics, phases.json and cProfile captures
+        
+        Without ``run`` a "Phases_<root name>" run is created, e.g. for the
+        recorder passed to prepare_data.
+        """
+        if run is None:
+            with start_run(f"Phases_{recorder.root.name}", self.experiment_name,
+                           tags=self._run_tags()) as run:
+                return self.log_phases(recorder, run)
+        recorder.finish()
+        run.log_metrics(recorder.metrics())
+        run.log_dict(recorder.to_dict(), 'phases.json')
+        if recorder.profiles:
+            profile_dir = Path(tempfile.mkdtemp(prefix="phase_profiles_"))
+            recorder.write_profiles(profile_dir)
+            run.log_artifacts(profile_dir, artifact_path='profiles', move=True)
+        logger.info(f"Phases of {recorder.root.name}:\n{recorder.summary()}")
+        return recorder
+    
+    def _run_tags(self):
+        """Tags set on every MLflow run of this trainer"""
+        if self.dataset_version is None:
+            return {}
+        return {'dataset_version': self.dataset_version}
         
     def train_logistic_regression(self, X_train, y_train, X_test, y_test, params=None):
         """Train Logistic Regression model"""
         if params is None:
-            params = {
-                'max_iter': 1000,
-                'random_state': 42,
-                'solver': 'lbfgs'
-            }
+            params = dict(DEFAULT_PARAMS['logistic_regression'])
         
-        with mlflow.start_run(run_name="Logistic_Regression"):
+        with self._start_run("Logistic_Regression") as run:
             # Log parameters
-            mlflow.log_params(params)
+            run.log_params(params)
             
-            # Train model
+            # Train and evaluate model
             logger.info("Training Logistic Regression...")
-            model = LogisticRegression(**params)
-            model.fit(X_train, y_train)
+            model, metrics = self._fit_and_evaluate(
+                LogisticRegression(**params), X_train, y_train, X_test, y_test
+            )
             
-            # Evaluate
-            metrics = self._evaluate_model(model, X_train, y_train, X_test, y_test)
+            # Log metrics (buffered and sent as one batch when the run ends)
+            run.log_metrics(metrics)
             
-            # Log metrics
-            for metric_name, metric_value in metrics.items():
-                mlflow.log_metric(metric_name, metric_value)
-            
-            # Log model
-            mlflow.sklearn.log_model(model, "model")
+            # Log model (uploaded in the background)
+            with self.phases.phase('log_model'):
+                run.log_model(model, "model")
             
             logger.info("Logistic Regression training complete!")
             return model, metrics
@@ -67,78 +315,225 @@ class ModelTrainer:
     def train_random_forest(self, X_train, y_train, X_test, y_test, params=None):
         """Train Random Forest model"""
         if params is None:
-            params = {
-                'n_estimators': 100,
-                'max_depth': 10,
-                'min_samples_split': 5,
-                'min_samples_leaf': 2,
-                'random_state': 42,
-                'n_jobs': -1
-            }
-        
-        with mlflow.start_run(run_name="Random_Forest"):
+            params = dict(DEFAULT_PARAMS['random_forest'])
+        
+        with self._start_run("Random_Forest") as run:
             # Log parameters
-            mlflow.log_params(params)
+            run.log_params(params)
             
-            # Train model
+            # Train and evaluate model
             logger.info("Training Random Forest...")
-            model = RandomForestClassifier(**params)
-            model.fit(X_train, y_train)
+            model, metrics = self._fit_and_evaluate(
+                RandomForestClassifier(**params), X_train, y_train, X_test, y_test
+            )
             
-            # Evaluate
-            metrics = self._evaluate_model(model, X_train, y_train, X_test, y_test)
-            
-            # Log metrics
-            for metric_name, metric_value in metrics.items():
-                mlflow.log_metric(metric_name, metric_value)
+            # Log metrics (buffered and sent as one batch when the run ends)
+            run.log_metrics(metrics)
             
             # Log feature importances
             self._log_feature_importances(model, X_train.columns)
             
-            # Log model
-            mlflow.sklearn.log_model(model, "model")
+            # Log model (uploaded in the background)
+            with self.phases.phase('log_model'):
+                run.log_model(model, "model")
             
             logger.info("Random Forest training complete!")
             return model, metrics
     
-    def train_gradient_boosting(self, X_train, y_train, X_test, y_test, params=None):
-        """Train Gradient Boosting model"""
+    def train_gradient_boosting(self, X_train, y_train, X_test, y_test, params=None,
+                                engine='exact'):
+        """
+        Train Gradient Boosting model
+        
+        Parameters:
+        -----------
+        engine : {'exact', 'hist'}
+            'exact' fits GradientBoostingClassifier. 'hist' fits
+            HistGradientBoostingClassifier, which bins features into
+            histograms, uses all cores, accepts NaN (so the preprocessor can
+            skip imputation, see HeartDiseasePreprocessor(impute=False)) and
+            stops early on a held-out validation fraction. Use it for large
+            training sets.
+        """
+        if engine not in BOOSTING_ENGINES:
+            raise ValueError(f"Unknown gradient boosting engine: {engine}")
+        family, estimator_class, run_name = BOOSTING_ENGINES[engine]
         if params is None:
-            params = {
-                'n_estimators': 100,
-                'learning_rate': 0.1,
-                'max_depth': 5,
-                'min_samples_split': 5,
-                'min_samples_leaf': 2,
-                'random_state': 42
-            }
-        
-        with mlflow.start_run(run_name="Gradient_Boosting"):
+            params = dict(DEFAULT_PARAMS[family])
+        
+        with self._start_run(run_name) as run:
             # Log parameters
-            mlflow.log_params(params)
+            run.log_params(params)
+            run.set_tag('engine', engine)
             
-            # Train model
-            logger.info("Training Gradient Boosting...")
-            model = GradientBoostingClassifier(**params)
-            model.fit(X_train, y_train)
+            # Train and evaluate model
+            logger.info(f"Training Gradient Boosting ({engine} engine)...")
+            model, metrics = self._fit_and_evaluate(
+                estimator_class(**params), X_train, y_train, X_test, y_test
+            )
+            if hasattr(model, 'n_iter_'):
+                # Boosting iterations actually run (fewer when stopped early)
+                metrics['n_iter'] = model.n_iter_
             
-            # Evaluate
-            metrics = self._evaluate_model(model, X_train, y_train, X_test, y_test)
-            
-            # Log metrics
-            for metric_name, metric_value in metrics.items():
-                mlflow.log_metric(metric_name, metric_value)
+            # Log metrics (buffered and sent as one batch when the run ends)
+            run.log_metrics(metrics)
             
             # Log feature importances
-            self._log_feature_importances(model, X_train.columns)
+            self._log_feature_importances(model, X_train.columns, X_test, y_test)
             
-            # Log model
-            mlflow.sklearn.log_model(model, "model")
+            # Log model (uploaded in the background)
+            with self.phases.phase('log_model'):
+                run.log_model(model, "model")
             
             logger.info("Gradient Boosting training complete!")
             return model, metrics
     
-    def _evaluate_model(self, model, X_train, y_train, X_test, y_test):
+    def train_all(self, X_train, y_train, X_test, y_test, families=None, params=None,
+                  n_workers=None, cpu_budget=None):
+        """
+        Train several model families concurrently, one process per family
+        
+        Parameters:
+        -----------
+        families : list of str, optional
+            Keys of MODEL_FAMILIES to train (default: all of them)
+        params : dict, optional
+            Per-family parameter overrides, e.g. {'random_forest': {'n_estimators': 200}}
+        n_workers : int, optional
+            Number of families trained at once (default: min(families, cpu_budget)).
+            With n_workers=1 the families are trained sequentially in this process.
+        cpu_budget : int, optional
+            Total cores to use (default: os.cpu_count()). Each family gets
+            cpu_budget // n_workers cores, passed as n_jobs to families that
+            support it.
+        
+        With profile_inference, the trained models are profiled one at a
+        time once every family has finished, so serving latencies are not
+        measured under contention from sibling fits; the measurements are
+        logged to each family's run.
+        
+        Returns:
+        --------
+        results : dict of family -> (model, metrics)
+        comparison : DataFrame of metrics per family, best oof_roc_auc first
+            (best test_roc_auc first when there is no OOF column, i.e. with
+            evaluation='holdout')
+        """
+        families = list(families or MODEL_FAMILIES)
+        unknown = set(families) - set(MODEL_FAMILIES)
+        if unknown:
+            raise ValueError(f"Unknown model families: {sorted(unknown)}")
+        params = params or {}
+        
+        cpu_budget = cpu_budget or os.cpu_count() or 1
+        n_workers = max(1, min(n_workers or cpu_budget, len(families), cpu_budget))
+        jobs_per_model = max(1, cpu_budget // n_workers)
+        logger.info(f"Training {len(families)} model families with {n_workers} workers "
+                    f"x {jobs_per_model} cores")
+        
+        family_params = {}
+        for family in families:
+            family_params[family] = {**DEFAULT_PARAMS[family], **params.get(family, {})}
+            if family in N_JOBS_FAMILIES:
+                family_params[family]['n_jobs'] = jobs_per_model
+        
+        # Memory-mapped matrices travel to the workers as file references
+        X_train, y_train, X_test, y_test = self._shared(X_train, y_train, X_test, y_test)
+        data = [share(X_train), share(y_train), share(X_test), share(y_test)]
+        
+        if self.backend.name == 'dask' and n_workers > 1:
+            # One cluster for every family process (see ExecutionBackend.__getstate__)
+            self.backend.client
+        options = self._options(cv_n_jobs=jobs_per_model, profile_inference=False)
+        tasks = [
+            (options, mlflow.get_tracking_uri(), family, *data, family_params[family])
+            for family in families
+        ]
+        
+        if n_workers == 1:
+            outputs = [_train_family(*task) for task in tasks]
+        else:
+            # spawn avoids forking MLflow/SQLAlchemy connections and BLAS thread pools
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as executor:
+                outputs = list(executor.map(_train_family, *zip(*tasks)))
+        
+        results = {}
+        rows = {}
+        for family, (model, metrics, fit_seconds, plot_jobs, memory, run_id) in zip(families, outputs):
+            if self.profile_inference:
+                logger.info(f"Profiling {family} inference")
+                profile = profile_model(model, X_test)
+                metrics.update(profile)
+                run_logger = RunLogger(run_id)
+                run_logger.log_metrics(profile)
+                run_logger.flush()
+            results[family] = (model, metrics)
+            rows[family] = {**metrics, 'train_seconds': fit_seconds,
+                            'worker_peak_rss_mb': memory['peak_rss_mb'],
+                            'worker_private_mb': memory['private_mb']}
+            self.pending_plots.extend(plot_jobs)
+        
+        # Plots are rendered once all families are trained
+        self.render_pending_plots()
+        
+        comparison = pd.DataFrame.from_dict(rows, orient='index')
+        for metric in ('oof_roc_auc', 'test_roc_auc'):
+            if metric in comparison:
+                comparison = comparison.sort_values(metric, ascending=False)
+                break
+        
+        return results, comparison
+    
+    def _fit_and_evaluate(self, model, X_train, y_train, X_test, y_test):
+        """Fit model and compute its metrics according to the evaluation mode"""
+        if self.evaluation == 'holdout':
+            with maybe_phase(self.phases, 'fit'):
+                model.fit(X_train, y_train)
+            with maybe_phase(self.phases, 'evaluate'):
+                return model, self._evaluate_model(model, X_train, y_train, X_test, y_test)
+        
+        with maybe_phase(self.phases, 'cv'):
+            cv_output = self._cross_validate(model, X_train, y_train)
+        if self.reuse_fold_estimators:
+            model = FoldEnsembleClassifier(cv_output['estimators'])
+        else:
+            with maybe_phase(self.phases, 'fit'):
+                model.fit(X_train, y_train)
+        with maybe_phase(self.phases, 'evaluate'):
+            metrics = self._evaluate_model(model, X_train, y_train, X_test, y_test, cv_output)
+        return model, metrics
+    
+    def _cross_validate(self, model, X_train, y_train):
+        """
+        Run one parallel cross-validation pass
+        
+        Returns the fold estimators, the fold test indices and the
+        out-of-fold probability of the positive class for every training row.
+        """
+        cv = StratifiedKFold(n_splits=self.cv_folds)
+        splits = list(cv.split(X_train, y_train))
+        X_shared, y_shared = self._shared(X_train, y_train)
+        with self.backend.context(X_shared, y_shared, n_jobs=self.cv_n_jobs):
+            started = time.time()
+            results = cross_validate(
+                clone(model), X_shared, y_shared, cv=splits, scoring='accuracy',
+                n_jobs=None, return_estimator=True
+            )
+            self._log_fanout(results, time.time() - started)
+        
+        oof_proba = np.empty(len(X_train))
+        for estimator, (_, test_idx) in zip(results['estimator'], splits):
+            oof_proba[test_idx] = estimator.predict_proba(_take_rows(X_train, test_idx))[:, 1]
+        
+        return {
+            'estimators': results['estimator'],
+            'test_indices': [test_idx for _, test_idx in splits],
+            'oof_proba': oof_proba,
+            'fit_time': results['fit_time'],
+        }
+    
+    def _evaluate_model(self, model, X_train, y_train, X_test, y_test, cv_output=None):
         """Evaluate model and return metrics"""
         # Predictions
         y_train_pred = model.predict(X_train)
@@ -155,80 +550,377 @@ class ModelTrainer:
             'test_roc_auc': roc_auc_score(y_test, y_test_proba)
         }
         
-        # Cross-validation score
-        cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='accuracy')
-        metrics['cv_accuracy_mean'] = cv_scores.mean()
-        metrics['cv_accuracy_std'] = cv_scores.std()
+        if self.profile_inference:
+            with maybe_phase(self.phases, 'profile_inference'):
+                metrics.update(profile_model(model, X_test))
+        
+        if cv_output is None:
+            # Cross-validation score
+            X_shared, y_shared = self._shared(X_train, y_train)
+            with maybe_phase(self.phases, 'cv'), \
+                    self.backend.context(X_shared, y_shared, n_jobs=self.cv_n_jobs):
+                started = time.time()
+                cv_results = cross_validate(model, X_shared, y_shared, cv=5, scoring='accuracy',
+                                            n_jobs=None)
+                self._log_fanout(cv_results, time.time() - started)
+            cv_scores = cv_results['test_score']
+            metrics['cv_accuracy_mean'] = cv_scores.mean()
+            metrics['cv_accuracy_std'] = cv_scores.std()
+            
+            # Log confusion matrix
+            cm = confusion_matrix(y_test, y_test_pred)
+            self._log_confusion_matrix(cm)
+            
+            # Log ROC curve
+            self._log_roc_curve(y_test, y_test_proba)
+            
+            return metrics
+        
+        # Every cross-validated metric comes from the out-of-fold probabilities
+        y_true = np.asarray(y_train)
+        oof_proba = cv_output['oof_proba']
+        oof_pred = (oof_proba > 0.5).astype(y_true.dtype)
         
-        # Log confusion matrix
-        cm = confusion_matrix(y_test, y_test_pred)
-        self._log_confusion_matrix(cm)
+        metrics.update(_classification_metrics(y_true, oof_pred, oof_proba, prefix='oof'))
+        fold_metrics = pd.DataFrame([
+            _classification_metrics(y_true[idx], oof_pred[idx], oof_proba[idx], prefix='cv')
+            for idx in cv_output['test_indices']
+        ])
+        for name in fold_metrics.columns:
+            metrics[f'{name}_mean'] = fold_metrics[name].mean()
+            metrics[f'{name}_std'] = fold_metrics[name].std(ddof=0)
         
-        # Log ROC curve
-        self._log_roc_curve(y_test, y_test_proba)
+        # Confusion matrix and ROC curve over all out-of-fold predictions
+        self._log_confusion_matrix(confusion_matrix(y_true, oof_pred))
+        self._log_roc_curve(y_true, oof_proba)
         
         return metrics
     
-    def _log_feature_importances(self, model, feature_names):
-        """Log feature importances plot"""
+    def _log_fanout(self, cv_results, wall_seconds):
+        """
+        Log fan-out and straggler statistics of one cross_validate call to the current run
+        
+        Also logs the peak and private memory of the worker processes. They
+        are sampled by one probe task per worker on the trainer's first call
+        only (probing dispatches as many tasks as a fold pass) and the same
+        figures are logged after that. Must be called inside the backend
+        context so the probes reach the same workers.
+        """
+        task_seconds = np.asarray(cv_results['fit_time']) + np.asarray(cv_results['score_time'])
+        n_workers = self.backend.n_workers(self.cv_n_jobs)
+        stats = fanout_stats(task_seconds, wall_seconds, n_workers, 'cv')
+        if self._cv_worker_memory is None:
+            self._cv_worker_memory = self._worker_memory(n_workers, 'cv')
+        stats.update(self._cv_worker_memory)
+        if self._run is not None:
+            self._run.log_metrics(stats)
+        return stats
+    
+    def _worker_memory(self, n_workers, prefix):
+        """Memory statistics of the backend's worker processes (call inside its context)"""
+        if self.backend.name in ('threading', 'sequential'):
+            reports = [worker_memory()]
+        else:
+            reports = joblib.Parallel()(
+                joblib.delayed(worker_memory)() for _ in range(n_workers)
+            )
+        return memory_stats(reports, f'{prefix}_worker')
+    
+    def _log_feature_importances(self, model, feature_names, X_test=None, y_test=None):
+        """
+        Capture feature importances for the active run's plots
+        
+        Models without feature_importances_ (e.g. HistGradientBoostingClassifier)
+        fall back to permutation importances on a sample of the test split
+        when it is given.
+        """
+        if not self.render_plots:
+            return
         if hasattr(model, 'feature_importances_'):
             importances = model.feature_importances_
-            indices = np.argsort(importances)[::-1]
-            
-            plt.figure(figsize=(10, 6))
-            plt.title("Feature Importances")
-            plt.bar(range(len(importances)), importances[indices])
-            plt.xticks(range(len(importances)), 
-                      [feature_names[i] for i in indices], 
-                      rotation=45, ha='right')
-            plt.tight_layout()
-            
-            # Save and log
-            plt.savefig("feature_importances.png")
-            mlflow.log_artifact("feature_importances.png")
-            plt.close()
+        elif X_test is not None:
+            rows = np.random.default_rng(42).permutation(len(X_test))[:PERMUTATION_SAMPLE_SIZE]
+            with maybe_phase(self.phases, 'permutation_importance'):
+                result = permutation_importance(
+                    model, _take_rows(X_test, rows), np.asarray(y_test)[rows],
+                    scoring='roc_auc', n_repeats=5, random_state=42
+                )
+            importances = result.importances_mean
+        else:
+            return
+        self._queue_plot('feature_importances', {
+            'importances': np.asarray(importances),
+            'feature_names': list(feature_names),
+        })
     
     def _log_confusion_matrix(self, cm):
-        """Log confusion matrix plot"""
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                   xticklabels=['No Disease', 'Disease'],
-                   yticklabels=['No Disease', 'Disease'])
-        plt.title('Confusion Matrix')
-        plt.ylabel('True Label')
-        plt.xlabel('Predicted Label')
-        plt.tight_layout()
-        
-        # Save and log
-        plt.savefig("confusion_matrix.png")
-        mlflow.log_artifact("confusion_matrix.png")
-        plt.close()
+        """Capture confusion matrix for the active run's plots"""
+        self._queue_plot('confusion_matrix', {'cm': np.asarray(cm)})
     
     def _log_roc_curve(self, y_true, y_proba):
-        """Log ROC curve plot"""
+        """Capture ROC curve points for the active run's plots"""
+        if not self.render_plots:
+            return
         fpr, tpr, _ = roc_curve(y_true, y_proba)
         auc = roc_auc_score(y_true, y_proba)
+        self._queue_plot('roc_curve', {'fpr': fpr, 'tpr': tpr, 'auc': auc})
+    
+    def _queue_plot(self, kind, data):
+        """Record plot data against the active MLflow run"""
+        if not self.render_plots:
+            return
+        run_id = self._run.run_id
+        self.pending_plots.append(PlotJob(run_id, kind, f"{kind}.png", data))
+    
+    def render_pending_plots(self, max_workers=None):
+        """
+        Render captured plots in a process pool and upload them to MLflow
+        
+        Each run's figures are written to its own temporary directory, so
+        concurrent runs never overwrite each other's files. Uploads are
+        queued on the tracking thread; call tracking.wait() to block until
+        they are done.
+        
+        Returns:
+        --------
+        Number of plots rendered
+        """
+        jobs, self.pending_plots = self.pending_plots, []
+        if not jobs:
+            return 0
+        
+        started = time.time()
+        run_dirs = {job.run_id: Path(tempfile.mkdtemp(prefix=f"plots_{job.run_id[:8]}_"))
+                    for job in jobs}
+        try:
+            max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+                list(executor.map(
+                    render_plot,
+                    [job.kind for job in jobs],
+                    [job.data for job in jobs],
+                    [run_dirs[job.run_id] / job.filename for job in jobs],
+                ))
+        except BaseException:
+            for run_dir in run_dirs.values():
+                shutil.rmtree(run_dir, ignore_errors=True)
+            raise
+        
+        # The tracking thread owns (and removes) the directories from here on.
+        # Plots of all runs render together, so each run gets the batch time.
+        elapsed = time.time() - started
+        for run_id, run_dir in run_dirs.items():
+            run_logger = RunLogger(run_id)
+            run_logger.log_metrics({'phase_render_plots_wall_s': elapsed})
+            run_logger.flush()
+            run_logger.log_artifacts(run_dir, move=True)
+        
+        logger.info(f"Rendered {len(jobs)} plots for {len(run_dirs)} runs")
+        return len(jobs)
+    
+    def train_incremental(self, model, preprocessor, X_delta, y_delta, X_test, y_test,
+                          X_history=None, y_history=None, replay_size=None,
+                          n_new_estimators=DEFAULT_NEW_ESTIMATORS, random_state=42):
+        """
+        Continue training a fitted model on newly labeled data
+        
+        Instead of a full-history fit, the model is updated from its current
+        state (see warm_start_model) on the delta rows plus a replay sample
+        of historical rows, which guards against forgetting.
+        
+        Parameters:
+        -----------
+        model, preprocessor : fitted estimator and HeartDiseasePreprocessor
+            Copies are updated; the arguments are left untouched.
+        X_delta, y_delta : raw (unpreprocessed) new labeled rows
+        X_test, y_test : raw rows used to score the updated model
+        X_history, y_history : raw historical rows to replay, optional
+        replay_size : int, optional
+            Historical rows mixed into the update (default: len(X_delta))
+        n_new_estimators : int
+            Trees or boosting stages added to ensemble models
+        
+        Returns:
+        --------
+        model, preprocessor, metrics
+        
+        Raises:
+        -------
+        ValueError before any work if the model cannot be warm-started
+        (see check_warm_start)
+        """
+        check_warm_start(model)
+        model = copy.deepcopy(model)
+        preprocessor = copy.deepcopy(preprocessor)
+        start = time.time()
+        
+        X_fit, y_fit = X_delta, np.asarray(y_delta)
+        n_replay = 0
+        if X_history is not None and len(X_history):
+            n_replay = min(replay_size or len(X_delta), len(X_history))
+            rows = np.random.default_rng(random_state).choice(
+                len(X_history), size=n_replay, replace=False
+            )
+            X_fit = pd.concat([X_delta, _take_rows(X_history, rows)])
+            y_fit = np.concatenate([y_fit, np.asarray(y_history)[rows]])
+        
+        # Tree thresholds were learned on the current scaling, so only
+        # linear models (which re-optimise every coefficient) follow the
+        # updated scaler statistics
+        if isinstance(model, LogisticRegression):
+            preprocessor.partial_fit(X_delta)
+        
+        with self._start_run(f"Incremental_{type(model).__name__}") as run:
+            run.log_params({'n_delta': len(X_delta), 'n_replay': n_replay,
+                            'n_new_estimators': n_new_estimators})
+            run.set_tag('training', 'incremental')
+            
+            logger.info(f"Incremental training of {type(model).__name__} on "
+                        f"{len(X_delta)} new + {n_replay} replayed rows...")
+            with self.phases.phase('fit'):
+                model = warm_start_model(model, preprocessor.transform(X_fit), y_fit,
+                                         n_new_estimators=n_new_estimators)
+            
+            with self.phases.phase('evaluate'):
+                X_test = preprocessor.transform(X_test)
+                y_test = np.asarray(y_test)
+                y_test_proba = model.predict_proba(X_test)[:, 1]
+                y_test_pred = model.predict(X_test)
+                metrics = _classification_metrics(y_test, y_test_pred, y_test_proba, prefix='test')
+            metrics['train_seconds'] = time.time() - start
+            run.log_metrics(metrics)
+            
+            self._log_confusion_matrix(confusion_matrix(y_test, y_test_pred))
+            self._log_roc_curve(y_test, y_test_proba)
+            self._log_feature_importances(model, X_test.columns, X_test, y_test)
+            with self.phases.phase('log_model'):
+                run.log_model(model, "model")
+        
+        self.render_pending_plots()
+        logger.info(f"Incremental training complete in {metrics['train_seconds']:.1f}s")
+        return model, preprocessor, metrics
+    
+    def compress_model(self, model, X_train, y_train, X_test, y_test,
+                       auc_tolerance=COMPRESSION_AUC_TOLERANCE):
+        """
+        Post-training compression stage
+        
+        Builds compact candidates of a trained model (pruned forests,
+        smaller/shallower forests, distilled decision trees), measures their
+        AUC, accuracy, latency and size on a validation split of the
+        training rows, and selects the smallest candidate within
+        auc_tolerance of the best validation ROC AUC. The selected recipe
+        is then cross-validated on the same folds as the other models
+        (oof_* / cv_* metrics), and only the final model is scored on the
+        test split. The candidate table with its latency/AUC Pareto front
+        is logged to a "Compression_<Model>" MLflow run together with the
+        selected model and its metrics.
+        
+        Returns:
+        --------
+        selected model, candidate table (DataFrame), metrics of the
+        selected model (the same columns as the train_* metrics)
+        """
+        logger.info(f"Compressing {type(model).__name__}...")
+        with self._start_run(f"Compression_{type(model).__name__}") as run:
+            with self.phases.phase('compress'):
+                selected_model, selected, table = compress(
+                    model, X_train, y_train, auc_tolerance=auc_tolerance
+                )
+            
+            run.log_params({'auc_tolerance': auc_tolerance, 'selected': selected,
+                            'n_candidates': len(table)})
+            # One step per candidate, so each metric history traces the whole table
+            for step, row in enumerate(table.itertuples(index=False)):
+                run.log_metrics({
+                    'candidate_val_roc_auc': row.val_roc_auc,
+                    'candidate_latency_p50_ms': row.latency_p50_ms,
+                    'candidate_size_bytes': row.size_bytes,
+                }, step=step)
+            
+            chosen = table.set_index('candidate').loc[selected]
+            teacher = table.set_index('candidate').loc['teacher']
+            run.log_metrics({
+                'selected_val_roc_auc': chosen['val_roc_auc'],
+                'selected_latency_p50_ms': chosen['latency_p50_ms'],
+                'selected_size_bytes': chosen['size_bytes'],
+                'latency_speedup': teacher['latency_p50_ms'] / chosen['latency_p50_ms'],
+                'size_reduction': teacher['size_bytes'] / chosen['size_bytes'],
+            })
+            run.log_dict({'candidates': table.to_dict(orient='records')}, 'compression_candidates.json')
+            
+            # Cross-validated metrics comparable with the other models' (same folds)
+            splits = list(StratifiedKFold(n_splits=self.cv_folds).split(X_train, y_train))
+            with self.phases.phase('cv'):
+                oof_proba = candidate_oof_proba(selected, model, X_train, y_train, splits)
+            cv_output = {'oof_proba': oof_proba,
+                         'test_indices': [test_idx for _, test_idx in splits]}
+            with self.phases.phase('evaluate'):
+                metrics = self._evaluate_model(selected_model, X_train, y_train, X_test, y_test,
+                                               cv_output)
+            run.log_metrics(metrics)
+            with self.phases.phase('log_model'):
+                run.log_model(selected_model, "model")
+        
+        self.render_pending_plots()
+        logger.info(f"Selected {selected}: validation AUC {chosen['val_roc_auc']:.4f}, "
+                    f"OOF AUC {metrics['oof_roc_auc']:.4f}, "
+                    f"{chosen['latency_p50_ms']:.2f} ms/row, {chosen['size_bytes'] / 1024:.0f} KB")
+        return selected_model, table, metrics
+    
+    def select_model(self, comparison, policy):
+        """
+        Choose the model to promote under a serving policy
         
-        plt.figure(figsize=(8, 6))
-        plt.plot(fpr, tpr, linewidth=2, label=f'ROC curve (AUC = {auc:.3f})')
-        plt.plot([0, 1], [0, 1], 'k--', linewidth=2, label='Random Classifier')
-        plt.xlim([0.0, 1.0])
-        plt.ylim([0.0, 1.05])
-        plt.xlabel('False Positive Rate')
-        plt.ylabel('True Positive Rate')
-        plt.title('Receiver Operating Characteristic (ROC) Curve')
-        plt.legend(loc="lower right")
-        plt.grid(alpha=0.3)
-        plt.tight_layout()
-        
-        # Save and log
-        plt.savefig("roc_curve.png")
-        mlflow.log_artifact("roc_curve.png")
-        plt.close()
-    
-    def hyperparameter_tuning(self, model_type, X_train, y_train, param_grid):
-        """Perform hyperparameter tuning with GridSearchCV"""
-        logger.info(f"Starting hyperparameter tuning for {model_type}...")
+        Parameters:
+        -----------
+        comparison : DataFrame
+            One row per model with quality and profiling columns (as returned
+            by train_all with profile_inference=True)
+        policy : profiling.SelectionPolicy
+        
+        Returns:
+        --------
+        index label of the selected model; the decision is logged to a
+        "Model_Selection" MLflow run
+        """
+        with start_run("Model_Selection", self.experiment_name,
+                       tags=self._run_tags()) as run:
+            selected = policy.select(comparison)
+            
+            slos = {f'slo_{name}': limit for name, limit in policy.limits.items() if limit is not None}
+            run.log_params({'metric': policy.metric, 'tolerance': policy.tolerance,
+                            'selected': selected, **slos})
+            columns = [policy.metric, *policy.limits, 'latency_p50_ms']
+            run.log_metrics({
+                f'selected_{name}': comparison.loc[selected, name]
+                for name in columns if name in comparison
+            })
+            run.log_dict({'models': comparison.rename_axis('model').reset_index().to_dict(orient='records')},
+                         'model_comparison.json')
+        return selected
+    
+    def hyperparameter_tuning(self, model_type, X_train, y_train, param_grid, search='grid',
+                              max_fits=None, time_budget=None, **search_options):
+        """
+        Perform hyperparameter tuning
+        
+        Parameters:
+        -----------
+        search : {'grid', 'halving', 'bayes'}
+            'grid' is the exhaustive GridSearchCV. 'halving' (successive
+            halving) and 'bayes' (sequential model-based optimization) stop
+            at max_fits model fits or time_budget seconds and drop losing
+            candidates early.
+        search_options : dict
+            Extra arguments for the search engine, e.g. resource='n_estimators'
+            for 'halving' or n_initial=8 for 'bayes'
+        
+        Every trial is logged in batches to a "Tuning_<model_type>" MLflow run
+        (through tracking.start_run, so it is spooled when the server is down).
+        """
+        logger.info(f"Starting hyperparameter tuning for {model_type} ({search} search)...")
         
         if model_type == 'logistic_regression':
             base_model = LogisticRegression(max_iter=1000, random_state=42)
@@ -236,34 +928,228 @@ class ModelTrainer:
             base_model = RandomForestClassifier(random_state=42, n_jobs=-1)
         elif model_type == 'gradient_boosting':
             base_model = GradientBoostingClassifier(random_state=42)
+        elif model_type == 'hist_gradient_boosting':
+            base_model = HistGradientBoostingClassifier(random_state=42)
         else:
             raise ValueError(f"Unknown model type: {model_type}")
         
-        grid_search = GridSearchCV(
-            base_model, param_grid, cv=5, scoring='roc_auc', 
-            n_jobs=-1, verbose=1
-        )
-        grid_search.fit(X_train, y_train)
+        if search not in SEARCH_ENGINES:
+            raise ValueError(f"Unknown search engine: {search}")
+        
+        with start_run(f"Tuning_{model_type}", self.experiment_name,
+                       tags={'search': search, 'model_type': model_type,
+                             **self._run_tags()}) as run:
+            self._run = run
+            trial_log = TrialLog(run)
+            
+            X_train, y_train = self._shared(X_train, y_train)
+            started = time.time()
+            with self.backend.context(X_train, y_train):
+                if search == 'grid':
+                    grid_search = GridSearchCV(
+                        base_model, param_grid, cv=5, scoring='roc_auc', 
+                        n_jobs=self.backend.n_jobs, verbose=1
+                    )
+                    grid_search.fit(X_train, y_train)
+                    for trial in _grid_trials(grid_search.cv_results_):
+                        trial_log.add(trial)
+                    best_estimator = grid_search.best_estimator_
+                    best_params = grid_search.best_params_
+                    best_score = grid_search.best_score_
+                    n_fits = len(trial_log.trials) * 5
+                    # cv_results_ only has per-candidate mean fit times
+                    task_seconds = [trial['duration'] / trial['n_fits'] for trial in trial_log.trials
+                                    for _ in range(trial['n_fits'])]
+                else:
+                    search_options.setdefault('n_jobs', self.backend.n_jobs)
+                    engine = SEARCH_ENGINES[search](
+                        base_model, param_grid, scoring='roc_auc', cv=5, max_fits=max_fits,
+                        time_budget=time_budget, trial_log=trial_log, **search_options
+                    )
+                    engine.fit(X_train, y_train)
+                    best_estimator = engine.best_estimator_
+                    best_params = engine.best_params_
+                    best_score = engine.best_score_
+                    n_fits = engine.n_fits_
+                    task_seconds = engine.fit_seconds_
+                fanout = fanout_stats(task_seconds, time.time() - started,
+                                      self.backend.n_workers(), 'search')
+                fanout.update(self._worker_memory(self.backend.n_workers(), 'search'))
+            
+            trial_log.close()
+            run.set_tag('backend', self.backend.name)
+            run.log_params({f"best_{key}": value for key, value in best_params.items()})
+            run.log_metrics({'best_cv_roc_auc': best_score, 'n_fits': n_fits,
+                             'n_trials': len(trial_log.trials), **fanout})
         
-        logger.info(f"Best parameters: {grid_search.best_params_}")
-        logger.info(f"Best CV score: {grid_search.best_score_:.4f}")
+        logger.info(f"Best parameters: {best_params}")
+        logger.info(f"Best CV score: {best_score:.4f}")
         
-        return grid_search.best_estimator_, grid_search.best_params_
+        return best_estimator, best_params
+
+
+class FoldEnsembleClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Soft-voting ensemble of already fitted cross-validation fold estimators
+    
+    Lets 'cv' evaluation return a usable model without a final refit on the
+    full training set.
+    """
+    
+    def __init__(self, estimators):
+        self.estimators = estimators
+    
+    @property
+    def classes_(self):
+        return self.estimators[0].classes_
+    
+    @property
+    def feature_importances_(self):
+        return np.mean([estimator.feature_importances_ for estimator in self.estimators], axis=0)
+    
+    def fit(self, X, y):
+        """Fold estimators are fitted during cross-validation"""
+        return self
+    
+    def __sklearn_is_fitted__(self):
+        return True
+    
+    def predict_proba(self, X):
+        return np.mean([estimator.predict_proba(X) for estimator in self.estimators], axis=0)
+    
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _grid_trials(cv_results):
+    """Convert GridSearchCV results into search-engine trial records"""
+    n_splits = sum(1 for key in cv_results if key.startswith('split') and key.endswith('_test_score'))
+    now = time.time()
+    trials = []
+    for i, params in enumerate(cv_results['params']):
+        trials.append({
+            'params': params,
+            'score': float(cv_results['mean_test_score'][i]),
+            'fold_scores': [float(cv_results[f'split{k}_test_score'][i]) for k in range(n_splits)],
+            'n_fits': n_splits,
+            'status': 'complete',
+            'resource': None,
+            'duration': float((cv_results['mean_fit_time'][i] + cv_results['mean_score_time'][i]) * n_splits),
+            'end_time': now,
+        })
+    return trials
+
+
+# Models warm_start_model can continue fitting
+WARM_START_MODELS = (RandomForestClassifier, GradientBoostingClassifier,
+                     HistGradientBoostingClassifier, LogisticRegression)
+
+
+def check_warm_start(model):
+    """
+    Raise ValueError, naming the model type, if ``model`` cannot be trained incrementally
+    
+    Compressed forests (pruned or shallow, see model_compression.py) are random
+    forests and qualify; a distilled decision tree does not, since it would
+    need its teacher to be updated, and neither do fold ensembles.
+    """
+    if not isinstance(model, WARM_START_MODELS):
+        supported = ', '.join(cls.__name__ for cls in WARM_START_MODELS)
+        raise ValueError(f"Incremental training is not supported for {type(model).__name__} "
+                         f"(supported: {supported}); run a full retrain instead")
+
+
+def warm_start_model(model, X, y, n_new_estimators=DEFAULT_NEW_ESTIMATORS):
+    """
+    Continue fitting ``model`` on (X, y) from its current state
+    
+    - RandomForestClassifier: keeps its trees and grows n_new_estimators
+      more on (X, y)
+    - GradientBoostingClassifier / HistGradientBoostingClassifier: keeps
+      the fitted stages and boosts up to n_new_estimators more on the
+      residuals of (X, y)
+    - LogisticRegression: starts the solver from the previous coefficients
+    
+    The model is modified in place and returned with warm_start reset, so
+    a later plain fit() retrains from scratch as usual.
+    """
+    if isinstance(model, RandomForestClassifier):
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_estimators)
+    elif isinstance(model, GradientBoostingClassifier):
+        model.set_params(warm_start=True, n_estimators=model.n_estimators_ + n_new_estimators)
+    elif isinstance(model, HistGradientBoostingClassifier):
+        model.set_params(warm_start=True, max_iter=model.n_iter_ + n_new_estimators)
+    elif isinstance(model, LogisticRegression):
+        model.set_params(warm_start=True)
+    else:
+        check_warm_start(model)
+    
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    return model
+
+
+def _take_rows(X, indices):
+    """Select rows by position from a DataFrame or array"""
+    return X.iloc[indices] if hasattr(X, 'iloc') else X[indices]
+
+
+def _classification_metrics(y_true, y_pred, y_proba, prefix):
+    """Accuracy, precision, recall, F1 and ROC AUC with a name prefix"""
+    metrics = {
+        f'{prefix}_accuracy': accuracy_score(y_true, y_pred),
+        f'{prefix}_precision': precision_score(y_true, y_pred, zero_division=0),
+        f'{prefix}_recall': recall_score(y_true, y_pred, zero_division=0),
+        f'{prefix}_f1': f1_score(y_true, y_pred, zero_division=0),
+    }
+    if len(np.unique(y_true)) > 1:
+        metrics[f'{prefix}_roc_auc'] = roc_auc_score(y_true, y_proba)
+    return metrics
 
 
-def save_model(model, preprocessor, model_path, preprocessor_path):
-    """Save model and preprocessor"""
+def _train_family(options, tracking_uri, family, X_train, y_train, X_test, y_test, params):
+    """Train one model family in its own MLflow run (process pool entry point)"""
+    start = time.time()
+    X_train, y_train, X_test, y_test = (resolve(data) for data in (X_train, y_train, X_test, y_test))
+    mlflow.set_tracking_uri(tracking_uri)
+    trainer = ModelTrainer(**options)
+    train = getattr(trainer, MODEL_FAMILIES[family])
+    model, metrics = train(X_train, y_train, X_test, y_test, params=params,
+                           **FAMILY_OPTIONS.get(family, {}))
+    # Pool workers outlive the task, so drain the tracking queue before returning
+    wait_for_tracking()
+    return (model, metrics, time.time() - start, trainer.pending_plots, worker_memory(),
+            trainer._run.run_id)
+
+
+def save_model(model, preprocessor, model_path, preprocessor_path, formats=('pickle',)):
+    """
+    Save model and preprocessor
+    
+    Parameters:
+    -----------
+    formats : sequence of str
+        Artifact formats of the model (see artifacts.ARTIFACT_FORMATS); the
+        uncompressed pickle at ``model_path`` is always written. Each is
+        measured and indexed so the API loads the fastest.
+    
+    Returns:
+    --------
+    list of dicts with the format, size_bytes, load_ms and memory_mb of
+    every written model artifact
+    """
     model_path = Path(model_path)
     preprocessor_path = Path(preprocessor_path)
     
     model_path.parent.mkdir(parents=True, exist_ok=True)
     preprocessor_path.parent.mkdir(parents=True, exist_ok=True)
     
-    joblib.dump(model, model_path)
+    artifacts = save_artifacts(model, model_path, formats=formats)
     joblib.dump(preprocessor, preprocessor_path)
     
-    logger.info(f"Model saved to: {model_path}")
+    logger.info(f"Model saved to: {model_path} ({', '.join(a['format'] for a in artifacts)})")
     logger.info(f"Preprocessor saved to: {preprocessor_path}")
+    return artifacts
 
 
 def load_model(model_path, preprocessor_path):
@@ -274,36 +1160,182 @@ def load_model(model_path, preprocessor_path):
     return model, preprocessor
 
 
+def incremental_main(delta_path, history_path, model_path, preprocessor_path,
+                     replay_size=None, n_new_estimators=DEFAULT_NEW_ESTIMATORS,
+                     drift_reference_path=None):
+    """
+    Update the saved model and preprocessor with a file of newly labeled rows
+    
+    The preprocessor's scaler is updated too, so the drift reference
+    (``drift_reference.json`` next to the model unless
+    ``drift_reference_path`` is given) is rebuilt from the training and
+    delta rows scaled by the updated preprocessor; otherwise the API would
+    compare differently scaled data and report drift that is not there.
+    """
+    from config import MODEL_ARTIFACT_FORMATS
+    from drift import DriftReference
+    from manifest import dataset_version
+    from preprocessing import HeartDiseasePreprocessor
+    from sklearn.model_selection import train_test_split
+    
+    # Saved artifacts reference the ``src`` package (as served by the API)
+    sys.path.insert(1, str(Path(__file__).parent.parent))
+    model, preprocessor = load_model(model_path, preprocessor_path)
+    # e.g. a promoted distilled tree: fail before reading any data
+    check_warm_start(model)
+    
+    loader = HeartDiseasePreprocessor()
+    delta = loader.load_data(delta_path)
+    history = loader.load_data(history_path)
+    
+    # Same split as prepare_data: replay from the training rows, score on the test rows
+    history_train, history_test = train_test_split(
+        history, test_size=0.2, random_state=42, stratify=history['target']
+    )
+    
+    trainer = ModelTrainer(dataset_version=dataset_version(delta_path))
+    model, preprocessor, metrics = trainer.train_incremental(
+        model, preprocessor,
+        delta.drop('target', axis=1), delta['target'],
+        history_test.drop('target', axis=1), history_test['target'],
+        X_history=history_train.drop('target', axis=1), y_history=history_train['target'],
+        replay_size=replay_size, n_new_estimators=n_new_estimators
+    )
+    save_model(model, preprocessor, model_path, preprocessor_path, formats=MODEL_ARTIFACT_FORMATS)
+    
+    # Reference for serving-time drift monitoring, in the updated scaler's units
+    reference_rows = pd.concat([history_train, delta], ignore_index=True).drop('target', axis=1)
+    drift_reference_path = drift_reference_path or Path(model_path).parent / "drift_reference.json"
+    DriftReference.from_frame(preprocessor.transform(reference_rows)).save(drift_reference_path)
+    
+    print("\n" + "="*80)
+    print("INCREMENTAL RETRAIN")
+    print("="*80)
+    for name, value in metrics.items():
+        print(f"{name}: {value:.4f}")
+    print("="*80)
+
+
 if __name__ == "__main__":
-    from preprocessing import prepare_data
+    from backends import BACKENDS, ExecutionBackend
+    from drift import DriftReference
+    from manifest import dataset_version
+    from config import (
+        MODEL_ARTIFACT_FORMATS, SELECTION_METRIC, SELECTION_TOLERANCE, SLO_LATENCY_P99_MS,
+        SLO_MEMORY_MB
+    )
+    from precision import precision_report
+    from profiling import SelectionPolicy
+    from sklearn.model_selection import train_test_split
     
     # Prepare data
     BASE_DIR = Path(__file__).parent.parent
+    
+    # The promoted preprocessor must reference the ``src`` package (as served by the API)
+    sys.path.insert(1, str(BASE_DIR))
+    from src.preprocessing import HeartDiseasePreprocessor, prepare_data
     DATA_PATH = BASE_DIR / "data" / "processed" / "heart_disease.csv"
+    CACHE_DIR = BASE_DIR / "data" / "cache"
     
-    X_train, X_test, y_train, y_test, preprocessor = prepare_data(DATA_PATH)
+    parser = argparse.ArgumentParser(description="Train heart disease models")
+    parser.add_argument('--incremental', action='store_true',
+                        help="update models/best_model.pkl with --delta instead of a full retrain")
+    parser.add_argument('--delta', type=Path, help="CSV of newly labeled rows (same columns as the dataset)")
+    parser.add_argument('--replay-size', type=int, default=None,
+                        help="historical rows replayed with the delta (default: delta size)")
+    parser.add_argument('--new-estimators', type=int, default=DEFAULT_NEW_ESTIMATORS,
+                        help="trees / boosting stages added to ensemble models")
+    parser.add_argument('--backend', choices=BACKENDS, default='loky',
+                        help="where cross-validation fits run (dask: a cluster or local stand-in)")
+    parser.add_argument('--scheduler', default=None,
+                        help="dask scheduler address (default: start a LocalCluster)")
+    parser.add_argument('--memmap-dir', type=Path, default=None,
+                        help="share training matrices between workers as .npy memory maps in this "
+                             "directory (content-addressed, reused across runs)")
+    parser.add_argument('--profile-phase', action='append', default=[], metavar='PHASE',
+                        help="capture this phase (e.g. fit, cv, fit_transform) with cProfile; repeatable")
+    args = parser.parse_args()
     
-    # Train models
-    trainer = ModelTrainer()
+    if args.incremental:
+        if args.delta is None:
+            parser.error("--incremental requires --delta")
+        try:
+            incremental_main(args.delta, DATA_PATH, BASE_DIR / "models" / "best_model.pkl",
+                             BASE_DIR / "models" / "preprocessor.pkl",
+                             replay_size=args.replay_size, n_new_estimators=args.new_estimators)
+        except ValueError as e:
+            sys.exit(f"Incremental training failed: {e}")
+        sys.exit(0)
     
-    # Logistic Regression
-    lr_model, lr_metrics = trainer.train_logistic_regression(
-        X_train, y_train, X_test, y_test
-    )
+    preparation = PhaseRecorder("Data_Preparation", profile_phases=args.profile_phase)
+    X_train, X_test, y_train, y_test, preprocessor = prepare_data(DATA_PATH, cache_dir=CACHE_DIR,
+                                                                  memmap_dir=args.memmap_dir,
+                                                                  phases=preparation)
     
-    # Random Forest
-    rf_model, rf_metrics = trainer.train_random_forest(
-        X_train, y_train, X_test, y_test
+    # Reference distribution for serving-time drift monitoring
+    DriftReference.from_frame(X_train).save(BASE_DIR / "models" / "drift_reference.json")
+    
+    # Train models (one process per family, one cross-validation pass per model)
+    backend = ExecutionBackend(args.backend, scheduler_address=args.scheduler)
+    trainer = ModelTrainer(evaluation='cv', profile_inference=True,
+                           dataset_version=dataset_version(DATA_PATH), backend=backend,
+                           memmap_dir=args.memmap_dir, profile_phases=args.profile_phase)
+    trainer.log_phases(preparation)
+    results, comparison = trainer.train_all(
+        X_train, y_train, X_test, y_test,
+        families=['logistic_regression', 'random_forest']
     )
     
     print("\n" + "="*80)
     print("MODEL COMPARISON")
     print("="*80)
-    print("\nLogistic Regression:")
-    for metric, value in lr_metrics.items():
-        print(f"  {metric}: {value:.4f}")
+    print(comparison.T.to_string(float_format=lambda value: f"{value:.4f}"))
+    print("="*80)
+    
+    # Compact version of the forest for serving
+    compressed_model, candidates, compressed_metrics = trainer.compress_model(
+        results['random_forest'][0], X_train, y_train, X_test, y_test
+    )
+    
+    print("\n" + "="*80)
+    print("COMPRESSION CANDIDATES")
+    print("="*80)
+    print(candidates.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+    print("="*80)
     
-    print("\nRandom Forest:")
-    for metric, value in rf_metrics.items():
-        print(f"  {metric}: {value:.4f}")
+    # The compressed forest competes with the full models for promotion, on
+    # the same cross-validated metrics (candidates were chosen on a
+    # validation split of the training rows, never on the test split)
+    comparison.loc['random_forest_compressed'] = pd.Series(compressed_metrics).reindex(
+        comparison.columns)
+    results['random_forest_compressed'] = (compressed_model, compressed_metrics)
+    
+    policy = SelectionPolicy(SELECTION_METRIC, max_latency_p99_ms=SLO_LATENCY_P99_MS,
+                             max_memory_mb=SLO_MEMORY_MB, tolerance=SELECTION_TOLERANCE)
+    best = trainer.select_model(comparison, policy)
+    artifacts = save_model(results[best][0], preprocessor, BASE_DIR / "models" / "best_model.pkl",
+                           BASE_DIR / "models" / "preprocessor.pkl", formats=MODEL_ARTIFACT_FORMATS)
+    
+    print(f"\nPromoted {best}: {SELECTION_METRIC} {comparison.loc[best, SELECTION_METRIC]:.4f}, "
+          f"p99 {comparison.loc[best, 'latency_p99_ms']:.2f} ms/row, "
+          f"{comparison.loc[best, 'memory_mb']:.1f} MB")
+    
+    print("\n" + "="*80)
+    print("MODEL ARTIFACTS")
+    print("="*80)
+    print(pd.DataFrame(artifacts).to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+    print("="*80)
+    
+    # Accuracy parity and throughput of reduced-precision inference, end to end
+    # on the raw test rows (the same split as prepare_data)
+    raw = HeartDiseasePreprocessor().load_data(DATA_PATH)
+    X_raw, y_raw = raw.drop('target', axis=1), raw['target']
+    _, X_test_raw = train_test_split(X_raw, test_size=0.2, random_state=42, stratify=y_raw)
+    precision = precision_report(results[best][0], X_test, y_test, preprocessor=preprocessor,
+                                 X_test_raw=X_test_raw, batch_sizes=(1, 100, 1000))
+    
+    print("\n" + "="*80)
+    print("REDUCED PRECISION")
+    print("="*80)
+    print(precision.to_string(index=False, float_format=lambda value: f"{value:.4g}"))
     print("="*80)
@@ -0,0 +1,480 @@
+"""
+Vectorized prediction for tree ensembles
+
+sklearn predicts a forest tree by tree (``RandomForestClassifier`` even
+dispatches the trees to joblib threads for a single row), and a boosted
+model stage by stage. ``FlatTreeEnsemble`` compiles the fitted trees into
+one set of contiguous node arrays:
+
+    feature, threshold, left, right, missing_left   one entry per node
+    value                                           leaf output per node
+
+A batch is scored by advancing every (row, tree) pair one level per step
+with NumPy gathers, dropping the pairs that reached a leaf, and summing
+the leaf values:
+
+- forests and single trees (averaging): each tree's normalized class
+  proportions, weighted by 1 / n_trees, give the probabilities directly;
+- gradient boosting (``GradientBoostingClassifier``,
+  ``HistGradientBoostingClassifier`` without categorical features): the
+  baseline plus the weighted leaf values give the raw score, which the
+  model's own loss turns into probabilities.
+
+Comparisons follow sklearn: rows are cast to float32 for
+DecisionTree-based models and float64 for histogram gradient boosting, and
+missing values go to the side recorded in ``missing_left``.
+
+``with_precision`` derives reduced-precision copies (see precision.py):
+'float32' stores and sums the leaf values in float32; 'int8' additionally
+replaces every threshold by its rank among the distinct thresholds of its
+feature (uint8 when a feature has fewer than 255). Rows are binned the same
+way, by counting the thresholds below each value, so ``x <= threshold``
+becomes ``bin(x) <= rank`` and the splits stay exact while the node
+thresholds take 1 byte instead of 8.
+
+``contributions`` explains a batch by its decision paths (Saabas): every
+node's expected output is the cover-weighted mean of the leaf values below
+it, and each split on a row's path adds the change in expected output to
+the feature it tests. The expectations are computed once per ensemble; the
+contributions are accumulated during the same level-by-level traversal as
+prediction, so explaining costs about one prediction plus a ``bincount``.
+
+``compile_predictor`` returns the compiled predictor, or None for models
+it does not support (the API then serves the sklearn model).
+"""
+import copy
+
+import numpy as np
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows scored per traversal; bounds the (rows x trees) index arrays
+CHUNK_ROWS = 4096
+
+
+class FlatTreeEnsemble:
+    """
+    Tree ensemble compiled into flat node arrays
+
+    Build with ``from_model``; ``predict_proba`` and ``predict`` follow the
+    sklearn classifier interface.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth,
+                 classes, n_features, dtype=np.float32, loss=None, baseline=None,
+                 feature_names=None, cover=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.dtype = dtype
+        self.loss = loss
+        self.baseline = baseline
+        self.feature_names_in_ = feature_names
+        # Training samples (weights) reaching each node, for explanations
+        self.cover = cover
+        # Leaves are stored as their own children
+        self.is_leaf = left == np.arange(len(left))
+        # children[2 * node + 1] is the left child, children[2 * node] the right one
+        self.children = np.column_stack([right, left]).ravel()
+        # Sorted distinct thresholds per feature when thresholds are bin ranks
+        self.bin_edges = None
+        self.missing_bin = None
+        self._path_values = None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        """Memory held by the node arrays"""
+        arrays = [self.feature, self.threshold, self.children, self.missing_left, self.is_leaf,
+                  self.value, self.roots] + list(self.bin_edges or [])
+        return sum(array.nbytes for array in arrays)
+
+    @property
+    def precision(self):
+        if self.bin_edges is not None:
+            return 'int8'
+        return 'float32' if self.value.dtype == np.float32 else 'float64'
+
+    def __repr__(self):
+        kind = 'boosting' if self.loss is not None else 'averaging'
+        return (f"FlatTreeEnsemble({kind}, n_trees={self.n_trees}, n_nodes={self.n_nodes}, "
+                f"max_depth={self.max_depth}, precision={self.precision})")
+
+    def with_precision(self, precision):
+        """
+        Copy with 'float64', 'float32' or 'int8' (float32 leaf values and
+        per-feature quantized thresholds) storage
+        """
+        if precision not in ('float64', 'float32', 'int8'):
+            raise ValueError(f"Unknown precision: {precision}")
+        if precision == self.precision:
+            return self
+        if self.bin_edges is not None:
+            raise ValueError("Quantized thresholds cannot be converted back")
+        reduced = copy.copy(self)
+        reduced._path_values = None
+        value_dtype = np.float64 if precision == 'float64' else np.float32
+        reduced.value = self.value.astype(value_dtype)
+        if self.baseline is not None:
+            reduced.baseline = self.baseline.astype(value_dtype)
+        if precision == 'int8':
+            reduced._quantize_thresholds()
+        return reduced
+
+    def _quantize_thresholds(self):
+        """Replace thresholds by their rank among their feature's distinct thresholds"""
+        internal = ~self.is_leaf
+        ranks = np.zeros(self.n_nodes, dtype=np.int64)
+        self.bin_edges = []
+        for feature in range(self.n_features_in_):
+            split = internal & (self.feature == feature)
+            edges, rank = np.unique(self.threshold[split], return_inverse=True)
+            self.bin_edges.append(edges)
+            ranks[split] = rank
+        # The largest value of the type marks missing values
+        n_edges = max(len(edges) for edges in self.bin_edges)
+        dtype = next(t for t in (np.uint8, np.uint16, np.uint32) if n_edges < np.iinfo(t).max)
+        self.missing_bin = np.iinfo(dtype).max
+        self.threshold = ranks.astype(dtype)
+
+    def _bin(self, X):
+        """Per-feature bin of every value: the number of thresholds below it"""
+        binned = np.empty(X.shape, dtype=self.threshold.dtype)
+        for feature, edges in enumerate(self.bin_edges):
+            binned[:, feature] = np.searchsorted(edges, X[:, feature], side='left')
+        binned[np.isnan(X)] = self.missing_bin
+        return binned
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Compile a fitted DecisionTreeClassifier, RandomForestClassifier,
+        ExtraTreesClassifier, GradientBoostingClassifier or
+        HistGradientBoostingClassifier
+
+        Raises:
+        -------
+        TypeError if the model (or its configuration) is not supported
+        """
+        from sklearn.ensemble import (
+            ExtraTreesClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier,
+            RandomForestClassifier
+        )
+        from sklearn.tree import DecisionTreeClassifier
+
+        if isinstance(model, DecisionTreeClassifier):
+            return cls._from_averaging(model, [model])
+        if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+            return cls._from_averaging(model, model.estimators_)
+        if isinstance(model, GradientBoostingClassifier):
+            return cls._from_gradient_boosting(model)
+        if isinstance(model, HistGradientBoostingClassifier):
+            return cls._from_hist_gradient_boosting(model)
+        raise TypeError(f"Cannot compile {type(model).__name__}")
+
+    @classmethod
+    def _from_averaging(cls, model, trees):
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise TypeError("Multi-output trees are not supported")
+        nodes = []
+        for tree in trees:
+            tree_ = tree.tree_
+            value = tree_.value[:, 0, :]
+            totals = value.sum(axis=1, keepdims=True)
+            proportions = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+            nodes.append(_sklearn_nodes(tree_, proportions / len(trees)))
+        return cls._assemble(nodes, model, dtype=np.float32)
+
+    @classmethod
+    def _from_gradient_boosting(cls, model):
+        from sklearn.dummy import DummyClassifier
+
+        if not (model.init_ == 'zero' or isinstance(model.init_, DummyClassifier)):
+            raise TypeError("Only constant init estimators can be compiled")
+        n_outputs = model.estimators_.shape[1]
+        nodes = []
+        for stage in model.estimators_:
+            for k, tree in enumerate(stage):
+                tree_ = tree.tree_
+                value = np.zeros((tree_.node_count, n_outputs))
+                value[:, k] = model.learning_rate * tree_.value[:, 0, 0]
+                nodes.append(_sklearn_nodes(tree_, value))
+        # The init estimator predicts a constant, whatever the row
+        baseline = model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0]
+        return cls._assemble(nodes, model, dtype=np.float32, loss=model._loss, baseline=baseline)
+
+    @classmethod
+    def _from_hist_gradient_boosting(cls, model):
+        if model.is_categorical_ is not None and np.any(model.is_categorical_):
+            raise TypeError("Categorical splits are not supported")
+        n_outputs = model.n_trees_per_iteration_
+        nodes = []
+        for iteration in model._predictors:
+            for k, predictor in enumerate(iteration):
+                raw = predictor.nodes
+                value = np.zeros((len(raw), n_outputs))
+                value[:, k] = raw['value']
+                leaf = raw['is_leaf'].astype(bool)
+                nodes.append({
+                    'feature': np.where(leaf, 0, raw['feature_idx']),
+                    'threshold': raw['num_threshold'],
+                    'left': raw['left'].astype(np.int64),
+                    'right': raw['right'].astype(np.int64),
+                    'missing_left': raw['missing_go_to_left'].astype(bool),
+                    'leaf': leaf,
+                    'value': value,
+                    'depth': int(raw['depth'].max()),
+                    'cover': raw['count'].astype(np.float64),
+                })
+        return cls._assemble(nodes, model, dtype=np.float64, loss=model._loss,
+                             baseline=np.asarray(model._baseline_prediction).ravel())
+
+    @classmethod
+    def _assemble(cls, nodes, model, dtype, loss=None, baseline=None):
+        """Concatenate per-tree node arrays, offsetting child indices"""
+        sizes = np.array([len(tree['feature']) for tree in nodes])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        own = [np.arange(size) for size in sizes]
+        left = np.concatenate([np.where(tree['leaf'], index, tree['left']) + offset
+                               for tree, index, offset in zip(nodes, own, offsets)])
+        right = np.concatenate([np.where(tree['leaf'], index, tree['right']) + offset
+                                for tree, index, offset in zip(nodes, own, offsets)])
+        feature_names = getattr(model, 'feature_names_in_', None)
+        return cls(
+            cover=np.concatenate([tree['cover'] for tree in nodes]),
+            feature=np.concatenate([tree['feature'] for tree in nodes]).astype(np.intp),
+            threshold=np.concatenate([tree['threshold'] for tree in nodes]).astype(np.float64),
+            left=left.astype(np.intp),
+            right=right.astype(np.intp),
+            missing_left=np.concatenate([tree['missing_left'] for tree in nodes]),
+            value=np.concatenate([tree['value'] for tree in nodes]),
+            roots=offsets.astype(np.intp),
+            max_depth=max(tree['depth'] for tree in nodes),
+            classes=model.classes_,
+            n_features=model.n_features_in_,
+            dtype=dtype,
+            loss=loss,
+            baseline=None if baseline is None else np.asarray(baseline, dtype=np.float64),
+            feature_names=None if feature_names is None else list(feature_names),
+        )
+
+    def _validate(self, X):
+        if hasattr(X, 'columns') and self.feature_names_in_ is not None \
+                and list(X.columns) != self.feature_names_in_:
+            raise ValueError("The feature names should match those that were passed during fit")
+        X = np.asarray(X, dtype=self.dtype)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the model expects "
+                             f"{self.n_features_in_}")
+        return X
+
+    def _leaves(self, X, path=None):
+        """
+        Leaf node reached by every row in every tree, shape (n_rows, n_trees)
+
+        When ``path`` is a list, every step appends (flat index of the tested
+        value in X, node stepped into) for the active pairs.
+        """
+        node = np.tile(self.roots, len(X))
+        # Offset of each pair's row in the flattened X
+        row_start = np.repeat(np.arange(0, X.size, self.n_features_in_), self.n_trees)
+        values = np.ascontiguousarray(X).ravel()
+        has_missing = self._is_missing(values).any()
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            cell = row_start[active] + self.feature[current]
+            x = values[cell]
+            go_left = x <= self.threshold[current]
+            if has_missing:
+                go_left |= self._is_missing(x) & self.missing_left[current]
+            current = self.children[2 * current + go_left]
+            if path is not None:
+                path.append((cell, current))
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        return node.reshape(len(X), self.n_trees)
+
+    def _is_missing(self, values):
+        if self.bin_edges is None:
+            return np.isnan(values)
+        return values == self.missing_bin
+
+    def decision_values(self, X):
+        """
+        Summed leaf values: probabilities for averaging ensembles, raw
+        scores (baseline included) for boosting, shape (n_rows, n_outputs)
+        """
+        X = self._validate(X)
+        if self.bin_edges is not None:
+            X = self._bin(X)
+        output = np.empty((len(X), self.value.shape[1]), dtype=self.value.dtype)
+        for start in range(0, len(X), CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            output[start:start + len(chunk)] = self.value[self._leaves(chunk)].sum(axis=1)
+        if self.baseline is not None:
+            output += self.baseline
+        return output
+
+    def expected_values(self):
+        """
+        Expected output of every node over the training data, shape
+        (n_nodes, n_outputs), and the change in expected output on entering
+        each node from its parent (0 at the roots)
+        """
+        if self._path_values is None:
+            if self.cover is None:
+                raise ValueError("Explanations need the node covers of the fitted trees")
+            expected = self.value.astype(np.float64)
+            parent = np.arange(self.n_nodes)
+            # Internal nodes level by level, then averaged bottom-up
+            levels = []
+            frontier = self.roots[~self.is_leaf[self.roots]]
+            while frontier.size:
+                levels.append(frontier)
+                parent[self.left[frontier]] = frontier
+                parent[self.right[frontier]] = frontier
+                children = np.concatenate([self.left[frontier], self.right[frontier]])
+                frontier = children[~self.is_leaf[children]]
+            for nodes in reversed(levels):
+                left, right = self.left[nodes], self.right[nodes]
+                total = self.cover[left] + self.cover[right]
+                share = np.divide(self.cover[left], total, out=np.full(len(nodes), 0.5),
+                                  where=total > 0)[:, np.newaxis]
+                expected[nodes] = share * expected[left] + (1 - share) * expected[right]
+            self._path_values = expected, expected - expected[parent]
+        return self._path_values
+
+    def contributions(self, X):
+        """
+        Path contributions of every feature to the decision values
+
+        Returns:
+        --------
+        bias : array of shape (n_outputs,)
+            Expected decision value over the training data (baseline included)
+        contributions : array of shape (n_rows, n_features, n_outputs)
+            Summed over features and added to ``bias``, the decision values
+        """
+        expected, delta = self.expected_values()
+        X = self._validate(X)
+        if self.bin_edges is not None:
+            X = self._bin(X)
+        n_outputs = self.value.shape[1]
+        contributions = np.empty((len(X), self.n_features_in_, n_outputs))
+        for start in range(0, len(X), CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            path = []
+            self._leaves(chunk, path=path)
+            cells = np.concatenate([cell for cell, _ in path]) if path else np.empty(0, np.intp)
+            nodes = np.concatenate([node for _, node in path]) if path else np.empty(0, np.intp)
+            for k in range(n_outputs):
+                contributions[start:start + len(chunk), :, k] = np.bincount(
+                    cells, weights=delta[nodes, k], minlength=chunk.size
+                ).reshape(chunk.shape)
+        bias = expected[self.roots].sum(axis=0)
+        if self.baseline is not None:
+            bias = bias + self.baseline
+        return bias, contributions
+
+    def predict_proba(self, X):
+        return self.proba_from_decision(self.decision_values(X))
+
+    def proba_from_decision(self, values):
+        """Probabilities from decision values (see ``decision_values``)"""
+        if self.loss is None:
+            return values
+        if values.shape[1] == 1:
+            values = values[:, 0]
+        return self.loss.predict_proba(values)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _sklearn_nodes(tree_, value):
+    """Node arrays of a fitted sklearn Tree with the given per-node output"""
+    leaf = tree_.children_left == -1
+    return {
+        'feature': np.where(leaf, 0, tree_.feature),
+        'threshold': tree_.threshold,
+        'left': tree_.children_left,
+        'right': tree_.children_right,
+        'missing_left': np.asarray(tree_.missing_go_to_left, dtype=bool),
+        'leaf': leaf,
+        'value': value,
+        'depth': int(tree_.max_depth),
+        'cover': tree_.weighted_n_node_samples,
+    }
+
+
+class _MeanPredictor:
+    """Average of compiled predictors (fold ensembles of boosted models)"""
+
+    def __init__(self, predictors):
+        self.predictors = predictors
+        self.classes_ = predictors[0].classes_
+
+    def predict_proba(self, X):
+        return np.mean([predictor.predict_proba(X) for predictor in self.predictors], axis=0)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_predictor(model):
+    """
+    Vectorized predictor for ``model``, or None if it cannot be compiled
+
+    Soft-voting fold ensembles (train.FoldEnsembleClassifier) are compiled
+    member by member; forests are merged into one traversal.
+    """
+    members = getattr(model, 'estimators', None)
+    try:
+        if isinstance(members, list) and members and hasattr(model, 'predict_proba'):
+            compiled = [FlatTreeEnsemble.from_model(member) for member in members]
+            if all(predictor.loss is None for predictor in compiled):
+                return _merge_averaging(compiled)
+            return _MeanPredictor(compiled)
+        return FlatTreeEnsemble.from_model(model)
+    except TypeError as e:
+        logger.info(f"Serving {type(model).__name__} without a compiled predictor: {e}")
+        return None
+
+
+def _merge_averaging(predictors):
+    """One averaging ensemble equal to the mean of several"""
+    offsets = np.concatenate([[0], np.cumsum([p.n_nodes for p in predictors])[:-1]])
+    first = predictors[0]
+    return FlatTreeEnsemble(
+        feature=np.concatenate([p.feature for p in predictors]),
+        threshold=np.concatenate([p.threshold for p in predictors]),
+        left=np.concatenate([p.left + offset for p, offset in zip(predictors, offsets)]),
+        right=np.concatenate([p.right + offset for p, offset in zip(predictors, offsets)]),
+        missing_left=np.concatenate([p.missing_left for p in predictors]),
+        value=np.concatenate([p.value for p in predictors]) / len(predictors),
+        roots=np.concatenate([p.roots + offset for p, offset in zip(predictors, offsets)]),
+        max_depth=max(p.max_depth for p in predictors),
+        classes=first.classes_,
+        n_features=first.n_features_in_,
+        dtype=first.dtype,
+        feature_names=first.feature_names_in_,
+        cover=None if any(p.cover is None for p in predictors)
+        else np.concatenate([p.cover for p in predictors]),
+    )
@@ -128,6 +128,43 @@ class TestAPIEndpoints:
             assert data["count"] == 2
             assert len(data["predictions"]) == 2
 
+    def test_predict_explain_endpoint(self):
+        """Test explanations of single rows and batches add up to the prediction"""
+        patient = {
+            "age": 63,
+            "sex": 1,
+            "cp": 3,
+            "trestbps": 145,
+            "chol": 233,
+            "fbs": 1,
+            "restecg": 0,
+            "thalach": 150,
+            "exang": 0,
+            "oldpeak": 2.3,
+            "slope": 3,
+            "ca": 0,
+            "thal": 6
+        }
+
+        response = client.post("/predict/explain", json=patient)
+
+        # 503 without a model, 501 for a model type that cannot be explained
+        if response.status_code == 200:
+            data = response.json()
+            assert data["count"] == 1
+            explanation = data["explanations"][0]
+            assert set(explanation["contributions"]) == set(patient)
+            assert explanation["base_value"] + sum(explanation["contributions"].values()) == \
+                pytest.approx(explanation["output"])
+
+            prediction = client.post("/predict", json=patient).json()
+            assert explanation["probability"] == pytest.approx(prediction["probability"], abs=1e-6)
+
+            batch = client.post("/predict/explain", json=[patient, patient]).json()
+            assert batch["count"] == 2
+        else:
+            assert response.status_code in [501, 503]
+
 
 class TestInputValidation:
     """Test input validation"""
@@ -0,0 +1,156 @@
+"""
+Unit tests for model artifact formats
+"""
+import json
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sklearn.datasets import make_classification
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from artifacts import (
+    ARTIFACT_FORMATS, HAS_LZ4, HAS_ZSTD, artifact_path, dump_artifact, index_path,
+    load_artifact, load_fastest, save_artifacts, supports_format
+)
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Create a small classification dataset"""
+    return make_classification(n_samples=300, n_features=8, random_state=0)
+
+
+@pytest.fixture(scope="module")
+def models(data):
+    """Fitted models of every kind the trainer produces"""
+    X, y = data
+    return {
+        'logistic_regression': LogisticRegression(max_iter=500).fit(X, y),
+        'decision_tree': DecisionTreeClassifier(max_depth=4, random_state=0).fit(X, y),
+        'random_forest': RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0,
+                                                n_jobs=-1).fit(X, y),
+        'gradient_boosting': GradientBoostingClassifier(n_estimators=20, random_state=0).fit(X, y),
+    }
+
+
+class TestFormats:
+    """Test cases for writing and loading single formats"""
+
+    @pytest.mark.parametrize("artifact_format", ARTIFACT_FORMATS)
+    @pytest.mark.parametrize("name", ['logistic_regression', 'decision_tree',
+                                      'random_forest', 'gradient_boosting'])
+    def test_roundtrip(self, data, models, tmp_path, name, artifact_format):
+        """Test every supported format reproduces the model's probabilities"""
+        model = models[name]
+        if not supports_format(model, artifact_format):
+            pytest.skip(f"{artifact_format} not available for {name}")
+        X, _ = data
+
+        path = dump_artifact(model, tmp_path / "model.pkl", artifact_format)
+        loaded = load_artifact(path, artifact_format)
+        np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
+
+    def test_flat_only_for_trees(self, models):
+        """Test the flat format is offered for tree models only"""
+        assert supports_format(models['random_forest'], 'flat')
+        assert supports_format(models['gradient_boosting'], 'flat')
+        assert not supports_format(models['logistic_regression'], 'flat')
+
+    def test_flat_layout(self, models, tmp_path):
+        """Test the flat format stores every node in one contiguous array"""
+        forest = models['random_forest']
+        path = dump_artifact(forest, tmp_path / "model.pkl", 'flat')
+
+        nodes = np.load(path / "nodes.npy", mmap_mode='r')
+        offsets = np.load(path / "offsets.npy")
+        assert len(nodes) == offsets[-1] == sum(tree.tree_.node_count for tree in forest.estimators_)
+        assert len(offsets) == len(forest.estimators_) + 1
+
+    def test_compressed_formats_are_smaller(self, models, tmp_path):
+        """Test compression shrinks a forest"""
+        forest = models['random_forest']
+        plain = dump_artifact(forest, tmp_path / "model.pkl", 'pickle')
+        compressed = dump_artifact(forest, tmp_path / "model.pkl", 'zlib')
+        assert compressed.stat().st_size < plain.stat().st_size
+
+    def test_unknown_format(self, models, tmp_path):
+        """Test unknown formats are rejected"""
+        with pytest.raises(ValueError):
+            save_artifacts(models['random_forest'], tmp_path / "model.pkl", formats=['bzip9'])
+
+
+class TestSaveAndLoadFastest:
+    """Test cases for the artifact index"""
+
+    def test_index(self, models, tmp_path):
+        """Test every written format is measured and indexed"""
+        model_path = tmp_path / "best_model.pkl"
+        results = save_artifacts(models['random_forest'], model_path, formats=ARTIFACT_FORMATS,
+                                 n_repeats=1)
+
+        written = {result['format'] for result in results}
+        assert {'pickle', 'zlib', 'flat'} <= written
+        assert ('lz4' in written) == HAS_LZ4
+        assert ('zstd' in written) == HAS_ZSTD
+        for result in results:
+            assert result['size_bytes'] > 0 and result['load_ms'] > 0
+            assert artifact_path(model_path, result['format']).exists()
+
+        index = json.loads(index_path(model_path).read_text())
+        assert index['fastest'] == min(results, key=lambda result: result['load_ms'])['format']
+
+    def test_load_fastest(self, data, models, tmp_path):
+        """Test the variant indexed as fastest is loaded"""
+        X, _ = data
+        model_path = tmp_path / "best_model.pkl"
+        save_artifacts(models['gradient_boosting'], model_path, formats=['zlib', 'flat'],
+                       n_repeats=1)
+        index = json.loads(index_path(model_path).read_text())
+
+        model, artifact_format = load_fastest(model_path)
+        assert artifact_format == index['fastest']
+        np.testing.assert_array_equal(model.predict_proba(X),
+                                      models['gradient_boosting'].predict_proba(X))
+
+    def test_stale_variants_removed(self, models, tmp_path):
+        """Test saving fewer formats deletes the variants of the previous model"""
+        model_path = tmp_path / "best_model.pkl"
+        save_artifacts(models['random_forest'], model_path, formats=['zlib', 'flat'], n_repeats=1)
+        save_artifacts(models['logistic_regression'], model_path, n_repeats=1)
+
+        assert not artifact_path(model_path, 'zlib').exists()
+        assert not artifact_path(model_path, 'flat').exists()
+        model, artifact_format = load_fastest(model_path)
+        assert artifact_format == 'pickle'
+        assert isinstance(model, LogisticRegression)
+
+    def test_index_ignored_when_model_changed(self, models, tmp_path):
+        """Test a pickle rewritten without the index is loaded directly"""
+        import joblib
+
+        model_path = tmp_path / "best_model.pkl"
+        save_artifacts(models['random_forest'], model_path, formats=['zlib', 'flat'], n_repeats=1)
+        joblib.dump(models['logistic_regression'], model_path)
+
+        model, artifact_format = load_fastest(model_path)
+        assert artifact_format == 'pickle'
+        assert isinstance(model, LogisticRegression)
+
+    def test_without_index(self, models, tmp_path):
+        """Test a plain pickle without an index is loaded"""
+        import joblib
+
+        model_path = tmp_path / "best_model.pkl"
+        joblib.dump(models['decision_tree'], model_path)
+        _, artifact_format = load_fastest(model_path)
+        assert artifact_format == 'pickle'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
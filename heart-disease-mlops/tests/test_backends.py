@@ -0,0 +1,186 @@
+"""
+Unit tests for execution backends
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from joblib import Parallel, delayed
+from backends import HAS_DASK, ExecutionBackend, fanout_stats, make_backend
+from train import ModelTrainer
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample training and test data"""
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(rng.normal(size=(120, 5)), columns=[f'feature_{i}' for i in range(5)])
+    y = (X['feature_0'] + rng.normal(scale=0.5, size=120) > 0).astype(int).to_numpy()
+    return X[:90], y[:90], X[90:], y[90:]
+
+
+def _backend_name():
+    from joblib.parallel import get_active_backend
+    return type(get_active_backend()[0]).__name__
+
+
+class TestExecutionBackend:
+    """Test cases for ExecutionBackend"""
+
+    def test_unknown_backend_raises_error(self):
+        """Test unknown backend names are rejected"""
+        with pytest.raises(ValueError, match="Unknown execution backend"):
+            ExecutionBackend('spark')
+
+    def test_make_backend(self):
+        """Test names and None become backends and instances pass through"""
+        backend = ExecutionBackend('threading', n_jobs=2)
+        assert make_backend(backend) is backend
+        assert make_backend('sequential').name == 'sequential'
+        assert make_backend(None).name == 'loky'
+
+    @pytest.mark.parametrize("name,n_jobs,expected", [
+        ('sequential', -1, 1), ('threading', 3, 3), ('loky', None, 1),
+    ])
+    def test_n_workers(self, name, n_jobs, expected):
+        """Test the number of concurrent tasks follows the joblib n_jobs convention"""
+        assert ExecutionBackend(name, n_jobs=n_jobs).n_workers() == expected
+
+    def test_context_selects_joblib_backend(self):
+        """Test joblib calls inside the context run on the chosen backend"""
+        with ExecutionBackend('threading', n_jobs=2).context():
+            assert _backend_name() == 'ThreadingBackend'
+            assert Parallel()(delayed(abs)(-i) for i in range(4)) == [0, 1, 2, 3]
+
+    def test_pickled_backend_shares_local_cluster(self):
+        """Test worker processes connect to the parent's LocalCluster instead of starting one"""
+        import pickle
+        from types import SimpleNamespace
+
+        backend = ExecutionBackend('loky')
+        assert pickle.loads(pickle.dumps(backend)).scheduler_address is None
+
+        backend._client = SimpleNamespace(scheduler=SimpleNamespace(address='tcp://127.0.0.1:8786'))
+        copy = pickle.loads(pickle.dumps(backend))
+        assert copy.scheduler_address == 'tcp://127.0.0.1:8786'
+        assert copy._client is None
+        # The parent still owns (and closes) its cluster
+        assert backend.scheduler_address is None
+
+    @pytest.mark.skipif(not HAS_DASK, reason="dask.distributed is not installed")
+    def test_dask_local_cluster(self, sample_data):
+        """Test the LocalCluster stand-in runs cross-validation fits"""
+        X_train, y_train, X_test, y_test = sample_data
+        backend = ExecutionBackend('dask', local_workers=2)
+        try:
+            trainer = ModelTrainer(experiment_name="test_backends", evaluation='cv', cv_folds=3,
+                                   backend=backend)
+            _, metrics = trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+            assert backend.n_workers() == 2
+            assert 'oof_roc_auc' in metrics
+        finally:
+            backend.close()
+
+
+class TestFanoutStats:
+    """Test cases for fanout_stats"""
+
+    def test_statistics(self):
+        """Test stragglers and efficiency are computed from task times"""
+        stats = fanout_stats([1.0, 1.0, 1.0, 3.0], wall_seconds=3.0, n_workers=4, prefix='cv')
+
+        assert stats['cv_n_tasks'] == 4
+        assert stats['cv_task_seconds_total'] == 6.0
+        assert stats['cv_task_seconds_p50'] == 1.0
+        assert stats['cv_straggler_ratio'] == 3.0
+        assert stats['cv_parallel_efficiency'] == pytest.approx(0.5)
+
+    def test_no_tasks(self):
+        """Test an empty call gives no statistics"""
+        assert fanout_stats([], 0.0, 4, 'cv') == {}
+
+
+class TestTrainerBackend:
+    """Test cases for ModelTrainer with an execution backend"""
+
+    @pytest.mark.parametrize("evaluation", ['holdout', 'cv'])
+    def test_fanout_logged(self, sample_data, evaluation):
+        """Test cross-validation fan-out statistics are logged with the run"""
+        from mlflow.tracking import MlflowClient
+        from tracking import wait as wait_for_tracking
+
+        X_train, y_train, X_test, y_test = sample_data
+        trainer = ModelTrainer(experiment_name="test_backends", evaluation=evaluation,
+                               cv_n_jobs=2, backend='threading')
+        trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+        wait_for_tracking()
+
+        run = MlflowClient().get_run(trainer._run.run_id)
+        assert run.data.metrics['cv_n_tasks'] == 5
+        assert run.data.metrics['cv_n_workers'] == 2
+        assert run.data.metrics['cv_straggler_ratio'] >= 1
+
+    @pytest.mark.parametrize("cv_n_jobs, expected", [(None, 3), (2, 2)])
+    def test_cv_n_jobs_through_backend(self, sample_data, monkeypatch, cv_n_jobs, expected):
+        """Test cross-validation parallelism comes from the backend context"""
+        import train
+        from joblib import effective_n_jobs
+
+        X_train, y_train, X_test, y_test = sample_data
+        trainer = ModelTrainer(experiment_name="test_backends", evaluation='cv', cv_folds=3,
+                               cv_n_jobs=cv_n_jobs, backend=ExecutionBackend('threading', n_jobs=3))
+        used = []
+        cross_validate = train.cross_validate
+
+        def recording_cross_validate(*args, **kwargs):
+            used.append((kwargs['n_jobs'], effective_n_jobs(kwargs['n_jobs'])))
+            return cross_validate(*args, **kwargs)
+
+        monkeypatch.setattr(train, 'cross_validate', recording_cross_validate)
+        trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+        assert used == [(None, expected)]
+
+    def test_worker_memory_sampled_once(self, sample_data, monkeypatch):
+        """Test worker memory is probed on the first cross-validation only"""
+        X_train, y_train, X_test, y_test = sample_data
+        trainer = ModelTrainer(experiment_name="test_backends", evaluation='cv', cv_folds=3,
+                               cv_n_jobs=2, backend='threading')
+        calls = []
+        probe = trainer._worker_memory
+        monkeypatch.setattr(trainer, '_worker_memory',
+                            lambda *args: calls.append(args) or probe(*args))
+
+        trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+        trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+        assert len(calls) == 1
+
+    def test_search_fanout_logged(self, sample_data):
+        """Test hyperparameter searches log fan-out statistics"""
+        from mlflow.tracking import MlflowClient
+        from tracking import wait as wait_for_tracking
+
+        X_train, y_train, _, _ = sample_data
+        trainer = ModelTrainer(experiment_name="test_backends",
+                               backend=ExecutionBackend('threading', n_jobs=2))
+        trainer.hyperparameter_tuning('logistic_regression', X_train, y_train, {'C': [0.1, 1.0]})
+
+        wait_for_tracking()
+        run = MlflowClient().get_run(trainer._run.run_id)
+        assert run.data.metrics['search_n_tasks'] == 10
+        assert run.data.tags['backend'] == 'threading'
+
+    def test_backend_survives_pickling(self):
+        """Test trainer options can be sent to train_all worker processes"""
+        import pickle
+
+        trainer = ModelTrainer(experiment_name="test_backends", backend='threading')
+        options = pickle.loads(pickle.dumps(trainer._options()))
+        assert options['backend'].name == 'threading'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,102 @@
+"""
+Unit tests for the raw 76-attribute cleveland.data parser
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from cleveland_parser import (
+    ATTRIBUTES, ParseReport, iter_arrays, iter_batches, read_cleveland, to_parquet
+)
+
+
+def format_record(values, per_line=8):
+    """Lay out one record over several lines, as in cleveland.data"""
+    tokens = [f"{value:g}" for value in values] + ['name']
+    return "\n".join(" ".join(tokens[i:i + per_line]) for i in range(0, len(tokens), per_line))
+
+
+@pytest.fixture
+def records():
+    """Valid records with some -9 (missing) values"""
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 300, size=(50, len(ATTRIBUTES))).astype(float)
+    values[:, ATTRIBUTES.index('oldpeak')] = rng.integers(0, 60, 50) / 10
+    values[rng.random(values.shape) < 0.05] = -9
+    return values
+
+
+@pytest.fixture
+def raw_file(records, tmp_path):
+    """Raw file of valid records"""
+    path = tmp_path / "cleveland.data"
+    path.write_text("\n".join(format_record(row) for row in records) + "\n")
+    return path
+
+
+class TestParser:
+    """Test cases for the streaming parser"""
+
+    @pytest.mark.parametrize("chunk_bytes", [7, 100, 1 << 20])
+    def test_records_reassembled(self, raw_file, records, chunk_bytes):
+        """Test multi-line records parse identically whatever the chunk size"""
+        report = ParseReport()
+        values = np.concatenate(list(iter_arrays(raw_file, report=report, chunk_bytes=chunk_bytes)))
+
+        expected = np.where(records == -9, np.nan, records)
+        np.testing.assert_array_equal(values, expected)
+        assert report.records == 50
+        assert report.malformed == 0
+
+    def test_malformed_records_are_skipped(self, records, tmp_path):
+        """Test bad records are reported without aborting the parse"""
+        short = format_record(records[1][:-1])
+        garbage = format_record(records[2]).replace(format_record(records[2]).split()[3], "x7#", 1)
+        path = tmp_path / "cleveland.data"
+        path.write_text("\n".join([format_record(records[0]), short, garbage,
+                                   format_record(records[3]), "1 2 3"]))
+
+        report = ParseReport()
+        df = read_cleveland(path, report=report)
+
+        assert len(df) == 2
+        assert df['id'].tolist() == [records[0][0], records[3][0]]
+        assert report.malformed == 3
+        reasons = [error['reason'] for error in report.errors]
+        assert reasons == [f"{len(ATTRIBUTES) - 1} values, expected {len(ATTRIBUTES)}",
+                           "non-numeric value", "truncated record (no 'name' token)"]
+        assert [error['record'] for error in report.errors] == [1, 2, 4]
+
+    def test_arrow_batches(self, raw_file):
+        """Test batches have the requested size, columns and nulls for -9"""
+        batches = list(iter_batches(raw_file, columns=['age', 'chol', 'num'], batch_rows=20,
+                                    chunk_bytes=500))
+
+        assert [batch.num_rows for batch in batches] == [20, 20, 10]
+        assert batches[0].schema.names == ['age', 'chol', 'num']
+        frame = pd.concat([batch.to_pandas() for batch in batches], ignore_index=True)
+        pd.testing.assert_frame_equal(frame, read_cleveland(raw_file, columns=['age', 'chol', 'num']))
+
+    def test_unknown_column_raises_error(self, raw_file):
+        """Test unknown attributes are rejected"""
+        with pytest.raises(ValueError, match="Unknown attributes"):
+            next(iter_batches(raw_file, columns=['age', 'nope']))
+
+    def test_to_parquet(self, raw_file, tmp_path):
+        """Test streaming conversion to Parquet"""
+        pytest.importorskip("pyarrow")
+        output = tmp_path / "cleveland_full.parquet"
+        report = to_parquet(raw_file, output, batch_rows=16)
+
+        assert report.records == 50
+        df = pd.read_parquet(output)
+        assert list(df.columns) == ATTRIBUTES
+        pd.testing.assert_frame_equal(df, read_cleveland(raw_file))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,133 @@
+"""
+Unit tests for typed columnar dataset copies
+"""
+import os
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+pytest.importorskip("pyarrow")
+
+from columnar import (
+    apply_filters, columnar_path, find_columnar_copy, read_columnar, source_digest, write_columnar
+)
+from data_cache import file_digest
+from preprocessing import HeartDiseasePreprocessor, apply_schema
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """CSV with the dataset schema (and missing values) plus its Parquet copy"""
+    rng = np.random.default_rng(0)
+    n_rows = 500
+    df = pd.DataFrame({
+        'age': rng.integers(29, 78, n_rows),
+        'sex': rng.integers(0, 2, n_rows),
+        'cp': rng.integers(1, 5, n_rows),
+        'trestbps': rng.integers(94, 200, n_rows),
+        'chol': rng.integers(126, 564, n_rows),
+        'fbs': rng.integers(0, 2, n_rows),
+        'restecg': rng.integers(0, 3, n_rows),
+        'thalach': rng.integers(71, 202, n_rows),
+        'exang': rng.integers(0, 2, n_rows),
+        'oldpeak': rng.integers(0, 62, n_rows) / 10,
+        'slope': rng.integers(1, 4, n_rows),
+        'ca': np.where(rng.random(n_rows) < 0.05, np.nan, rng.integers(0, 4, n_rows)),
+        'thal': rng.choice([3, 6, 7], n_rows),
+        'target': rng.integers(0, 2, n_rows),
+    })
+    csv_path = tmp_path / "heart_disease.csv"
+    df.to_csv(csv_path, index=False)
+    parquet_path = write_columnar(apply_schema(df), columnar_path(csv_path), row_group_size=100,
+                                  source_digest=file_digest(csv_path))
+    return csv_path, parquet_path
+
+
+class TestColumnarCopy:
+    """Test cases for writing and reading columnar copies"""
+
+    def test_round_trip_keeps_dtypes(self, dataset):
+        """Test the Parquet copy matches the compact CSV load exactly"""
+        csv_path, parquet_path = dataset
+        from_csv = HeartDiseasePreprocessor().load_data(csv_path, prefer_columnar=False)
+        from_parquet = read_columnar(parquet_path)
+
+        pd.testing.assert_frame_equal(from_parquet, from_csv)
+        assert str(from_parquet['ca'].dtype) == 'UInt8'
+
+    def test_feather_round_trip(self, dataset, tmp_path):
+        """Test Feather copies read back identically"""
+        csv_path, parquet_path = dataset
+        df = read_columnar(parquet_path)
+        feather_path = write_columnar(df, tmp_path / "copy.feather", file_format='feather')
+        pd.testing.assert_frame_equal(read_columnar(feather_path, columns=['age', 'ca']),
+                                      df[['age', 'ca']])
+
+    def test_projection_and_filters_match_csv(self, dataset):
+        """Test column projection and predicate pushdown agree with the CSV path"""
+        csv_path, parquet_path = dataset
+        filters = [[('age', '>=', 60), ('sex', '==', 1)], [('thal', 'in', [6])]]
+        columns = ['age', 'thal', 'target']
+        loader = HeartDiseasePreprocessor()
+
+        from_parquet = loader.load_data(csv_path, columns=columns, filters=filters)
+        from_csv = loader.load_data(csv_path, columns=columns, filters=filters, prefer_columnar=False)
+
+        assert list(from_parquet.columns) == columns
+        assert ((from_parquet['age'] >= 60) | (from_parquet['thal'] == 6)).all()
+        pd.testing.assert_frame_equal(from_parquet, from_csv)
+
+    def test_stale_copy_is_ignored(self, dataset):
+        """Test a copy of other content is not used, even when the CSV looks older"""
+        csv_path, parquet_path = dataset
+        assert source_digest(parquet_path) == file_digest(csv_path)
+        assert find_columnar_copy(csv_path) == parquet_path
+
+        df = pd.read_csv(csv_path)
+        df.loc[0, 'age'] += 1
+        df.to_csv(csv_path, index=False)
+        old = parquet_path.stat().st_mtime - 60
+        os.utime(csv_path, (old, old))
+        assert find_columnar_copy(csv_path) is None
+        assert HeartDiseasePreprocessor().load_data(csv_path)['age'][0] == df.loc[0, 'age']
+
+    def test_copy_without_digest_is_ignored(self, dataset):
+        """Test copies that do not record their source CSV count as stale"""
+        csv_path, parquet_path = dataset
+        write_columnar(read_columnar(parquet_path), parquet_path)
+        assert source_digest(parquet_path) is None
+        assert find_columnar_copy(csv_path) is None
+
+    def test_default_dtypes(self, dataset):
+        """Test compact=False gives pandas' default dtypes from CSV and columnar sources"""
+        csv_path, parquet_path = dataset
+        loader = HeartDiseasePreprocessor()
+        from_csv = loader.load_data(csv_path, compact=False)
+        from_parquet = loader.load_data(parquet_path, compact=False)
+
+        pd.testing.assert_frame_equal(from_csv, pd.read_csv(csv_path))
+        pd.testing.assert_series_equal(from_parquet.dtypes, from_csv.dtypes)
+        np.testing.assert_allclose(from_parquet.to_numpy(), from_csv.to_numpy(), rtol=1e-6)
+
+    def test_partitioned_copy(self, dataset, tmp_path):
+        """Test partition directories are pruned by filters on the partition column"""
+        csv_path, parquet_path = dataset
+        df = read_columnar(parquet_path)
+        partitioned = write_columnar(df, tmp_path / "partitioned", partition_cols=['thal'])
+
+        assert sorted(p.name for p in partitioned.iterdir()) == ['thal=3', 'thal=6', 'thal=7']
+        subset = read_columnar(partitioned, filters=[('thal', '=', 7)])
+        assert len(subset) == (df['thal'] == 7).sum()
+
+    def test_not_in_excludes_missing(self):
+        """Test the pandas fallback treats missing values like pyarrow"""
+        df = pd.DataFrame({'ca': pd.array([0, None, 2], dtype='UInt8')})
+        assert apply_filters(df, [('ca', 'not in', [0])])['ca'].tolist() == [2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,55 @@
+"""
+Unit tests for compatibility with the Python version the image and CI use
+"""
+import ast
+import pytest
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+
+def _evaluated_annotations(tree):
+    """Annotations Python evaluates at import time (all of them without postponed evaluation)"""
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            arguments = node.args
+            for arg in arguments.posonlyargs + arguments.args + arguments.kwonlyargs \
+                    + [arguments.vararg, arguments.kwarg]:
+                if arg is not None and arg.annotation is not None:
+                    yield arg.annotation
+            if node.returns is not None:
+                yield node.returns
+        elif isinstance(node, ast.AnnAssign):
+            yield node.annotation
+
+
+def _postponed(tree):
+    return any(isinstance(node, ast.ImportFrom) and node.module == '__future__'
+               and any(alias.name == 'annotations' for alias in node.names)
+               for node in tree.body)
+
+
+class TestPython39:
+    """Test cases for source that must import on Python 3.9 (python:3.9-slim, CI)"""
+
+    @pytest.mark.parametrize("path", sorted(SRC_DIR.glob("*.py")), ids=lambda p: p.name)
+    def test_no_pep604_annotations(self, path):
+        """Test annotations do not use X | Y unions, which fail at import before 3.10"""
+        tree = ast.parse(path.read_text(), filename=str(path))
+        if _postponed(tree):
+            return
+        unions = [
+            f"{path.name}:{node.lineno}" for annotation in _evaluated_annotations(tree)
+            for node in ast.walk(annotation)
+            if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr)
+        ]
+        assert not unions, f"Use typing.Union/Optional instead of X | Y: {unions}"
+
+    @pytest.mark.parametrize("path", sorted(SRC_DIR.glob("*.py")), ids=lambda p: p.name)
+    def test_parses_as_python39(self, path):
+        """Test the source only uses Python 3.9 syntax (no match statements, ...)"""
+        ast.parse(path.read_text(), filename=str(path), feature_version=(3, 9))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,106 @@
+"""
+Unit tests for the prepared-data cache
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from data_cache import PreparedDataCache
+from preprocessing import HeartDiseasePreprocessor, prepare_data
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """Write a small but stratifiable heart disease CSV"""
+    rng = np.random.default_rng(0)
+    n_samples = 40
+    data = pd.DataFrame({
+        'age': rng.integers(30, 78, n_samples),
+        'sex': rng.integers(0, 2, n_samples),
+        'cp': rng.integers(1, 5, n_samples),
+        'trestbps': rng.integers(95, 190, n_samples),
+        'chol': rng.integers(150, 400, n_samples),
+        'fbs': rng.integers(0, 2, n_samples),
+        'restecg': rng.integers(0, 3, n_samples),
+        'thalach': rng.integers(90, 200, n_samples),
+        'exang': rng.integers(0, 2, n_samples),
+        'oldpeak': rng.uniform(0, 4, n_samples).round(1),
+        'slope': rng.integers(1, 4, n_samples),
+        'ca': rng.integers(0, 4, n_samples),
+        'thal': rng.choice([3, 6, 7], n_samples),
+        'target': np.tile([0, 1], n_samples // 2)
+    })
+    filepath = tmp_path / "heart.csv"
+    data.to_csv(filepath, index=False)
+    return filepath
+
+
+class TestPreparedDataCache:
+    """Test cases for PreparedDataCache"""
+
+    def test_cache_miss_then_hit(self, data_file, tmp_path):
+        """Test second call is served from the cache with identical outputs"""
+        cache_dir = tmp_path / "cache"
+
+        first = prepare_data(data_file, cache_dir=cache_dir)
+        assert len(PreparedDataCache(cache_dir).entries()) == 1
+
+        second = prepare_data(data_file, cache_dir=cache_dir)
+        X_train, X_test, y_train, y_test, preprocessor = second
+
+        pd.testing.assert_frame_equal(X_train, first[0])
+        pd.testing.assert_frame_equal(X_test, first[1])
+        pd.testing.assert_series_equal(y_train, first[2])
+        pd.testing.assert_series_equal(y_test, first[3])
+
+        # Restored preprocessor transforms like the original one
+        assert isinstance(preprocessor, HeartDiseasePreprocessor)
+        assert preprocessor.is_fitted
+        raw = pd.read_csv(data_file).drop('target', axis=1)
+        pd.testing.assert_frame_equal(preprocessor.transform(raw), first[4].transform(raw))
+
+    def test_cached_matrices_are_memory_mapped(self, data_file, tmp_path):
+        """Test cache hits return memory-mapped feature matrices"""
+        cache_dir = tmp_path / "cache"
+        prepare_data(data_file, cache_dir=cache_dir)
+        X_train = prepare_data(data_file, cache_dir=cache_dir)[0]
+
+        values = X_train.to_numpy()
+        while values.base is not None and not isinstance(values, np.memmap):
+            values = values.base
+        assert isinstance(values, np.memmap)
+
+    def test_key_changes_with_inputs(self, data_file, tmp_path):
+        """Test key depends on data content, split parameters and code version"""
+        cache = PreparedDataCache(tmp_path / "cache")
+        base_key = cache.key(data_file, 0.2, 42, "v1")
+
+        assert cache.key(data_file, 0.2, 42, "v1") == base_key
+        assert cache.key(data_file, 0.3, 42, "v1") != base_key
+        assert cache.key(data_file, 0.2, 7, "v1") != base_key
+        assert cache.key(data_file, 0.2, 42, "v2") != base_key
+
+        with open(data_file, 'a') as f:
+            f.write("50,1,2,120,200,0,0,150,0,1.0,2,0,3,1\n")
+        assert cache.key(data_file, 0.2, 42, "v1") != base_key
+
+    def test_prune_stale_entries(self, data_file, tmp_path):
+        """Test pruning removes entries whose data file changed"""
+        cache_dir = tmp_path / "cache"
+        prepare_data(data_file, cache_dir=cache_dir)
+        cache = PreparedDataCache(cache_dir)
+
+        assert cache.prune(stale=True) == []
+
+        with open(data_file, 'a') as f:
+            f.write("50,1,2,120,200,0,0,150,0,1.0,2,0,3,1\n")
+        assert len(cache.prune(stale=True)) == 1
+        assert cache.entries() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
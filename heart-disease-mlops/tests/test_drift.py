@@ -0,0 +1,105 @@
+"""
+Unit tests for streaming feature-drift statistics
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from drift import DriftReference, FeatureDriftMonitor, bin_counts
+
+
+@pytest.fixture
+def reference_data():
+    """Create a standardized reference frame with a binary feature"""
+    rng = np.random.default_rng(42)
+    n_samples = 2000
+    return pd.DataFrame({
+        'age': rng.normal(0, 1, n_samples),
+        'chol': rng.normal(0, 1, n_samples),
+        'sex': rng.choice([-1.4, 0.7], n_samples),
+    })
+
+
+class TestDriftReference:
+    """Test cases for DriftReference"""
+
+    def test_bins_match_searchsorted(self, reference_data):
+        """Test vectorized binning agrees with per-feature searchsorted"""
+        reference = DriftReference.from_frame(reference_data)
+        values = reference_data.to_numpy()
+
+        counts = bin_counts(values, reference.cut_points)
+        for j in range(values.shape[1]):
+            expected = np.bincount(
+                np.searchsorted(reference.cut_points[j], values[:, j], side='right'),
+                minlength=reference.n_bins
+            )
+            np.testing.assert_array_equal(counts[j], expected)
+
+    def test_save_and_load(self, reference_data, tmp_path):
+        """Test reference round-trips through JSON"""
+        reference = DriftReference.from_frame(reference_data)
+        filepath = tmp_path / "drift_reference.json"
+        reference.save(filepath)
+
+        loaded = DriftReference.load(filepath)
+        assert loaded.feature_names == reference.feature_names
+        np.testing.assert_array_equal(loaded.cut_points, reference.cut_points)
+        np.testing.assert_allclose(loaded.proportions, reference.proportions)
+
+
+class TestFeatureDriftMonitor:
+    """Test cases for FeatureDriftMonitor"""
+
+    def test_running_moments_match_numpy(self, reference_data):
+        """Test batched Welford updates match full-data mean and std"""
+        monitor = FeatureDriftMonitor(DriftReference.from_frame(reference_data))
+        live = reference_data.sample(frac=1.0, random_state=0) * 2 + 1
+
+        for start in range(0, len(live), 137):
+            monitor.update(live.iloc[start:start + 137])
+        monitor.update(live.iloc[:1].to_numpy()[0])
+
+        full = pd.concat([live, live.iloc[:1]]).to_numpy()
+        np.testing.assert_allclose(monitor.mean, full.mean(axis=0))
+        np.testing.assert_allclose(monitor.std(), full.std(axis=0))
+        assert monitor.n[0] == len(full)
+
+    def test_drift_scores(self, reference_data):
+        """Test PSI/KS stay small without drift and grow with a shift"""
+        reference = DriftReference.from_frame(reference_data)
+
+        stable = FeatureDriftMonitor(reference)
+        stable.update(reference_data)
+        assert np.all(stable.psi() < 0.01)
+        assert np.all(stable.ks() < 0.01)
+
+        shifted = FeatureDriftMonitor(reference)
+        shifted_data = reference_data.copy()
+        shifted_data['age'] += 1.0
+        shifted.update(shifted_data)
+        assert shifted.psi()[0] > 0.25
+        assert shifted.ks()[0] > 0.3
+        assert shifted.psi()[1] < 0.01
+
+    def test_collect_gauges(self, reference_data):
+        """Test Prometheus gauges are only produced once data arrives"""
+        monitor = FeatureDriftMonitor(DriftReference.from_frame(reference_data))
+        assert list(monitor.collect()) == []
+
+        monitor.update(reference_data.iloc[:10])
+        families = {family.name: family for family in monitor.collect()}
+
+        assert 'feature_drift_psi' in families
+        assert 'feature_drift_ks' in families
+        labels = [sample.labels['feature'] for sample in families['feature_drift_psi'].samples]
+        assert labels == ['age', 'chol', 'sex']
+        assert families['feature_drift_observations'].samples[0].value == 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,158 @@
+"""
+Unit tests for per-feature prediction explanations
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sklearn.datasets import make_classification
+from sklearn.ensemble import (
+    GradientBoostingClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+)
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import SVC
+
+from explain import ExplainerCache, LinearExplainer, TreeExplainer, make_explainer
+from precision import LinearPredictor
+from tree_predictor import FlatTreeEnsemble, compile_predictor
+from train import FoldEnsembleClassifier
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Binary and three-class targets over 13 features, as a DataFrame"""
+    X, y = make_classification(n_samples=400, n_features=13, n_informative=6, random_state=0)
+    X = pd.DataFrame(X, columns=[f'feature_{i}' for i in range(13)])
+    y3 = y + (X['feature_0'] > 1).to_numpy()
+    return X, y, y3
+
+
+MODELS = {
+    'logistic_regression': lambda: LogisticRegression(max_iter=1000),
+    'random_forest': lambda: RandomForestClassifier(n_estimators=30, max_depth=8, random_state=0),
+    'gradient_boosting': lambda: GradientBoostingClassifier(n_estimators=30, random_state=0),
+    'hist_gradient_boosting': lambda: HistGradientBoostingClassifier(max_iter=30, random_state=0),
+}
+
+
+class TestAdditivity:
+    """Test cases for contributions summing to the model output"""
+
+    @pytest.mark.parametrize("name", list(MODELS))
+    @pytest.mark.parametrize("n_classes", [2, 3])
+    def test_sums_to_output(self, data, name, n_classes):
+        """Test base value plus contributions gives the model's probabilities"""
+        X, y, y3 = data
+        model = MODELS[name]().fit(X, y if n_classes == 2 else y3)
+        explanation = make_explainer(model).explain(X)
+
+        assert explanation.contributions.shape[:2] == X.shape
+        np.testing.assert_allclose(explanation.contributions.sum(axis=1) + explanation.base_values,
+                                   explanation.outputs, atol=1e-10)
+        np.testing.assert_allclose(explanation.probabilities, model.predict_proba(X),
+                                   rtol=1e-6, atol=1e-8)
+
+    def test_linear_contributions(self, data):
+        """Test linear contributions are the coefficients times the features"""
+        X, y, _ = data
+        model = LogisticRegression(max_iter=1000).fit(X, y)
+        explanation = LinearExplainer(model).explain(X)
+
+        np.testing.assert_allclose(explanation.contributions[:, :, 0], X.to_numpy() * model.coef_[0])
+        np.testing.assert_allclose(explanation.outputs[:, 0], model.decision_function(X))
+        assert explanation.output_space == 'log_odds'
+
+    def test_missing_values(self, data):
+        """Test rows with NaN are explained along their learned path"""
+        X, y, _ = data
+        X = X.copy()
+        X.iloc[::7, 2] = np.nan
+        model = MODELS['hist_gradient_boosting']().fit(X, y)
+        explanation = make_explainer(model).explain(X)
+        np.testing.assert_allclose(explanation.probabilities, model.predict_proba(X), atol=1e-8)
+
+
+class TestTreeExpectations:
+    """Test cases for per-node expected values"""
+
+    def test_forest_expectations(self, data):
+        """Test expectations equal sklearn's node class proportions for forests"""
+        X, y, _ = data
+        model = MODELS['random_forest']().fit(X, y)
+        predictor = FlatTreeEnsemble.from_model(model)
+        expected, delta = predictor.expected_values()
+
+        np.testing.assert_allclose(expected, predictor.value, atol=1e-12)
+        np.testing.assert_array_equal(delta[predictor.roots], 0)
+
+    def test_informative_feature(self, data):
+        """Test the feature that decides the target gets the largest contributions"""
+        X, _, _ = data
+        y = (X['feature_4'] > 0).astype(int)
+        explanation = make_explainer(MODELS['random_forest']().fit(X, y)).explain(X)
+        importance = np.abs(explanation.contributions[:, :, 1]).mean(axis=0)
+        assert np.argmax(importance) == 4
+        assert explanation.output_space == 'probability'
+
+    def test_single_row_and_chunks(self, data, monkeypatch):
+        """Test batches split into chunks explain like single rows"""
+        import tree_predictor
+
+        X, y, _ = data
+        explainer = make_explainer(MODELS['gradient_boosting']().fit(X, y))
+        single = explainer.explain(X.iloc[[3]]).contributions
+        monkeypatch.setattr(tree_predictor, 'CHUNK_ROWS', 64)
+        np.testing.assert_allclose(explainer.explain(X).contributions[[3]], single)
+
+
+class TestMakeExplainer:
+    """Test cases for make_explainer and ExplainerCache"""
+
+    def test_dispatch(self, data):
+        """Test each model type gets its explainer"""
+        X, y, _ = data
+        linear = LogisticRegression(max_iter=1000).fit(X, y)
+        forests = FoldEnsembleClassifier([MODELS['random_forest']().set_params(random_state=i)
+                                          .fit(X, y) for i in range(2)])
+
+        assert isinstance(make_explainer(linear), LinearExplainer)
+        assert isinstance(make_explainer(forests), TreeExplainer)
+        assert make_explainer(SVC().fit(X, y)) is None
+        np.testing.assert_allclose(make_explainer(forests).explain(X).probabilities,
+                                   forests.predict_proba(X))
+
+    def test_served_predictor(self, data):
+        """Test explanations follow the reduced-precision predictor being served"""
+        X, y, _ = data
+        linear = LogisticRegression(max_iter=1000).fit(X, y)
+        quantized = LinearPredictor(linear, 'int8')
+        explanation = make_explainer(linear, quantized).explain(X)
+        np.testing.assert_allclose(explanation.probabilities, quantized.predict_proba(X), atol=1e-6)
+
+        forest = MODELS['random_forest']().fit(X, y)
+        predictor = compile_predictor(forest).with_precision('int8')
+        explainer = make_explainer(forest, predictor)
+        assert explainer.ensemble is predictor
+        np.testing.assert_allclose(explainer.explain(X).probabilities, forest.predict_proba(X),
+                                   atol=1e-6)
+
+    def test_cache(self, data):
+        """Test explainers are built once per model version"""
+        X, y, _ = data
+        model = LogisticRegression(max_iter=1000).fit(X, y)
+        cache = ExplainerCache(maxsize=2)
+
+        first = cache.get('v1', model)
+        assert cache.get('v1', model) is first
+        cache.get('v2', model)
+        cache.get('v3', model)
+        assert len(cache) == 2
+        assert cache.get('v1', model) is not first
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
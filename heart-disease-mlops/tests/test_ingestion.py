@@ -0,0 +1,130 @@
+"""
+Unit tests for multi-site ingestion
+"""
+import json
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+pytest.importorskip("pyarrow")
+
+from download_data import INGEST_REPORT_FILE, ingest_sites, parse_site_file, site_name
+from manifest import IngestManifest
+from preprocessing import HeartDiseasePreprocessor
+
+ROWS = {
+    'cleveland': [
+        "63.0,1.0,1.0,145.0,233.0,1.0,2.0,150.0,0.0,2.3,3.0,0.0,6.0,0",
+        "67.0,1.0,4.0,160.0,286.0,0.0,2.0,108.0,1.0,1.5,2.0,3.0,3.0,2",
+        "67.0,1.0,4.0,120.0,229.0,0.0,2.0,129.0,1.0,2.6,2.0,?,7.0,1",
+    ],
+    'hungarian': [
+        "28,1,2,130,132,0,2,185,0,0,?,?,?,0",
+        "29,1,2,120,243,0,0,160,0,0,?,?,?,0",
+        "30,0,1,170,237,0,1,170,0,0,?,?,6,?",
+    ],
+    'switzerland': [
+        "32,1,1,95,0,?,0,127,0,.7,1,?,?,1",
+        "34,1,4,115,0,?,?,154,0,.2,1,?,?,1",
+        "35,1,4,abc,0,?,0,130,1,-1.5,2,?,7,3",
+        "36,1,4,110,0,?,0,125,1,1,2,?,6,1.5",
+    ],
+}
+
+
+@pytest.fixture
+def raw_dir(tmp_path):
+    """Raw directory with three sites' processed files"""
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    for site, lines in ROWS.items():
+        (raw / f"processed.{site}.data").write_text("\n".join(lines) + "\n")
+    return raw
+
+
+class TestIngestion:
+    """Test cases for parallel multi-site ingestion"""
+
+    def test_site_name(self):
+        """Test the site is taken from the file name"""
+        assert site_name("data/raw/processed.va.data") == 'va'
+
+    def test_parse_site_report(self, raw_dir, tmp_path):
+        """Test missing, invalid and out-of-schema values are counted"""
+        report = parse_site_file(raw_dir / "processed.switzerland.data", tmp_path / "out")
+
+        assert report['rows'] == 4
+        assert report['invalid_values'] == {'trestbps': 1}
+        assert report['schema_mismatches'] == {}
+        assert report['missing_values']['fbs'] == 4
+        assert report['class_counts'] == {'1': 4}
+        assert (tmp_path / "out" / "site=switzerland" / "part-00000.parquet").exists()
+
+    def test_rows_without_target_are_dropped(self, raw_dir, tmp_path):
+        """Test rows with a missing diagnosis are not ingested"""
+        report = parse_site_file(raw_dir / "processed.hungarian.data", tmp_path / "out")
+        assert report['rows'] == 2
+        assert report['dropped_rows'] == 1
+
+    def test_wrong_column_count_raises_error(self, tmp_path):
+        """Test files that are not in the 14-column format are rejected"""
+        path = tmp_path / "processed.broken.data"
+        path.write_text("1,2,3\n")
+        with pytest.raises(ValueError, match="expected 14 columns"):
+            parse_site_file(path, tmp_path / "out")
+
+    @pytest.mark.parametrize("max_workers", [1, 3])
+    def test_ingest_sites(self, raw_dir, tmp_path, max_workers):
+        """Test every site lands in one dataset partitioned by site"""
+        output = tmp_path / "sites"
+        reports = ingest_sites(raw_dir, output, max_workers=max_workers)
+
+        assert [r['site'] for r in reports] == ['cleveland', 'hungarian', 'switzerland']
+        assert json.loads((output / INGEST_REPORT_FILE).read_text()) == reports
+
+        df = HeartDiseasePreprocessor().load_data(output)
+        assert len(df) == 9
+        assert df.groupby('site').size().to_dict() == {'cleveland': 3, 'hungarian': 2,
+                                                       'switzerland': 4}
+        # One schema across sites, whether or not a site has missing values
+        assert str(df['ca'].dtype) == 'UInt8'
+        assert str(df['age'].dtype) == 'UInt8'
+        assert df['oldpeak'].dtype == np.float32
+        assert set(df['target']) == {0, 1}
+
+        swiss = HeartDiseasePreprocessor().load_data(output, filters=[('site', '=', 'switzerland')])
+        assert len(swiss) == 4
+
+    def test_only_changed_sites_are_parsed(self, raw_dir, tmp_path):
+        """Test a manifest skips unchanged sites and drops removed ones"""
+        output = tmp_path / "sites"
+        manifest = IngestManifest(tmp_path / "_manifest.json")
+        first = ingest_sites(raw_dir, output, max_workers=1, manifest=manifest)
+
+        cleveland = output / "site=cleveland" / "part-00000.parquet"
+        cleveland_mtime = cleveland.stat().st_mtime_ns
+        (raw_dir / "processed.hungarian.data").write_text(ROWS['hungarian'][0] + "\n")
+        (raw_dir / "processed.switzerland.data").unlink()
+
+        reports = ingest_sites(raw_dir, output, max_workers=1, manifest=manifest)
+
+        assert cleveland.stat().st_mtime_ns == cleveland_mtime
+        assert reports[0] == first[0]
+        assert [r['site'] for r in reports] == ['cleveland', 'hungarian']
+        assert reports[1]['rows'] == 1
+        assert not (output / "site=switzerland").exists()
+        df = HeartDiseasePreprocessor().load_data(output)
+        assert df.groupby('site').size().to_dict() == {'cleveland': 3, 'hungarian': 1}
+
+    def test_no_site_files_raises_error(self, tmp_path):
+        """Test an empty raw directory is reported"""
+        with pytest.raises(FileNotFoundError):
+            ingest_sites(tmp_path, tmp_path / "sites")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,112 @@
+"""
+Unit tests for the ingestion manifest
+"""
+import os
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from data_cache import file_digest
+from manifest import IngestManifest, dataset_version
+
+
+@pytest.fixture
+def files(tmp_path):
+    """One input and one output file"""
+    source = tmp_path / "raw" / "input.data"
+    source.parent.mkdir()
+    source.write_text("1,2,3\n")
+    output = tmp_path / "processed" / "output.csv"
+    output.parent.mkdir()
+    output.write_text("a,b,c\n1,2,3\n")
+    return source, output
+
+
+class TestIngestManifest:
+    """Test cases for IngestManifest"""
+
+    def test_unrecorded_step_is_not_current(self, files, tmp_path):
+        """Test a step never recorded has to run"""
+        source, output = files
+        manifest = IngestManifest(tmp_path / "processed" / "_manifest.json")
+        assert not manifest.is_current('prepare', [source], [output])
+
+    def test_recorded_step_survives_reload(self, files, tmp_path):
+        """Test a saved step is current for a new manifest instance"""
+        source, output = files
+        path = tmp_path / "processed" / "_manifest.json"
+        manifest = IngestManifest(path)
+        version = manifest.record('prepare', [source], [output])
+        manifest.save()
+
+        reloaded = IngestManifest(path)
+        assert reloaded.is_current('prepare', [source], [output])
+        assert reloaded.version_of(output) == version
+        assert '../raw/input.data' in reloaded.step('prepare')['inputs']
+
+    def test_changed_input_invalidates_step(self, files, tmp_path):
+        """Test new input content makes the step run again"""
+        source, output = files
+        manifest = IngestManifest(tmp_path / "processed" / "_manifest.json")
+        manifest.record('prepare', [source], [output])
+
+        source.write_text("1,2,4\n")
+        assert not manifest.is_current('prepare', [source], [output])
+
+    def test_touched_input_with_same_content_is_current(self, files, tmp_path):
+        """Test a new mtime alone does not trigger reprocessing"""
+        source, output = files
+        manifest = IngestManifest(tmp_path / "processed" / "_manifest.json")
+        manifest.record('prepare', [source], [output])
+
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert manifest.is_current('prepare', [source], [output])
+
+    @pytest.mark.parametrize("change", ["edit", "delete"])
+    def test_changed_output_invalidates_step(self, files, tmp_path, change):
+        """Test outputs edited or removed since the step ran are rebuilt"""
+        source, output = files
+        manifest = IngestManifest(tmp_path / "processed" / "_manifest.json")
+        manifest.record('prepare', [source], [output])
+
+        if change == "edit":
+            output.write_text("a,b,c\n")
+        else:
+            output.unlink()
+        assert not manifest.is_current('prepare', [source], [output])
+        assert manifest.version_of(output) is None
+
+    def test_version_depends_on_content(self, files, tmp_path):
+        """Test the dataset version changes with the data and only with it"""
+        source, output = files
+        manifest = IngestManifest(tmp_path / "processed" / "_manifest.json")
+        first = manifest.record('prepare', [source], [output])
+        assert manifest.record('prepare', [source], [output]) == first
+
+        output.write_text("a,b,c\n4,5,6\n")
+        assert manifest.record('prepare', [source], [output]) != first
+
+
+class TestDatasetVersion:
+    """Test cases for dataset_version"""
+
+    def test_recorded_version(self, files, tmp_path):
+        """Test the version recorded by ingestion is returned"""
+        source, output = files
+        manifest = IngestManifest(tmp_path / "processed" / "_manifest.json")
+        version = manifest.record('prepare', [source], [output])
+        manifest.save()
+
+        assert dataset_version(output) == version
+
+    def test_unrecorded_file_uses_content_hash(self, files):
+        """Test files outside the manifest get a content-derived version"""
+        _, output = files
+        assert dataset_version(output) == file_digest(output)[:12]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -9,7 +9,11 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from train import ModelTrainer
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.preprocessing import StandardScaler
+from train import ModelTrainer, FoldEnsembleClassifier, warm_start_model
+from tracking import wait as wait_for_tracking
 
 
 @pytest.fixture
@@ -113,6 +117,34 @@ class TestModelTrainer:
         # Check metrics
         assert 'test_accuracy' in metrics
     
+    def test_hist_gradient_boosting_training(self, sample_train_data, sample_test_data):
+        """Test histogram engine trains on NaN features and stops early"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        X_train = X_train.copy()
+        X_train.iloc[::7, 0] = np.nan
+        
+        trainer = ModelTrainer(experiment_name="test_gb")
+        model, metrics = trainer.train_gradient_boosting(
+            X_train, y_train, X_test, y_test, engine='hist'
+        )
+        
+        assert type(model).__name__ == 'HistGradientBoostingClassifier'
+        assert 'test_roc_auc' in metrics
+        assert metrics['n_iter'] <= 100
+        # Permutation importances stand in for feature_importances_
+        plots = {job.kind: job.data for job in trainer.pending_plots}
+        assert len(plots['feature_importances']['importances']) == X_train.shape[1]
+    
+    def test_unknown_boosting_engine_raises_error(self, sample_train_data, sample_test_data):
+        """Test unknown gradient boosting engines are rejected"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        trainer = ModelTrainer(experiment_name="test_gb")
+        with pytest.raises(ValueError):
+            trainer.train_gradient_boosting(X_train, y_train, X_test, y_test, engine='xgb')
+    
     def test_model_predictions(self, sample_train_data, sample_test_data):
         """Test that trained model makes predictions"""
         X_train, y_train = sample_train_data
@@ -158,6 +190,409 @@ class TestModelTrainer:
         assert model.random_state == 42
 
 
+class TestCrossValidatedEvaluation:
+    """Test cases for the single-pass 'cv' evaluation mode"""
+    
+    def test_out_of_fold_metrics(self, sample_train_data, sample_test_data):
+        """Test every metric is derived from one cross-validation pass"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        trainer = ModelTrainer(experiment_name="test_cv_eval", evaluation='cv', cv_n_jobs=2)
+        model, metrics = trainer.train_logistic_regression(
+            X_train, y_train, X_test, y_test
+        )
+        
+        for name in ['accuracy', 'precision', 'recall', 'f1', 'roc_auc']:
+            assert f'oof_{name}' in metrics
+            assert f'cv_{name}_mean' in metrics
+            assert f'cv_{name}_std' in metrics
+        assert 'test_roc_auc' in metrics
+        
+        for metric_name, metric_value in metrics.items():
+            assert 0 <= metric_value <= 1 or metric_name.endswith('_std')
+    
+    def test_cv_accuracy_matches_cross_val_score(self, sample_train_data, sample_test_data):
+        """Test fold accuracy agrees with the holdout mode's cross_val_score"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        _, holdout_metrics = ModelTrainer(experiment_name="test_cv_eval").train_logistic_regression(
+            X_train, y_train, X_test, y_test
+        )
+        _, cv_metrics = ModelTrainer(
+            experiment_name="test_cv_eval", evaluation='cv'
+        ).train_logistic_regression(X_train, y_train, X_test, y_test)
+        
+        assert np.isclose(cv_metrics['cv_accuracy_mean'], holdout_metrics['cv_accuracy_mean'])
+        assert np.isclose(cv_metrics['cv_accuracy_std'], holdout_metrics['cv_accuracy_std'])
+    
+    def test_reuse_fold_estimators(self, sample_train_data, sample_test_data):
+        """Test fold estimators can be returned instead of a refit model"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        trainer = ModelTrainer(
+            experiment_name="test_cv_eval", evaluation='cv', cv_folds=3,
+            reuse_fold_estimators=True
+        )
+        model, metrics = trainer.train_random_forest(
+            X_train, y_train, X_test, y_test, params={'n_estimators': 10, 'random_state': 42}
+        )
+        
+        assert isinstance(model, FoldEnsembleClassifier)
+        assert len(model.estimators) == 3
+        assert model.predict_proba(X_test).shape == (len(X_test), 2)
+        assert model.feature_importances_.shape == (X_train.shape[1],)
+    
+    def test_invalid_evaluation_mode(self):
+        """Test unknown evaluation modes are rejected"""
+        with pytest.raises(ValueError):
+            ModelTrainer(experiment_name="test_cv_eval", evaluation='bootstrap')
+
+
+class TestDeferredPlots:
+    """Test cases for deferred plot rendering"""
+    
+    def test_plots_captured_then_rendered(self, sample_train_data, sample_test_data):
+        """Test plot data is captured during training and uploaded on render"""
+        from mlflow.tracking import MlflowClient
+        
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        trainer = ModelTrainer(experiment_name="test_plots")
+        trainer.train_random_forest(
+            X_train, y_train, X_test, y_test, params={'n_estimators': 10}
+        )
+        
+        kinds = sorted(job.kind for job in trainer.pending_plots)
+        assert kinds == ['confusion_matrix', 'feature_importances', 'roc_curve']
+        run_id = trainer.pending_plots[0].run_id
+        
+        assert trainer.render_pending_plots(max_workers=2) == 3
+        assert trainer.pending_plots == []
+        wait_for_tracking()
+        
+        artifacts = {artifact.path for artifact in MlflowClient().list_artifacts(run_id)}
+        assert {'confusion_matrix.png', 'roc_curve.png', 'feature_importances.png'} <= artifacts
+    
+    def test_no_plots_mode(self, sample_train_data, sample_test_data):
+        """Test render_plots=False skips plot capture entirely"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        trainer = ModelTrainer(experiment_name="test_plots", render_plots=False)
+        trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+        
+        assert trainer.pending_plots == []
+        assert trainer.render_pending_plots() == 0
+
+
+class TestTrainAll:
+    """Test cases for ModelTrainer.train_all"""
+    
+    def test_parallel_training(self, sample_train_data, sample_test_data):
+        """Test families trained in a process pool are collected into one table"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        trainer = ModelTrainer(experiment_name="test_train_all")
+        results, comparison = trainer.train_all(
+            X_train, y_train, X_test, y_test,
+            families=['logistic_regression', 'random_forest'],
+            params={'random_forest': {'n_estimators': 20}},
+            n_workers=2, cpu_budget=2
+        )
+        
+        assert set(results) == {'logistic_regression', 'random_forest'}
+        for model, metrics in results.values():
+            assert hasattr(model, 'predict_proba')
+            assert 'test_roc_auc' in metrics
+        
+        # CPU budget split between processes and n_jobs
+        rf_model = results['random_forest'][0]
+        assert rf_model.n_estimators == 20
+        assert rf_model.n_jobs == 1
+        
+        assert set(comparison.index) == {'logistic_regression', 'random_forest'}
+        assert 'train_seconds' in comparison.columns
+        assert trainer.pending_plots == []
+        assert comparison['test_roc_auc'].is_monotonic_decreasing
+    
+    def test_sequential_mode(self, sample_train_data, sample_test_data):
+        """Test n_workers=1 trains in-process with the full budget per model"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        trainer = ModelTrainer(experiment_name="test_train_all")
+        results, comparison = trainer.train_all(
+            X_train, y_train, X_test, y_test,
+            families=['random_forest'], n_workers=1, cpu_budget=3
+        )
+        
+        assert results['random_forest'][0].n_jobs == 3
+        assert list(comparison.index) == ['random_forest']
+    
+    def test_profiled_after_pool(self, sample_train_data, sample_test_data, monkeypatch):
+        """Test families are profiled one by one in this process, once the pool is done"""
+        import train
+        from mlflow.tracking import MlflowClient
+        
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        profiled = []
+        profile_model = train.profile_model
+        monkeypatch.setattr(train, 'profile_model',
+                            lambda model, X: profiled.append(type(model).__name__)
+                            or profile_model(model, X, n_repeats=20, batch_sizes=(1,)))
+        
+        trainer = ModelTrainer(experiment_name="test_train_all", evaluation='cv',
+                               profile_inference=True, render_plots=False)
+        results, comparison = trainer.train_all(
+            X_train, y_train, X_test, y_test,
+            families=['logistic_regression', 'random_forest'],
+            params={'random_forest': {'n_estimators': 20}},
+            n_workers=2, cpu_budget=2
+        )
+        wait_for_tracking()
+        
+        assert profiled == ['LogisticRegression', 'RandomForestClassifier']
+        assert (comparison['latency_p99_ms'] > 0).all()
+        assert comparison.loc['random_forest', 'sklearn_latency_p99_ms'] > 0
+        runs = MlflowClient().search_runs(
+            [MlflowClient().get_experiment_by_name("test_train_all").experiment_id],
+            filter_string="attributes.run_name = 'Random_Forest'",
+            order_by=["attributes.start_time DESC"], max_results=1
+        )
+        assert runs[0].data.metrics['latency_p99_ms'] == \
+            pytest.approx(comparison.loc['random_forest', 'latency_p99_ms'])
+    
+    def test_unknown_family_raises_error(self, sample_train_data, sample_test_data):
+        """Test unknown family names are rejected"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        trainer = ModelTrainer(experiment_name="test_train_all")
+        with pytest.raises(ValueError):
+            trainer.train_all(X_train, y_train, X_test, y_test, families=['svm'])
+
+
+class TestIncrementalTraining:
+    """Test cases for warm-start incremental retraining"""
+    
+    @pytest.mark.parametrize("model", [
+        RandomForestClassifier(n_estimators=10, random_state=42),
+        GradientBoostingClassifier(n_estimators=10, random_state=42),
+    ])
+    def test_ensembles_keep_and_add_estimators(self, sample_train_data, model):
+        """Test ensembles keep their fitted estimators and grow new ones"""
+        X_train, y_train = sample_train_data
+        model.fit(X_train, y_train)
+        first_tree = np.ravel(model.estimators_)[0]
+        
+        warm_start_model(model, X_train.iloc[:40], y_train[:40], n_new_estimators=5)
+        
+        assert len(model.estimators_) == 15
+        assert np.ravel(model.estimators_)[0] is first_tree
+        assert model.warm_start is False
+    
+    def test_unsupported_model_raises_error(self, sample_train_data):
+        """Test models without a warm-start path are rejected"""
+        X_train, y_train = sample_train_data
+        model = FoldEnsembleClassifier([LogisticRegression().fit(X_train, y_train)])
+        with pytest.raises(ValueError):
+            warm_start_model(model, X_train, y_train)
+    
+    def test_promoted_compressed_models(self, sample_train_data, sample_test_data):
+        """Test compressed forests are updated and a distilled tree fails early by name"""
+        from model_compression import distill, prune_forest
+        from preprocessing import HeartDiseasePreprocessor
+        
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        preprocessor = HeartDiseasePreprocessor()
+        X_processed = preprocessor.fit_transform(X_train)
+        forest = RandomForestClassifier(n_estimators=20, random_state=42).fit(X_processed, y_train)
+        trainer = ModelTrainer(experiment_name="test_incremental", render_plots=False)
+        
+        pruned = prune_forest(forest, X_processed, 5)
+        new_model, _, metrics = trainer.train_incremental(
+            pruned, preprocessor, X_train.iloc[80:], y_train[80:], X_test, y_test,
+            n_new_estimators=3
+        )
+        assert len(new_model.estimators_) == 8
+        assert 'test_roc_auc' in metrics
+        
+        student = distill(forest, X_processed, max_depth=3)
+        with pytest.raises(ValueError, match="DecisionTreeClassifier"):
+            trainer.train_incremental(student, preprocessor, X_train.iloc[80:], y_train[80:],
+                                      X_test, y_test)
+    
+    def test_incremental_main_rejects_distilled_tree(self, sample_train_data, tmp_path):
+        """Test --incremental stops before reading data when a distilled tree is promoted"""
+        import joblib
+        from model_compression import distill
+        from preprocessing import HeartDiseasePreprocessor
+        from train import incremental_main
+        
+        X_train, y_train = sample_train_data
+        preprocessor = HeartDiseasePreprocessor()
+        X_processed = preprocessor.fit_transform(X_train)
+        forest = RandomForestClassifier(n_estimators=10, random_state=42).fit(X_processed, y_train)
+        joblib.dump(distill(forest, X_processed, max_depth=3), tmp_path / "best_model.pkl")
+        joblib.dump(preprocessor, tmp_path / "preprocessor.pkl")
+        
+        with pytest.raises(ValueError, match="not supported for DecisionTreeClassifier"):
+            incremental_main(tmp_path / "missing_delta.csv", tmp_path / "missing_history.csv",
+                             tmp_path / "best_model.pkl", tmp_path / "preprocessor.pkl")
+    
+    def test_incremental_main_rebuilds_drift_reference(self, tmp_path):
+        """Test the drift reference follows the scaler updated by an incremental run"""
+        import joblib
+        from drift import DriftReference
+        from preprocessing import HeartDiseasePreprocessor
+        from train import incremental_main
+        
+        rng = np.random.default_rng(0)
+        
+        def rows(n, chol_shift=0):
+            return pd.DataFrame({
+                'age': rng.integers(29, 78, n), 'sex': rng.integers(0, 2, n),
+                'cp': rng.integers(1, 5, n), 'trestbps': rng.integers(94, 200, n),
+                'chol': rng.integers(126, 400, n) + chol_shift, 'fbs': rng.integers(0, 2, n),
+                'restecg': rng.integers(0, 3, n), 'thalach': rng.integers(71, 202, n),
+                'exang': rng.integers(0, 2, n), 'oldpeak': rng.integers(0, 62, n) / 10,
+                'slope': rng.integers(1, 4, n), 'ca': rng.integers(0, 4, n),
+                'thal': rng.choice([3, 6, 7], n), 'target': np.tile([0, 1], n // 2),
+            })
+        
+        history, delta = rows(200), rows(60, chol_shift=150)
+        history.to_csv(tmp_path / "history.csv", index=False)
+        delta.to_csv(tmp_path / "delta.csv", index=False)
+        
+        preprocessor = HeartDiseasePreprocessor()
+        X_history = preprocessor.fit_transform(history.drop('target', axis=1))
+        model = LogisticRegression(max_iter=1000).fit(X_history, history['target'])
+        joblib.dump(model, tmp_path / "best_model.pkl")
+        joblib.dump(preprocessor, tmp_path / "preprocessor.pkl")
+        DriftReference.from_frame(X_history).save(tmp_path / "drift_reference.json")
+        
+        incremental_main(tmp_path / "delta.csv", tmp_path / "history.csv",
+                         tmp_path / "best_model.pkl", tmp_path / "preprocessor.pkl")
+        
+        updated = joblib.load(tmp_path / "preprocessor.pkl")
+        reference = DriftReference.load(tmp_path / "drift_reference.json")
+        chol = reference.feature_names.index('chol')
+        # Cut points are in the updated scaler's units, which cover the shifted delta
+        expected = DriftReference.from_frame(updated.transform(
+            pd.concat([history, delta]).drop('target', axis=1)))
+        assert updated.scaler.n_samples_seen_ > preprocessor.scaler.n_samples_seen_
+        np.testing.assert_allclose(np.asarray(reference.cut_points)[chol],
+                                   np.asarray(expected.cut_points)[chol], atol=0.2)
+        assert not np.allclose(np.asarray(reference.cut_points)[chol],
+                               np.asarray(DriftReference.from_frame(X_history).cut_points)[chol])
+    
+    def test_train_incremental(self, sample_train_data, sample_test_data):
+        """Test delta + replay update of a linear model and its scaler"""
+        from preprocessing import HeartDiseasePreprocessor
+        
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        history, delta = X_train.iloc[:80], X_train.iloc[80:] + 0.5
+        
+        preprocessor = HeartDiseasePreprocessor()
+        model = LogisticRegression(max_iter=1000).fit(
+            preprocessor.fit_transform(history), y_train[:80]
+        )
+        
+        trainer = ModelTrainer(experiment_name="test_incremental")
+        new_model, new_preprocessor, metrics = trainer.train_incremental(
+            model, preprocessor, delta, y_train[80:], X_test, y_test,
+            X_history=history, y_history=y_train[:80], replay_size=10
+        )
+        
+        assert 'test_roc_auc' in metrics
+        assert new_model is not model
+        assert not np.allclose(new_model.coef_, model.coef_)
+        # Scaler statistics now cover history + delta; the original is untouched
+        assert new_preprocessor.scaler.n_samples_seen_ == 100
+        assert preprocessor.scaler.n_samples_seen_ == 80
+        np.testing.assert_allclose(
+            new_preprocessor.scaler.mean_, StandardScaler().fit(pd.concat([history, delta])).mean_
+        )
+
+
+class TestCompression:
+    """Test cases for ModelTrainer.compress_model"""
+    
+    def test_compress_model_logs_candidates(self, sample_train_data, sample_test_data):
+        """Test the compression stage logs the candidate table and selection"""
+        from mlflow.tracking import MlflowClient
+        
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        forest = RandomForestClassifier(n_estimators=30, random_state=42).fit(X_train, y_train)
+        
+        trainer = ModelTrainer(experiment_name="test_compression", render_plots=False)
+        model, table, metrics = trainer.compress_model(forest, X_train, y_train, X_test, y_test)
+        wait_for_tracking()
+        
+        assert hasattr(model, 'predict_proba')
+        # The selected model gets the same cross-validated metrics as the trained families
+        assert 0 <= metrics['oof_roc_auc'] <= 1
+        assert {'cv_roc_auc_mean', 'test_roc_auc'} <= set(metrics)
+        run = MlflowClient().search_runs(
+            [MlflowClient().get_experiment_by_name("test_compression").experiment_id],
+            order_by=["attributes.start_time DESC"], max_results=1
+        )[0]
+        assert run.data.params['selected'] in set(table['candidate'])
+        history = MlflowClient().get_metric_history(run.info.run_id, 'candidate_val_roc_auc')
+        assert len(history) == len(table)
+
+
+class TestModelSelection:
+    """Test cases for inference profiling and policy-based selection"""
+    
+    def test_profile_inference_metrics(self, sample_train_data, sample_test_data):
+        """Test profiling adds serving cost to the evaluation metrics"""
+        X_train, y_train = sample_train_data
+        X_test, y_test = sample_test_data
+        
+        trainer = ModelTrainer(experiment_name="test_profiling", profile_inference=True,
+                               render_plots=False)
+        _, metrics = trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+        
+        for name in ['latency_p50_ms', 'latency_p99_ms', 'throughput_b1000_rows_per_s',
+                     'size_bytes', 'load_ms', 'memory_mb']:
+            assert metrics[name] > 0
+        assert trainer._options()['profile_inference'] is True
+    
+    def test_select_model(self):
+        """Test select_model applies the policy and logs the decision"""
+        from mlflow.tracking import MlflowClient
+        from profiling import SelectionPolicy
+        
+        comparison = pd.DataFrame({
+            'oof_roc_auc': [0.95, 0.93],
+            'latency_p99_ms': [20.0, 1.0],
+            'memory_mb': [50.0, 1.0],
+            'size_bytes': [5e6, 1e4],
+        }, index=['random_forest', 'logistic_regression'])
+        
+        trainer = ModelTrainer(experiment_name="test_selection")
+        selected = trainer.select_model(comparison, SelectionPolicy(max_latency_p99_ms=10))
+        wait_for_tracking()
+        
+        assert selected == 'logistic_regression'
+        run = MlflowClient().search_runs(
+            [MlflowClient().get_experiment_by_name("test_selection").experiment_id],
+            order_by=["attributes.start_time DESC"], max_results=1
+        )[0]
+        assert run.data.params['selected'] == 'logistic_regression'
+        assert run.data.params['slo_latency_p99_ms'] == '10'
+
+
 def test_evaluation_metrics_validity(sample_train_data, sample_test_data):
     """Test that evaluation metrics are valid"""
     X_train, y_train = sample_train_data
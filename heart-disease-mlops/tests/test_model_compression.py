@@ -0,0 +1,109 @@
+"""
+Unit tests for post-training model compression
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sklearn.ensemble import RandomForestClassifier
+from model_compression import (
+    build_candidate, candidate_oof_proba, compress, count_nodes, distill, pareto_front, prune_forest,
+    select_candidate
+)
+from sklearn.model_selection import StratifiedKFold
+
+
+@pytest.fixture
+def classification_data():
+    """Create a learnable binary classification problem with a test split"""
+    rng = np.random.default_rng(42)
+    n_samples = 400
+    X = pd.DataFrame(rng.normal(size=(n_samples, 5)), columns=[f'feature_{i}' for i in range(5)])
+    y = (X['feature_0'] - X['feature_1'] + rng.normal(scale=0.5, size=n_samples) > 0).astype(int)
+    return X.iloc[:300], y.iloc[:300].to_numpy(), X.iloc[300:], y.iloc[300:].to_numpy()
+
+
+@pytest.fixture
+def forest(classification_data):
+    """Forest to compress"""
+    X_train, y_train, _, _ = classification_data
+    return RandomForestClassifier(n_estimators=30, max_depth=6, random_state=0).fit(X_train, y_train)
+
+
+class TestCandidates:
+    """Test cases for candidate builders"""
+
+    def test_prune_forest(self, forest, classification_data):
+        """Test pruned forests reuse the original trees and track the full forest"""
+        X_train, _, X_test, _ = classification_data
+        pruned = prune_forest(forest, X_train, 10)
+
+        assert len(pruned.estimators_) == 10
+        assert all(any(tree is original for original in forest.estimators_) for tree in pruned.estimators_)
+        assert len(forest.estimators_) == 30
+        gap = np.abs(pruned.predict_proba(X_test)[:, 1] - forest.predict_proba(X_test)[:, 1])
+        assert gap.mean() < 0.1
+
+    def test_distill(self, forest, classification_data):
+        """Test the student is one small tree that agrees with the teacher"""
+        X_train, _, X_test, _ = classification_data
+        student = distill(forest, X_train, max_depth=4)
+
+        assert count_nodes(student) <= 31
+        agreement = (student.predict(X_test) == forest.predict(X_test)).mean()
+        assert agreement > 0.8
+
+
+class TestSelection:
+    """Test cases for Pareto front and selection"""
+
+    def test_pareto_and_selection(self):
+        """Test dominated candidates are excluded and the smallest eligible wins"""
+        table = pd.DataFrame({
+            'candidate': ['teacher', 'a', 'b', 'c'],
+            'val_roc_auc': [0.95, 0.945, 0.90, 0.94],
+            'latency_p50_ms': [5.0, 1.0, 2.0, 0.5],
+            'size_bytes': [1000, 200, 50, 100],
+        })
+        assert list(table['candidate'][pareto_front(table)]) == ['teacher', 'a', 'c']
+        assert select_candidate(table, auc_tolerance=0.01) == 'c'
+        assert select_candidate(table, auc_tolerance=0.0) == 'teacher'
+
+    def test_compress(self, forest, classification_data):
+        """Test compress returns a candidate within tolerance of the best validation AUC"""
+        X_train, y_train, _, _ = classification_data
+        model, name, table = compress(forest, X_train, y_train, auc_tolerance=0.02, n_repeats=10)
+
+        assert 'teacher' in set(table['candidate'])
+        assert 'test_roc_auc' not in table
+        row = table.set_index('candidate').loc[name]
+        assert row['val_roc_auc'] >= table['val_roc_auc'].max() - 0.02
+        assert row['size_bytes'] <= table.set_index('candidate').loc['teacher', 'size_bytes']
+        assert table['pareto'].any()
+        assert hasattr(model, 'predict_proba')
+
+    def test_selected_model_uses_all_training_rows(self, forest, classification_data):
+        """Test the selected recipe is rebuilt from the full teacher on all training rows"""
+        X_train, y_train, X_test, _ = classification_data
+        model, name, _ = compress(forest, X_train, y_train, auc_tolerance=1.0, n_repeats=5)
+        expected = build_candidate(name, forest, X_train, y_train)
+        np.testing.assert_allclose(model.predict_proba(X_test), expected.predict_proba(X_test))
+
+    def test_candidate_oof_proba(self, forest, classification_data):
+        """Test out-of-fold probabilities never come from a model that saw the row"""
+        X_train, y_train, _, _ = classification_data
+        splits = list(StratifiedKFold(n_splits=3).split(X_train, y_train))
+        oof = candidate_oof_proba('distilled_depth3', forest, X_train, y_train, splits)
+
+        assert oof.shape == (len(X_train),)
+        assert ((oof >= 0) & (oof <= 1)).all()
+        # Held-out rows score below the in-sample fit of the same recipe
+        in_sample = distill(forest, X_train, max_depth=3).predict_proba(X_train)[:, 1]
+        assert np.mean((oof > 0.5) == y_train) <= np.mean((in_sample > 0.5) == y_train) + 0.05
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
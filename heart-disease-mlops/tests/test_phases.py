@@ -0,0 +1,156 @@
+"""
+Unit tests for per-phase timing and resource instrumentation
+"""
+import time
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from phases import PhaseRecorder, maybe_phase, peak_rss_mb
+from train import ModelTrainer
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample training and test data"""
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(rng.normal(size=(120, 5)), columns=[f'feature_{i}' for i in range(5)])
+    y = (X['feature_0'] + rng.normal(scale=0.5, size=120) > 0).astype(int).to_numpy()
+    return X.iloc[:90], y[:90], X.iloc[90:], y[90:]
+
+
+def _busy(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+class TestPhaseRecorder:
+    """Test cases for the phase tree"""
+
+    def test_nesting_and_merging(self):
+        """Test phases nest and repeated phases are merged"""
+        recorder = PhaseRecorder('run')
+        with recorder.phase('cv'):
+            for _ in range(3):
+                with recorder.phase('fit'):
+                    _busy(0.01)
+        with recorder.phase('fit'):
+            pass
+
+        cv = recorder.root.children['cv']
+        assert cv.count == 1
+        assert cv.children['fit'].count == 3
+        assert cv.children['fit'].cpu_seconds >= 0.03
+        assert cv.wall_seconds >= cv.children['fit'].wall_seconds
+        assert recorder.root.children['fit'].count == 1
+
+    def test_metric_names(self):
+        """Test the tree is flattened into dotted metric names"""
+        recorder = PhaseRecorder('run')
+        with recorder.phase('prepare'):
+            with recorder.phase('split'):
+                pass
+            with recorder.phase('split'):
+                pass
+        metrics = recorder.finish().metrics()
+
+        assert {'phase_prepare_wall_s', 'phase_prepare_cpu_s',
+                'phase_prepare.split_wall_s', 'phase_total_wall_s'} <= set(metrics)
+        assert metrics['phase_prepare.split_count'] == 2
+        assert 'phase_prepare_count' not in metrics
+        if peak_rss_mb() is not None:
+            assert metrics['phase_prepare_peak_rss_mb'] > 0
+
+    def test_exception_still_recorded(self):
+        """Test a failing phase is closed and the stack unwound"""
+        recorder = PhaseRecorder('run')
+        with pytest.raises(RuntimeError):
+            with recorder.phase('fit'):
+                raise RuntimeError("boom")
+        with recorder.phase('evaluate'):
+            pass
+
+        assert recorder.root.children['fit'].count == 1
+        assert 'evaluate' in recorder.root.children
+
+    def test_maybe_phase_without_recorder(self):
+        """Test maybe_phase is a no-op without a recorder"""
+        with maybe_phase(None, 'fit') as span:
+            assert span is None
+
+    def test_profiles(self, tmp_path):
+        """Test selected phases are captured with cProfile and written"""
+        recorder = PhaseRecorder('run', profile_phases=['prepare.fit'])
+        with recorder.phase('prepare'):
+            with recorder.phase('fit'):
+                _busy(0.01)
+        with recorder.phase('fit'):
+            pass
+
+        assert list(recorder.profiles) == ['prepare.fit']
+        written = recorder.write_profiles(tmp_path)
+        assert {path.name for path in written} == {'prepare.fit.prof', 'prepare.fit.txt'}
+        assert '_busy' in (tmp_path / 'prepare.fit.txt').read_text()
+
+    def test_summary(self):
+        """Test the text summary lists every phase"""
+        recorder = PhaseRecorder('run')
+        with recorder.phase('fit'):
+            pass
+        summary = recorder.finish().summary()
+        assert 'run' in summary and '  fit' in summary
+
+
+class TestTrainerPhases:
+    """Test cases for phases recorded by ModelTrainer"""
+
+    def test_phases_logged(self, sample_data):
+        """Test training runs log phase metrics and the phase tree"""
+        from mlflow.tracking import MlflowClient
+        from tracking import wait as wait_for_tracking
+
+        X_train, y_train, X_test, y_test = sample_data
+        trainer = ModelTrainer(experiment_name="test_phases", evaluation='cv', cv_folds=3,
+                               backend='threading', profile_phases=['fit'])
+        trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+        wait_for_tracking()
+
+        client = MlflowClient()
+        run = client.get_run(trainer._run.run_id)
+        for phase in ('fit', 'evaluate', 'cv', 'log_model'):
+            assert f'phase_{phase}_wall_s' in run.data.metrics
+        assert run.data.metrics['phase_total_wall_s'] >= run.data.metrics['phase_fit_wall_s']
+
+        artifacts = {artifact.path for artifact in client.list_artifacts(run.info.run_id)}
+        assert 'phases.json' in artifacts
+        assert 'profiles' in artifacts
+
+    def test_prepare_data_phases(self, tmp_path):
+        """Test prepare_data records its steps"""
+        from preprocessing import prepare_data
+
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            'age': rng.integers(30, 80, 60), 'sex': rng.integers(0, 2, 60),
+            'cp': rng.integers(0, 4, 60), 'trestbps': rng.integers(100, 180, 60),
+            'chol': rng.integers(150, 350, 60), 'fbs': rng.integers(0, 2, 60),
+            'restecg': rng.integers(0, 3, 60), 'thalach': rng.integers(90, 200, 60),
+            'exang': rng.integers(0, 2, 60), 'oldpeak': rng.uniform(0, 4, 60),
+            'slope': rng.integers(0, 3, 60), 'ca': rng.integers(0, 4, 60),
+            'thal': rng.integers(0, 4, 60), 'target': np.tile([0, 1], 30),
+        })
+        data_path = tmp_path / "heart.csv"
+        df.to_csv(data_path, index=False)
+
+        recorder = PhaseRecorder('Data_Preparation')
+        prepare_data(data_path, phases=recorder)
+        assert {'load', 'split', 'fit_transform', 'transform'} <= set(recorder.root.children)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,177 @@
+"""
+Unit tests for reduced-precision inference
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sklearn.datasets import make_classification
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import SVC
+
+from precision import PRECISIONS, LinearPredictor, precision_report, reduced_precision_predictor
+from preprocessing import HeartDiseasePreprocessor
+from tree_predictor import FlatTreeEnsemble
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Binary and three-class targets over 13 features, as a DataFrame"""
+    X, y = make_classification(n_samples=400, n_features=13, n_informative=6, random_state=0)
+    X = pd.DataFrame(X, columns=[f'feature_{i}' for i in range(13)])
+    y3 = y + (X['feature_0'] > 1).to_numpy()
+    return X, y, y3
+
+
+@pytest.fixture
+def raw_data():
+    """Heart disease rows with a few missing values"""
+    rng = np.random.default_rng(0)
+    n = 200
+    X = pd.DataFrame({
+        'age': rng.integers(29, 78, n), 'sex': rng.integers(0, 2, n),
+        'cp': rng.integers(1, 5, n), 'trestbps': rng.integers(94, 200, n),
+        'chol': rng.integers(126, 564, n), 'fbs': rng.integers(0, 2, n),
+        'restecg': rng.integers(0, 3, n), 'thalach': rng.integers(71, 202, n),
+        'exang': rng.integers(0, 2, n), 'oldpeak': rng.integers(0, 62, n) / 10,
+        'slope': rng.integers(1, 4, n), 'ca': rng.integers(0, 4, n).astype(float),
+        'thal': rng.choice([3.0, 6.0, 7.0], n),
+    })
+    X.loc[X.index[::17], 'ca'] = np.nan
+    X.loc[X.index[::23], 'thal'] = np.nan
+    return X
+
+
+class TestLinearPredictor:
+    """Test cases for float32 and int8 logistic regression"""
+
+    @pytest.mark.parametrize("n_classes", [2, 3])
+    def test_float32_parity(self, data, n_classes):
+        """Test float32 probabilities match the float64 model"""
+        X, y, y3 = data
+        model = LogisticRegression(max_iter=1000).fit(X, y if n_classes == 2 else y3)
+        predictor = LinearPredictor(model, 'float32')
+
+        np.testing.assert_allclose(predictor.predict_proba(X.astype(np.float32)),
+                                   model.predict_proba(X), atol=1e-5)
+        np.testing.assert_array_equal(predictor.predict(X), model.predict(X))
+
+    def test_int8_weights(self, data):
+        """Test int8 weights are within half a quantization step and predictions agree"""
+        X, y, _ = data
+        model = LogisticRegression(max_iter=1000).fit(X, y)
+        predictor = LinearPredictor(model, 'int8')
+
+        assert predictor.coef.dtype == np.int8
+        assert np.abs(predictor.weights() - model.coef_).max() <= predictor.weight_scale.max() / 2 + 1e-6
+        assert np.abs(predictor.predict_proba(X) - model.predict_proba(X)).max() < 0.02
+        assert np.mean(predictor.predict(X) == model.predict(X)) > 0.98
+        assert predictor.nbytes < LinearPredictor(model, 'float32').nbytes
+
+    def test_feature_validation(self, data):
+        """Test mismatched columns are rejected"""
+        X, y, _ = data
+        predictor = LinearPredictor(LogisticRegression(max_iter=1000).fit(X, y))
+        with pytest.raises(ValueError):
+            predictor.predict_proba(X[X.columns[::-1]])
+
+
+class TestTreePrecision:
+    """Test cases for float32 and quantized-threshold tree ensembles"""
+
+    @pytest.mark.parametrize("precision", ['float32', 'int8'])
+    @pytest.mark.parametrize("n_classes", [2, 3])
+    def test_forest_parity(self, data, precision, n_classes):
+        """Test reduced precision keeps sklearn's predictions"""
+        X, y, y3 = data
+        model = RandomForestClassifier(n_estimators=30, max_depth=8, random_state=0).fit(
+            X, y if n_classes == 2 else y3)
+        predictor = FlatTreeEnsemble.from_model(model).with_precision(precision)
+
+        assert predictor.precision == precision
+        np.testing.assert_allclose(predictor.predict_proba(X.astype(np.float32)),
+                                   model.predict_proba(X), atol=1e-5)
+        np.testing.assert_array_equal(predictor.predict(X), model.predict(X))
+
+    def test_quantized_thresholds(self, data):
+        """Test thresholds become small unsigned ranks and the model gets smaller"""
+        X, y, _ = data
+        model = RandomForestClassifier(n_estimators=30, max_depth=8, random_state=0).fit(X, y)
+        compiled = FlatTreeEnsemble.from_model(model)
+        quantized = compiled.with_precision('int8')
+
+        assert quantized.threshold.dtype == np.uint8
+        assert quantized.nbytes < compiled.nbytes
+        assert compiled.precision == 'float64'
+        with pytest.raises(ValueError, match="cannot be converted back"):
+            quantized.with_precision('float32')
+
+    def test_missing_values(self, data):
+        """Test NaN still follows the learned missing-value direction"""
+        X, y, _ = data
+        X = X.copy()
+        X.iloc[::7, 2] = np.nan
+        model = HistGradientBoostingClassifier(max_iter=30, random_state=0).fit(X, y)
+        predictor = FlatTreeEnsemble.from_model(model).with_precision('int8')
+        np.testing.assert_allclose(predictor.predict_proba(X), model.predict_proba(X), atol=1e-5)
+
+
+class TestReducedPrecisionPredictor:
+    """Test cases for reduced_precision_predictor"""
+
+    def test_dispatch(self, data):
+        """Test each model type gets its reduced-precision predictor"""
+        X, y, _ = data
+        linear = LogisticRegression(max_iter=1000).fit(X, y)
+        forest = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+
+        assert reduced_precision_predictor(linear, 'float64') is None
+        assert reduced_precision_predictor(linear, 'int8').precision == 'int8'
+        assert reduced_precision_predictor(forest, 'float32').precision == 'float32'
+        assert reduced_precision_predictor(SVC().fit(X, y), 'float32') is None
+        with pytest.raises(ValueError, match="Unknown precision"):
+            reduced_precision_predictor(linear, 'float16')
+
+
+class TestPreprocessorDtype:
+    """Test cases for the float32 preprocessing path"""
+
+    @pytest.mark.parametrize("impute", [True, False])
+    def test_float32_transform(self, raw_data, impute):
+        """Test float32 output matches the float64 transform"""
+        preprocessor = HeartDiseasePreprocessor(impute=impute)
+        expected = preprocessor.fit_transform(raw_data)
+        result = preprocessor.transform(raw_data, dtype=np.float32)
+
+        assert (result.dtypes == np.float32).all()
+        assert list(result.columns) == list(expected.columns)
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-5)
+
+
+class TestPrecisionReport:
+    """Test cases for precision_report"""
+
+    def test_report(self, raw_data):
+        """Test parity and throughput are reported for every precision"""
+        y = (raw_data['age'] + raw_data['thalach'] / 3 > 110).astype(int).to_numpy()
+        preprocessor = HeartDiseasePreprocessor()
+        X = preprocessor.fit_transform(raw_data)
+        model = LogisticRegression(max_iter=1000).fit(X, y)
+
+        report = precision_report(model, X, y, preprocessor=preprocessor, X_test_raw=raw_data,
+                                  batch_sizes=(1, 100), min_seconds=0.01)
+        assert list(report['precision']) == list(PRECISIONS)
+        assert {'max_abs_proba_diff', 'prediction_agreement', 'test_roc_auc', 'test_accuracy',
+                'throughput_b1_rows_per_s', 'speedup_b100'} <= set(report.columns)
+        assert report.loc[0, 'max_abs_proba_diff'] == 0
+        assert (report['prediction_agreement'] > 0.95).all()
+        assert (report['throughput_b100_rows_per_s'] > 0).all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
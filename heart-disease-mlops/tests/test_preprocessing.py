@@ -77,6 +77,16 @@ class TestHeartDiseasePreprocessor:
         assert X_imputed.isnull().sum().sum() == 0
         assert X_imputed.shape == X.shape
     
+    def test_missing_values_kept_without_imputation(self, sample_data_with_missing):
+        """Test impute=False passes NaN through scaling"""
+        preprocessor = HeartDiseasePreprocessor(impute=False)
+        X = sample_data_with_missing.drop('target', axis=1)
+        
+        X_transformed = preprocessor.fit_transform(X)
+        
+        assert X_transformed.isnull().sum().sum() == X.isnull().sum().sum()
+        assert np.isnan(preprocessor.transform(X.iloc[[2]])['age'].iloc[0])
+    
     def test_scale_features(self, sample_data):
         """Test feature scaling"""
         preprocessor = HeartDiseasePreprocessor()
@@ -120,6 +130,34 @@ class TestHeartDiseasePreprocessor:
         
         assert X_transformed.shape == X_new.shape
     
+    def test_load_data_compact_dtypes(self, sample_data_with_missing, tmp_path):
+        """Test load_data downcasts to the declared schema"""
+        data_file = tmp_path / "test_data.csv"
+        sample_data_with_missing.to_csv(data_file, index=False)
+
+        df = HeartDiseasePreprocessor().load_data(data_file)
+
+        assert df['sex'].dtype == np.uint8
+        assert df['chol'].dtype == np.uint16
+        assert df['oldpeak'].dtype == np.float32
+        # Columns with missing values become nullable integers
+        assert str(df['ca'].dtype) == 'UInt8'
+        assert str(df['age'].dtype) == 'UInt8'
+        assert df['ca'].isna().sum() == 1
+        assert df.memory_usage(deep=True).sum() < pd.read_csv(data_file).memory_usage(deep=True).sum()
+
+    def test_partial_fit_updates_scaler(self, sample_data):
+        """Test partial_fit merges new rows into the scaler statistics"""
+        X = sample_data.drop('target', axis=1)
+        preprocessor = HeartDiseasePreprocessor()
+        preprocessor.fit_transform(X.iloc[:3])
+        preprocessor.partial_fit(X.iloc[3:])
+        
+        full = HeartDiseasePreprocessor()
+        full.fit_transform(X)
+        np.testing.assert_allclose(preprocessor.scaler.mean_, full.scaler.mean_)
+        np.testing.assert_allclose(preprocessor.scaler.var_, full.scaler.var_)
+    
     def test_transform_before_fit_raises_error(self, sample_data):
         """Test that transform raises error if not fitted"""
         preprocessor = HeartDiseasePreprocessor()
@@ -0,0 +1,132 @@
+"""
+Unit tests for inference profiling and SLO-aware model selection
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier
+from profiling import SelectionPolicy, measure_throughput, profile_model
+
+
+@pytest.fixture
+def data():
+    """Create a small binary classification problem"""
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(rng.normal(size=(200, 4)), columns=[f'feature_{i}' for i in range(4)])
+    y = (X['feature_0'] > 0).astype(int).to_numpy()
+    return X, y
+
+
+@pytest.fixture
+def comparison():
+    """Comparison table with quality and serving-cost columns"""
+    return pd.DataFrame({
+        'oof_roc_auc': [0.95, 0.94, 0.90],
+        'latency_p99_ms': [20.0, 2.0, 0.5],
+        'memory_mb': [50.0, 5.0, 0.1],
+        'size_bytes': [5e6, 4e5, 1e3],
+    }, index=['forest', 'small_forest', 'linear'])
+
+
+class TestProfileModel:
+    """Test cases for serving cost measurements"""
+
+    def test_profile_keys(self, data):
+        """Test every serving metric is measured and positive"""
+        X, y = data
+        model = LogisticRegression().fit(X, y)
+        profile = profile_model(model, X, n_repeats=20, batch_sizes=(1, 100))
+
+        expected = {'latency_p50_ms', 'latency_p99_ms', 'throughput_b1_rows_per_s',
+                    'throughput_b100_rows_per_s', 'size_bytes', 'load_ms', 'memory_mb'}
+        assert set(profile) == expected
+        assert all(value > 0 for value in profile.values())
+        assert profile['latency_p99_ms'] >= profile['latency_p50_ms']
+
+    def test_batches_larger_than_data(self, data):
+        """Test batches are filled by cycling through the rows"""
+        X, y = data
+        model = LogisticRegression().fit(X, y)
+        throughput = measure_throughput(model, X.iloc[:10], batch_sizes=(1000,), min_calls=1)
+        assert throughput['throughput_b1000_rows_per_s'] > 0
+
+    def test_larger_model_costs_more(self, data):
+        """Test a forest is bigger and slower to load than a linear model"""
+        X, y = data
+        linear = profile_model(LogisticRegression().fit(X, y), X, n_repeats=10, batch_sizes=(1,))
+        forest = profile_model(RandomForestClassifier(n_estimators=50, random_state=0).fit(X, y), X,
+                               n_repeats=10, batch_sizes=(1,))
+        assert forest['size_bytes'] > linear['size_bytes']
+        assert forest['memory_mb'] > linear['memory_mb']
+
+    def test_served_latency(self, data, monkeypatch):
+        """Test tree ensembles are timed through the compiled predictor the API serves"""
+        import profiling
+
+        X, y = data
+        forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+        timed = []
+        measure = profiling.measure_latency
+        monkeypatch.setattr(profiling, 'measure_latency',
+                            lambda model, *args, **kwargs: timed.append(model)
+                            or measure(model, *args, **kwargs))
+        profile = profile_model(forest, X, n_repeats=10, batch_sizes=(1,))
+
+        assert type(timed[0]).__name__ == 'FlatTreeEnsemble'
+        assert timed[1] is forest
+        assert profile['latency_p99_ms'] >= profile['latency_p50_ms'] > 0
+        assert profile['sklearn_latency_p99_ms'] >= profile['sklearn_latency_p50_ms'] > 0
+
+
+class TestSelectionPolicy:
+    """Test cases for SelectionPolicy"""
+
+    def test_best_quality_without_slos(self, comparison):
+        """Test the best metric wins when no SLO is set"""
+        assert SelectionPolicy().select(comparison) == 'forest'
+
+    def test_latency_slo(self, comparison):
+        """Test models over the latency SLO are not eligible"""
+        policy = SelectionPolicy(max_latency_p99_ms=5)
+        assert policy.select(comparison) == 'small_forest'
+        assert policy.violations(comparison.loc['forest']) == ['latency_p99_ms 20 > 5']
+
+    def test_memory_slo(self, comparison):
+        """Test models over the memory SLO are not eligible"""
+        assert SelectionPolicy(max_memory_mb=1).select(comparison) == 'linear'
+
+    def test_tolerance_prefers_faster_model(self, comparison):
+        """Test near-equivalent models are broken by latency"""
+        assert SelectionPolicy(tolerance=0.01).select(comparison) == 'small_forest'
+        assert SelectionPolicy(tolerance=0.1).select(comparison) == 'linear'
+
+    def test_no_eligible_model_raises_error(self, comparison):
+        """Test an unmeetable SLO is reported"""
+        with pytest.raises(ValueError, match="No model meets"):
+            SelectionPolicy(max_latency_p99_ms=0.1).select(comparison)
+
+    def test_missing_measurement_violates_slo(self, comparison):
+        """Test a model without a measurement of an SLO column is not eligible"""
+        comparison.loc['forest', 'latency_p99_ms'] = np.nan
+        policy = SelectionPolicy(max_latency_p99_ms=5)
+        assert policy.violations(comparison.loc['forest']) == ['latency_p99_ms not measured']
+        assert policy.select(comparison) == 'small_forest'
+        # Without the SLO the measurement is not needed
+        assert SelectionPolicy(tie_breaker='memory_mb').select(comparison) == 'forest'
+
+    def test_missing_columns_raise_error(self, comparison):
+        """Test a table without the policy's columns fails with a clear error"""
+        with pytest.raises(ValueError, match="memory_mb"):
+            SelectionPolicy(max_memory_mb=1).select(comparison.drop(columns='memory_mb'))
+        with pytest.raises(ValueError, match="oof_roc_auc"):
+            SelectionPolicy().select(comparison.rename(columns={'oof_roc_auc': 'test_roc_auc'}))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,171 @@
+"""
+Unit tests for budgeted hyperparameter search
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from search import BayesianSearch, SuccessiveHalvingSearch
+from train import ModelTrainer
+
+
+@pytest.fixture
+def classification_data():
+    """Create a learnable binary classification problem"""
+    rng = np.random.default_rng(42)
+    n_samples = 300
+    X = pd.DataFrame(rng.normal(size=(n_samples, 5)), columns=[f'feature_{i}' for i in range(5)])
+    logits = 2 * X['feature_0'] - X['feature_1']
+    y = (logits + rng.normal(scale=0.5, size=n_samples) > 0).astype(int).to_numpy()
+    return X, y
+
+
+PARAM_GRID = {'C': [0.001, 0.01, 0.1, 1.0, 10.0], 'class_weight': [None, 'balanced']}
+
+
+class TestSuccessiveHalvingSearch:
+    """Test cases for SuccessiveHalvingSearch"""
+
+    def test_respects_fit_budget(self, classification_data):
+        """Test search stays within max_fits and returns a refit best model"""
+        X, y = classification_data
+        search = SuccessiveHalvingSearch(
+            LogisticRegression(max_iter=1000), PARAM_GRID, cv=3, max_fits=20
+        )
+        search.fit(X, y)
+
+        assert search.n_fits_ <= 20
+        assert search.best_params_['C'] in PARAM_GRID['C']
+        assert search.best_estimator_.C == search.best_params_['C']
+        assert any(trial['status'] == 'pruned' for trial in search.trials_)
+
+    def test_estimator_resource(self, classification_data):
+        """Test rungs grow n_estimators and the final model uses the largest"""
+        X, y = classification_data
+        search = SuccessiveHalvingSearch(
+            RandomForestClassifier(n_estimators=27, random_state=0),
+            {'max_depth': [2, 4, 8]}, resource='n_estimators', factor=3, min_resources=3, cv=3
+        )
+        search.fit(X, y)
+
+        resources = sorted({trial['resource'] for trial in search.trials_})
+        assert resources[-1] == 27
+        assert len(resources) > 1
+        assert search.best_estimator_.n_estimators == 27
+
+    def test_resource_in_grid_raises_error(self, classification_data):
+        """Test the halving resource cannot also be searched"""
+        X, y = classification_data
+        search = SuccessiveHalvingSearch(
+            RandomForestClassifier(), {'n_estimators': [10, 20]}, resource='n_estimators'
+        )
+        with pytest.raises(ValueError):
+            search.fit(X, y)
+
+
+class TestBayesianSearch:
+    """Test cases for BayesianSearch"""
+
+    def test_finds_good_region_within_budget(self, classification_data):
+        """Test search respects max_fits and keeps the best completed trial"""
+        X, y = classification_data
+        search = BayesianSearch(
+            LogisticRegression(max_iter=1000), PARAM_GRID, cv=3, n_initial=2, max_fits=12
+        )
+        search.fit(X, y)
+
+        assert search.n_fits_ <= 12
+        assert search.best_score_ == max(
+            trial['score'] for trial in search.trials_ if trial['status'] == 'complete'
+        )
+        assert search.best_estimator_.C == search.best_params_['C']
+
+    def test_parallel_folds_match_sequential(self, classification_data):
+        """Test folds run in parallel batches give the trials of a sequential search"""
+        from joblib import parallel_config
+
+        X, y = classification_data
+        trials = []
+        for n_jobs in (1, 2):
+            # No pruning, so batching cannot change which folds run
+            search = BayesianSearch(LogisticRegression(max_iter=1000), PARAM_GRID, cv=3,
+                                    n_initial=2, max_fits=12, prune_z=np.inf, n_jobs=n_jobs)
+            with parallel_config(backend='threading'):
+                search.fit(X, y)
+            trials.append([(trial['params'], trial['fold_scores']) for trial in search.trials_])
+
+        assert len(trials[0]) == 4
+        assert trials[1] == trials[0]
+
+    def test_time_budget(self, classification_data):
+        """Test a zero time budget evaluates nothing"""
+        X, y = classification_data
+        search = BayesianSearch(LogisticRegression(), PARAM_GRID, time_budget=0)
+        with pytest.raises(RuntimeError):
+            search.fit(X, y)
+
+
+class TestHyperparameterTuning:
+    """Test cases for ModelTrainer.hyperparameter_tuning engines"""
+
+    @pytest.mark.parametrize("search", ['grid', 'halving', 'bayes'])
+    def test_engines_share_signature(self, classification_data, search):
+        """Test every engine returns (best_estimator, best_params) and logs trials"""
+        from mlflow.tracking import MlflowClient
+        from tracking import wait as wait_for_tracking
+
+        X, y = classification_data
+        trainer = ModelTrainer(experiment_name="test_tuning")
+        model, params = trainer.hyperparameter_tuning(
+            'logistic_regression', X, y, PARAM_GRID, search=search, max_fits=25
+        )
+
+        assert hasattr(model, 'predict_proba')
+        assert params['C'] in PARAM_GRID['C']
+
+        wait_for_tracking()
+        run = MlflowClient().get_run(trainer._run.run_id)
+        assert run.data.tags['search'] == search
+        history = MlflowClient().get_metric_history(run.info.run_id, 'trial_score')
+        assert len(history) == int(run.data.metrics['n_trials'])
+
+    def test_tracking_server_down(self, classification_data, tmp_path, monkeypatch):
+        """Test tuning completes and spools its trials when MLflow is unreachable"""
+        from functools import partial
+        import tracking
+        import train
+
+        class UnreachableClient:
+            def __getattr__(self, name):
+                def fail(*args, **kwargs):
+                    raise ConnectionError("tracking server unreachable")
+                return fail
+
+        monkeypatch.setattr(train, 'start_run', partial(tracking.start_run,
+                                                        client=UnreachableClient(),
+                                                        spool_dir=tmp_path))
+        X, y = classification_data
+        trainer = ModelTrainer(experiment_name="test_tuning")
+        model, _ = trainer.hyperparameter_tuning('logistic_regression', X, y, PARAM_GRID,
+                                                 search='bayes', max_fits=10)
+        tracking.wait()
+
+        assert hasattr(model, 'predict_proba')
+        assert list(tracking.spooled_runs(tmp_path)) == [trainer._run.run_id]
+
+    def test_unknown_engine_raises_error(self, classification_data):
+        """Test unknown search engines are rejected"""
+        X, y = classification_data
+        trainer = ModelTrainer(experiment_name="test_tuning")
+        with pytest.raises(ValueError):
+            trainer.hyperparameter_tuning('logistic_regression', X, y, PARAM_GRID, search='random')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
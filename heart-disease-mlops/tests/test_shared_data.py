@@ -0,0 +1,170 @@
+"""
+Unit tests for memory-mapped training matrices shared between workers
+"""
+import pickle
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from shared_data import (
+    SharedFrame, backing_file, memmap_data, memory_stats, resolve, share, worker_memory
+)
+from train import ModelTrainer
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample training and test data"""
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(rng.normal(size=(120, 5)), columns=[f'feature_{i}' for i in range(5)],
+                     index=np.arange(1000, 1120))
+    y = (X['feature_0'] + rng.normal(scale=0.5, size=120) > 0).astype(int).to_numpy()
+    return X.iloc[:90], y[:90], X.iloc[90:], y[90:]
+
+
+class TestMemmap:
+    """Test cases for memory-mapped copies"""
+
+    def test_roundtrip(self, sample_data, tmp_path):
+        """Test memory-mapped copies keep values, columns, index and types"""
+        X_train, y_train, _, _ = sample_data
+        X_shared, y_shared = memmap_data(tmp_path, X_train, y_train)
+
+        pd.testing.assert_frame_equal(X_shared, X_train)
+        np.testing.assert_array_equal(y_shared, y_train)
+        assert isinstance(y_shared, np.ndarray)
+        assert Path(backing_file(X_shared)).parent == tmp_path
+        assert backing_file(y_shared) is not None
+
+    def test_backing_file(self, sample_data, tmp_path):
+        """Test only data covering a whole mapped file counts as memory-mapped"""
+        X_train, _, _, _ = sample_data
+        X_shared, = memmap_data(tmp_path, X_train)
+
+        assert backing_file(X_train) is None
+        assert backing_file(X_shared.iloc[:10]) is None
+        assert backing_file(X_shared[['feature_0']]) is None
+
+    def test_already_mapped_data_is_not_rewritten(self, sample_data, tmp_path):
+        """Test memmap_data passes memory-mapped data through"""
+        X_train, _, _, _ = sample_data
+        X_shared, = memmap_data(tmp_path, X_train)
+        again, = memmap_data(tmp_path, X_shared)
+
+        assert again is X_shared
+        assert len(list(tmp_path.glob("*.npy"))) == 1
+
+    def test_unchanged_inputs_reuse_files(self, sample_data, tmp_path):
+        """Test repeated calls with the same data map the same content-addressed files"""
+        X_train, y_train, X_test, _ = sample_data
+        first = memmap_data(tmp_path, X_train, y_train)
+        second = memmap_data(tmp_path, X_train.copy(), y_train.copy())
+
+        assert [backing_file(data) for data in first] == [backing_file(data) for data in second]
+        assert len(list(tmp_path.glob("*.npy"))) == 2
+        assert not list(tmp_path.glob(".*"))
+
+        # Different content gets its own file
+        memmap_data(tmp_path, X_test)
+        assert len(list(tmp_path.glob("*.npy"))) == 3
+
+
+class TestSharedFrame:
+    """Test cases for SharedFrame"""
+
+    def test_pickles_as_reference(self, sample_data, tmp_path):
+        """Test the pickled reference is small and maps the same file"""
+        X_train, y_train, _, _ = sample_data
+        X_shared, y_shared = memmap_data(tmp_path, X_train, y_train)
+
+        payload = pickle.dumps(share(X_shared))
+        assert len(payload) < X_train.to_numpy().nbytes
+        restored = resolve(pickle.loads(payload))
+        pd.testing.assert_frame_equal(restored, X_train)
+        assert backing_file(restored) == backing_file(X_shared)
+        np.testing.assert_array_equal(resolve(pickle.loads(pickle.dumps(share(y_shared)))), y_train)
+
+    def test_unmapped_data_passes_through(self, sample_data):
+        """Test share leaves ordinary data unchanged and SharedFrame rejects it"""
+        X_train, _, _, _ = sample_data
+        assert share(X_train) is X_train
+        with pytest.raises(ValueError):
+            SharedFrame(X_train)
+
+
+class TestWorkerMemory:
+    """Test cases for worker memory reports"""
+
+    def test_worker_memory(self):
+        """Test the current process reports its peak memory"""
+        report = worker_memory()
+        assert report['peak_rss_mb'] > 0
+
+    def test_memory_stats(self):
+        """Test reports are reduced per process, then over processes"""
+        reports = [
+            {'pid': 1, 'peak_rss_mb': 100.0, 'private_mb': 10.0},
+            {'pid': 1, 'peak_rss_mb': 120.0, 'private_mb': 5.0},
+            {'pid': 2, 'peak_rss_mb': 80.0, 'private_mb': None},
+        ]
+        stats = memory_stats(reports, 'cv_worker')
+
+        assert stats['cv_worker_n_processes'] == 2
+        assert stats['cv_worker_peak_rss_mb_max'] == 120.0
+        assert stats['cv_worker_peak_rss_mb_mean'] == 100.0
+        assert stats['cv_worker_private_mb_max'] == 10.0
+
+
+class TestTrainerSharedMemory:
+    """Test cases for ModelTrainer with memory-mapped matrices"""
+
+    def test_matrices_written_once(self, sample_data, tmp_path):
+        """Test the same training data is memory-mapped once per trainer"""
+        X_train, y_train, X_test, y_test = sample_data
+        trainer = ModelTrainer(experiment_name="test_shared_data", evaluation='cv', cv_folds=3,
+                               cv_n_jobs=2, memmap_dir=tmp_path)
+        trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+        trainer.train_logistic_regression(X_train, y_train, X_test, y_test)
+
+        assert len(list(tmp_path.glob("*.npy"))) == 2
+
+    def test_train_all_reports_worker_memory(self, sample_data, tmp_path):
+        """Test process-pool families receive shared matrices and report their memory"""
+        X_train, y_train, X_test, y_test = sample_data
+        trainer = ModelTrainer(experiment_name="test_shared_data", memmap_dir=tmp_path)
+        results, comparison = trainer.train_all(
+            X_train, y_train, X_test, y_test,
+            families=['logistic_regression', 'random_forest'],
+            params={'random_forest': {'n_estimators': 10}},
+            n_workers=2, cpu_budget=2
+        )
+
+        assert set(results) == {'logistic_regression', 'random_forest'}
+        assert (comparison['worker_peak_rss_mb'] > 0).all()
+        assert 'worker_private_mb' in comparison.columns
+
+    def test_prepare_data_memmap(self, tmp_path):
+        """Test prepare_data can return memory-mapped matrices"""
+        from preprocessing import prepare_data
+
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.integers(0, 100, size=(40, 13)),
+                            columns=['age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg',
+                                     'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal'])
+        data['target'] = np.tile([0, 1], 20)
+        data_file = tmp_path / "heart.csv"
+        data.to_csv(data_file, index=False)
+
+        X_train, X_test, y_train, y_test, _ = prepare_data(data_file, memmap_dir=tmp_path / "mm")
+
+        for array in (X_train, X_test, y_train, y_test):
+            assert backing_file(array) is not None
+        assert len(X_train) == 32
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
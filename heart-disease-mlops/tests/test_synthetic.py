@@ -0,0 +1,79 @@
+"""
+Unit tests for the synthetic patient generator
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config import CONTINUOUS_FEATURES, FEATURE_NAMES
+from synthetic import SyntheticPatientGenerator
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "processed" / "heart_disease.csv"
+
+
+@pytest.fixture(scope="module")
+def source_data():
+    """Processed Cleveland data the generator is fitted to"""
+    return pd.read_csv(DATA_PATH)
+
+
+@pytest.fixture(scope="module")
+def generator(source_data):
+    """Generator fitted to the Cleveland data"""
+    return SyntheticPatientGenerator().fit(source_data)
+
+
+class TestSyntheticPatientGenerator:
+    """Test cases for SyntheticPatientGenerator"""
+
+    def test_preserves_distribution(self, generator, source_data):
+        """Test class balance, marginals, correlations and missingness"""
+        synthetic = generator.sample(200_000, rng=0)
+
+        assert list(synthetic.columns) == FEATURE_NAMES + ['target']
+        assert abs(synthetic['target'].mean() - source_data['target'].mean()) < 0.01
+        for column in FEATURE_NAMES:
+            assert abs(synthetic[column].mean() - source_data[column].mean()) < 0.05 * source_data[column].std()
+            # Categorical codes are never invented
+            if column not in CONTINUOUS_FEATURES:
+                assert set(synthetic[column].dropna()) <= set(source_data[column].dropna())
+
+        real_corr = source_data[FEATURE_NAMES].corr(method='spearman').to_numpy()
+        synthetic_corr = synthetic[FEATURE_NAMES].astype(float).corr(method='spearman').to_numpy()
+        assert np.abs(real_corr - synthetic_corr).max() < 0.15
+
+        for column in ['ca', 'thal']:
+            assert abs(synthetic[column].isna().mean() - source_data[column].isna().mean()) < 0.005
+
+    def test_deterministic_chunks(self, generator):
+        """Test the same seed reproduces the same rows"""
+        first = pd.concat(generator.iter_chunks(2500, chunk_size=1000, seed=7))
+        second = pd.concat(generator.iter_chunks(2500, chunk_size=1000, seed=7))
+        pd.testing.assert_frame_equal(first, second)
+        assert len(first) == 2500
+        assert not first.equals(pd.concat(generator.iter_chunks(2500, chunk_size=1000, seed=8)))
+
+    def test_api_records_complete(self, generator):
+        """Test API payloads have every feature and no missing values"""
+        records = list(generator.iter_records(500, seed=1))
+        assert len(records) == 500
+        assert all(set(record) == set(FEATURE_NAMES) for record in records)
+        assert not any(value is None or value != value for record in records for value in record.values())
+
+    def test_write_shards(self, generator, tmp_path):
+        """Test sharded CSV output and the saved generator"""
+        paths = generator.write_shards(2500, tmp_path, rows_per_shard=1000, chunk_size=400, seed=3)
+        assert [path.name for path in paths] == ['part-00000.csv', 'part-00001.csv', 'part-00002.csv']
+        assert sum(len(pd.read_csv(path)) for path in paths) == 2500
+
+        generator.save(tmp_path / "generator.json")
+        loaded = SyntheticPatientGenerator.load(tmp_path / "generator.json")
+        pd.testing.assert_frame_equal(loaded.sample(100, rng=5), generator.sample(100, rng=5))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,148 @@
+"""
+Unit tests for buffered MLflow logging
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mlflow.tracking import MlflowClient
+from sklearn.linear_model import LogisticRegression
+import tracking
+from tracking import spooled_runs, start_run, sync_spool
+
+
+class UnreachableClient:
+    """MlflowClient stand-in for a tracking server that is down"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("tracking server unreachable")
+        return fail
+
+
+class SlowClient:
+    """MlflowClient stand-in for a tracking server that answers after a long delay"""
+
+    tracking_uri = "http://slow-tracking-server"
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.created = []
+        self.terminated = []
+
+    def get_experiment_by_name(self, name):
+        return SimpleNamespace(experiment_id="0")
+
+    def create_run(self, experiment_id, run_name=None, tags=None):
+        time.sleep(self.delay)
+        self.created.append(run_name)
+        return SimpleNamespace(info=SimpleNamespace(run_id=f"server-{run_name}"))
+
+    def set_terminated(self, run_id, status=None, end_time=None):
+        self.terminated.append((run_id, status))
+
+
+class TestRunLogger:
+    """Test cases for RunLogger"""
+
+    def test_batched_logging(self, tmp_path):
+        """Test buffered metrics, params, tags and the model reach the run"""
+        X = np.random.default_rng(0).normal(size=(20, 2))
+        model = LogisticRegression().fit(X, X[:, 0] > 0)
+
+        with start_run("test_batch", "test_tracking", spool_dir=tmp_path) as run:
+            run.log_params({'C': 1.0, 'solver': 'lbfgs'})
+            run.set_tag('engine', 'exact')
+            run.log_metrics({'accuracy': 0.9, 'roc_auc': 0.95})
+            run.log_model(model, "model")
+        tracking.wait()
+
+        client = MlflowClient()
+        data = client.get_run(run.run_id).data
+        assert data.params == {'C': '1.0', 'solver': 'lbfgs'}
+        assert data.metrics == {'accuracy': 0.9, 'roc_auc': 0.95}
+        assert data.tags['engine'] == 'exact'
+        assert client.get_run(run.run_id).info.status == 'FINISHED'
+        assert 'model/MLmodel' in {a.path for a in client.list_artifacts(run.run_id, 'model')}
+        assert spooled_runs(tmp_path) == {}
+
+    def test_failed_run_status(self, tmp_path):
+        """Test an exception inside the run marks it FAILED"""
+        with pytest.raises(RuntimeError):
+            with start_run("test_failed", "test_tracking", spool_dir=tmp_path) as run:
+                raise RuntimeError("training failed")
+        tracking.wait()
+
+        assert MlflowClient().get_run(run.run_id).info.status == 'FAILED'
+
+
+class TestOfflineSpool:
+    """Test cases for offline spooling and sync"""
+
+    def test_offline_run_synced_later(self, tmp_path):
+        """Test a run logged while the server is down is created on sync"""
+        artifact_dir = tmp_path / "plots"
+        artifact_dir.mkdir()
+        (artifact_dir / "roc_curve.png").write_bytes(b"png")
+        spool_dir = tmp_path / "spool"
+
+        with start_run("test_offline", "test_tracking", client=UnreachableClient(),
+                       spool_dir=spool_dir) as run:
+            run.log_params({'n_estimators': 10})
+            run.log_metrics({'accuracy': 0.8})
+            run.log_artifacts(artifact_dir)
+        tracking.wait()
+
+        assert run.run_id.startswith(tracking.OFFLINE_PREFIX)
+        assert spooled_runs(spool_dir) == {run.run_id: 4}
+
+        synced = sync_spool(spool_dir)
+        run_id = synced[run.run_id]
+        client = MlflowClient()
+        assert client.get_run(run_id).data.metrics == {'accuracy': 0.8}
+        assert client.get_run(run_id).info.run_name == 'test_offline'
+        assert 'roc_curve.png' in {a.path for a in client.list_artifacts(run_id)}
+        assert spooled_runs(spool_dir) == {}
+
+    def test_slow_server_does_not_block_training(self, tmp_path, monkeypatch):
+        """Test run creation gives up after the timeout and later runs start offline at once"""
+        monkeypatch.setattr(tracking, 'CREATE_RUN_TIMEOUT', 0.05)
+        monkeypatch.setattr(tracking, '_offline_until', {})
+        client = SlowClient(delay=0.5)
+
+        started = time.perf_counter()
+        with start_run("test_slow", "test_tracking", client=client, spool_dir=tmp_path) as run:
+            run.log_metrics({'accuracy': 0.8})
+        with start_run("test_slow_2", "test_tracking", client=client, spool_dir=tmp_path) as second:
+            pass
+        assert time.perf_counter() - started < 0.4
+
+        tracking.wait()
+        tracking._creator.submit(lambda: None).result()
+        assert run.run_id.startswith(tracking.OFFLINE_PREFIX)
+        assert second.run_id.startswith(tracking.OFFLINE_PREFIX)
+        assert spooled_runs(tmp_path) == {run.run_id: 3, second.run_id: 2}
+        # The run the server created too late is not left running
+        assert client.created == ['test_slow']
+        assert client.terminated == [('server-test_slow', 'KILLED')]
+
+    def test_failed_writes_keep_order(self, tmp_path):
+        """Test writes after a failure are spooled behind it for the same run"""
+        with start_run("test_partial", "test_tracking", spool_dir=tmp_path) as run:
+            run.client = UnreachableClient()
+            run.log_metrics({'accuracy': 0.7})
+        tracking.wait()
+
+        assert spooled_runs(tmp_path) == {run.run_id: 2}
+        assert sync_spool(tmp_path) == {run.run_id: run.run_id}
+        assert MlflowClient().get_run(run.run_id).info.status == 'FINISHED'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
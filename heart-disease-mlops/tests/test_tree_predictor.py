@@ -0,0 +1,126 @@
+"""
+Unit tests for the vectorized tree ensemble predictor
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sklearn.datasets import make_classification
+from sklearn.ensemble import (
+    ExtraTreesClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier,
+    RandomForestClassifier
+)
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from tree_predictor import FlatTreeEnsemble, compile_predictor
+from train import FoldEnsembleClassifier
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Binary and three-class targets over 13 features, as a DataFrame"""
+    X, y = make_classification(n_samples=400, n_features=13, n_informative=6, random_state=0)
+    X = pd.DataFrame(X, columns=[f'feature_{i}' for i in range(13)])
+    y3 = y + (X['feature_0'] > 1).to_numpy()
+    return X, y, y3
+
+
+MODELS = {
+    'decision_tree': lambda: DecisionTreeClassifier(max_depth=6, random_state=0),
+    'random_forest': lambda: RandomForestClassifier(n_estimators=30, max_depth=8, n_jobs=-1,
+                                                    random_state=0),
+    'extra_trees': lambda: ExtraTreesClassifier(n_estimators=20, random_state=0),
+    'gradient_boosting': lambda: GradientBoostingClassifier(n_estimators=30, random_state=0),
+    'hist_gradient_boosting': lambda: HistGradientBoostingClassifier(max_iter=30, random_state=0),
+}
+
+
+class TestParity:
+    """Test cases for agreement with sklearn"""
+
+    @pytest.mark.parametrize("name", list(MODELS))
+    @pytest.mark.parametrize("n_classes", [2, 3])
+    def test_matches_sklearn(self, data, name, n_classes):
+        """Test probabilities and classes match sklearn's"""
+        X, y, y3 = data
+        model = MODELS[name]().fit(X, y if n_classes == 2 else y3)
+        predictor = FlatTreeEnsemble.from_model(model)
+
+        np.testing.assert_allclose(predictor.predict_proba(X), model.predict_proba(X),
+                                   rtol=1e-10, atol=1e-12)
+        np.testing.assert_array_equal(predictor.predict(X), model.predict(X))
+
+    @pytest.mark.parametrize("name", ['random_forest', 'hist_gradient_boosting'])
+    def test_missing_values(self, data, name):
+        """Test rows with NaN follow the learned missing-value direction"""
+        X, y, _ = data
+        X = X.copy()
+        X.iloc[::7, 2] = np.nan
+        model = MODELS[name]().fit(X, y)
+        predictor = FlatTreeEnsemble.from_model(model)
+        np.testing.assert_allclose(predictor.predict_proba(X), model.predict_proba(X),
+                                   rtol=1e-10, atol=1e-12)
+
+    def test_single_row_and_chunks(self, data, monkeypatch):
+        """Test single rows and batches split into several chunks"""
+        import tree_predictor
+
+        X, y, _ = data
+        model = MODELS['random_forest']().fit(X, y)
+        predictor = FlatTreeEnsemble.from_model(model)
+        np.testing.assert_allclose(predictor.predict_proba(X.iloc[[5]]),
+                                   model.predict_proba(X.iloc[[5]]))
+
+        monkeypatch.setattr(tree_predictor, 'CHUNK_ROWS', 64)
+        np.testing.assert_allclose(predictor.predict_proba(X), model.predict_proba(X))
+
+    def test_fold_ensemble(self, data):
+        """Test fold ensembles are compiled (forests merged into one traversal)"""
+        X, y, _ = data
+        forests = FoldEnsembleClassifier([MODELS['random_forest']().set_params(random_state=i)
+                                          .fit(X, y) for i in range(3)])
+        merged = compile_predictor(forests)
+        assert isinstance(merged, FlatTreeEnsemble) and merged.n_trees == 90
+        np.testing.assert_allclose(merged.predict_proba(X), forests.predict_proba(X))
+
+        boosted = FoldEnsembleClassifier([MODELS['gradient_boosting']().fit(X, y)] * 2)
+        np.testing.assert_allclose(compile_predictor(boosted).predict_proba(X),
+                                   boosted.predict_proba(X))
+
+
+class TestCompile:
+    """Test cases for compile_predictor"""
+
+    def test_unsupported_model(self, data):
+        """Test models other than tree ensembles are not compiled"""
+        X, y, _ = data
+        assert compile_predictor(LogisticRegression(max_iter=500).fit(X, y)) is None
+
+    def test_layout(self, data):
+        """Test the node arrays hold every node of every tree"""
+        X, y, _ = data
+        model = MODELS['random_forest']().fit(X, y)
+        predictor = FlatTreeEnsemble.from_model(model)
+
+        assert predictor.n_trees == 30
+        assert predictor.n_nodes == sum(tree.tree_.node_count for tree in model.estimators_)
+        assert predictor.is_leaf.sum() == sum(tree.tree_.n_leaves for tree in model.estimators_)
+        assert predictor.nbytes > 0
+
+    def test_feature_validation(self, data):
+        """Test mismatched columns are rejected like sklearn does"""
+        X, y, _ = data
+        predictor = FlatTreeEnsemble.from_model(MODELS['decision_tree']().fit(X, y))
+        with pytest.raises(ValueError):
+            predictor.predict_proba(X[X.columns[::-1]])
+        with pytest.raises(ValueError):
+            predictor.predict_proba(X.to_numpy()[:, :5])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])